@@ -4,13 +4,19 @@ from google.adk.agents import Agent
 from google.adk.models.lite_llm import LiteLlm 
 from google.adk.tools.agent_tool import AgentTool 
 
-from .utils.prompt_utils import get_prompt_yaml
+from .utils.prompt_utils import get_prompt_instruction_provider
 from .utils.file_utils import save_imgfile_artifact_before_agent_callback
 from .utils.file_utils import remove_non_text_part_from_llmrequest_before_model_callback
+from .utils.log_utils import (
+    METRICS_EXPORTER_AUTOSTART,
+    start_metrics_exporter,
+    trace_llm_after_model_callback,
+    trace_llm_before_model_callback,
+)
 from .sub_agents import data_search_agent
 
-ROOT_AGENT_PROMPT = get_prompt_yaml(tag="prompt")
-GLOBAL_INSTRUCTION = get_prompt_yaml(tag="global_instruction")
+ROOT_AGENT_PROMPT = get_prompt_instruction_provider(tag="prompt")
+GLOBAL_INSTRUCTION = get_prompt_instruction_provider(tag="global_instructions")
 
 root_agent = Agent(
     name = "root_agent",
@@ -23,9 +29,18 @@ root_agent = Agent(
 
     sub_agents=[data_search_agent],
     before_agent_callback = save_imgfile_artifact_before_agent_callback,
-    before_model_callback = remove_non_text_part_from_llmrequest_before_model_callback,
+    before_model_callback = [
+        remove_non_text_part_from_llmrequest_before_model_callback,
+        trace_llm_before_model_callback,
+    ],
+    after_model_callback = trace_llm_after_model_callback,
     output_key="result",
     global_instruction=GLOBAL_INSTRUCTION,
 )
 
+# server process에서 METRICS_EXPORTER_AUTOSTART=true 와 METRICS_EXPORT_PORT / METRICS_EXPORT_PATH 설정 시
+# 단계별 latency metrics export 시작 (테스트 / benchmark에서 import 할 때는 시작하지 않음)
+if METRICS_EXPORTER_AUTOSTART:
+    start_metrics_exporter()
+
 
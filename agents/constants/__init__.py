@@ -4,5 +4,10 @@ from .constants import (
     ARTIFACT_STATES,
     NUM_OF_DISPLAYED_DATA,
     BGA_COLUMN_NAMES_STATES,
+    BGA_STANDARD_COLUMN_NAMES_STATES,
     BGA_COLUMN_NAMES_REF_DOCS_STATES,
+    BGA_CACHED_SQL_STATES,
+    BGA_GENERATED_SQL_STATES,
+    BGA_SQL_VALIDATION_STATES,
+    BGA_VALIDATED_SQL_STATES,
 )
\ No newline at end of file
@@ -4,5 +4,11 @@ NUM_OF_DISPLAYED_DATA = 5
 # State
 ARTIFACT_STATES = "artifact_states"
 BGA_COLUMN_NAMES_STATES = "bga_column_names"
+BGA_STANDARD_COLUMN_NAMES_STATES = "bga_standard_column_names"
 BGA_COLUMN_NAMES_REF_DOCS_STATES = "bga_column_names_reference_docs"
+BGA_CACHED_SQL_STATES = "bga_cached_sql"
+BGA_GENERATED_SQL_STATES = "bga_generated_sql"
+BGA_SQL_VALIDATION_STATES = "bga_sql_validation"
+# SpeculativeSqlGenerationAgent가 이미 검증한 SQL과 검증 결과 (SqlValidationAgent가 다시 검증하지 않도록 전달)
+BGA_VALIDATED_SQL_STATES = "bga_validated_sql"
 
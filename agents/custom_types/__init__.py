@@ -0,0 +1,3 @@
+# Custom Types
+from .tool_response import ToolResponse, ToolResponseData
+from .data_state import AppState, BaseArtifact, ImgArtifact, TableArtifact
@@ -26,13 +26,16 @@ class ImgArtifact(BaseArtifact):
     type: Literal["img"] = "img"
     img_size: Optional[Tuple[int, int]] = None
 
-class TabularArtifact(BaseArtifact):
+class TableArtifact(BaseArtifact):
     """
     테이블 artifact 상태 클래스
+    format / compression 은 artifact 저장 형식이며, 값이 없으면 utf-8-sig CSV 입니다.
     """
     type: Literal["table"] = "table"
     sql_query: Optional[str] = None
     data_length: Optional[int] = None
+    format: Optional[Literal["csv", "parquet", "arrow"]] = None
+    compression: Optional[str] = None
 
 class AppState(BaseModel):
     """
@@ -42,7 +45,7 @@ class AppState(BaseModel):
 
     def to_json(self) -> Dict[str, Any]:
         return {
-            'artifacts': [artifacts.to_json() for artifact in self.artifacts]
+            'artifacts': [artifact.to_json() for artifact in self.artifacts]
         }
 
     @classmethod
@@ -1,10 +1,12 @@
 import json
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
 
 from google.genai.types import Content
-from mcp.types import CallToolResult, TextContent
 from pydantic import BaseModel
 
+if TYPE_CHECKING:
+    from mcp.types import CallToolResult
+
 
 class ToolResponseData(BaseModel):
     type: Literal["image", "markdown_table", "csv_table", "excel_table"]
@@ -27,7 +29,9 @@ class ToolResponse(BaseModel):
     def to_json(self) -> list[dict] | dict:
         return self.model_dump(mode="python", exclude_none=True)
 
-    def to_mcp_result(self) -> CallToolResult:
+    def to_mcp_result(self) -> "CallToolResult":
+        from mcp.types import CallToolResult, TextContent
+
         contents = Content(parts=[TextContent(type="text", text=self.message)])
         contents.parts.append(TextContent(type="text", text=json.dumps(self.data, ensure_ascii=False)))
         return CallToolResult(
@@ -2,47 +2,64 @@ import os
 
 from google.adk.agents import LlmAgent, SequentialAgent, LoopAgent
 from google.adk.models.lite_llm import LiteLlm 
+from google.genai import types
 from pydantic import BaseModel, Field
 
-from agents.constants.constants import BGA_COLUMN_NAMES_STATES
+from agents.constants.constants import (
+    BGA_COLUMN_NAMES_STATES,
+    BGA_GENERATED_SQL_STATES,
+    BGA_STANDARD_COLUMN_NAMES_STATES,
+)
+from agents.sub_agents.data_search_agent.sub_agents import (
+    ColumnNameStandardizationAgent,
+    SpeculativeSqlGenerationAgent,
+    SqlValidationAgent,
+)
+from agents.sub_agents.data_search_agent.sub_agents.speculative_sql_generation_agent import (
+    BGA_SQL_SPECULATIVE_GENERATION,
+    BGA_SQL_SPECULATIVE_TEMPERATURES,
+)
 from agents.sub_agents.data_search_agent.tools import (
     exit_column_extraction_loop,
     query_bga_database,
-    get_sql
+    get_sql_query_references_before_model_callback,
+    semantic_sql_cache_before_agent_callback,
+    reference_prefetch_before_agent_callback,
+    reference_prefetch_after_agent_callback,
 )
 
+from ...utils.context_budget_utils import context_budget_before_model_callback
 from ...utils.file_utils import save_file_artifact_after_tool_callback
-from ...utils.prompt_utils import get_prompt_yaml
+from ...utils.llm_response_cache_utils import (
+    llm_response_cache_after_model_callback,
+    llm_response_cache_before_model_callback,
+)
+from ...utils.log_utils import trace_llm_after_model_callback, trace_llm_before_model_callback
+from ...utils.prompt_utils import get_prompt_instruction_provider, get_prompt_yaml
 
 COLUMN_NAME_EXTRACTOR_DESCRIPTION = get_prompt_yaml(
     tag="column_name_extractor_description"
 )
-COLUMN_NAME_EXTRACTOR_INSTRUCTION = get_prompt_yaml(
+COLUMN_NAME_EXTRACTOR_INSTRUCTION = get_prompt_instruction_provider(
     tag="column_name_extractor_instruction"
 )
 COLUMN_NAME_REVIEWER_DESCRIPTION = get_prompt_yaml(
     tag="column_name_reviewer_description"
 )
-COLUMN_NAME_REVIEWER_INSTRUCTION = get_prompt_yaml(
+COLUMN_NAME_REVIEWER_INSTRUCTION = get_prompt_instruction_provider(
     tag="column_name_reviewer_instruction"
 )
 COLUMN_NAME_STANDARDIZER_DESCRIPTION = get_prompt_yaml(
     tag="column_name_standardizer_description"
 )
-COLUMN_NAME_STANDARDIZER_INSTRUCTION = get_prompt_yaml(
+COLUMN_NAME_STANDARDIZER_INSTRUCTION = get_prompt_instruction_provider(
     tag="column_name_standardizer_instruction"
 )
-COLUMN_NAME_STANDARD_REVIEWER_DESCRIPTION = get_prompt_yaml(
-    tag="column_name_standard_reviewer_description"
-)
-COLUMN_NAME_STANDARD_REVIEWER_INSTRUCTION = get_prompt_yaml(
-    tag="column_name_standard_reviewer_instruction"
-)
 
 SQL_GENERATOR_DESCRIPTION = get_prompt_yaml(tag="sql_generator_description")
-SQL_GENERATOR_INSTRUCTION = get_prompt_yaml(tag="sql_generator_instruction")
+SQL_GENERATOR_INSTRUCTION = get_prompt_instruction_provider(tag="sql_generator_instruction")
 SQL_REVIEWER_DESCRIPTION = get_prompt_yaml(tag="sql_reviewer_description")
-SQL_REVIEWER_INSTRUCTION = get_prompt_yaml(tag="sql_reviewer_instruction")
+SQL_REVIEWER_INSTRUCTION = get_prompt_instruction_provider(tag="sql_reviewer_instruction")
 
 class ExtractedSingleColumnName(BaseModel):
     extracted_column_name: str = Field(
@@ -54,6 +71,20 @@ class ExtractedColumnNames(BaseModel):
         description="The list of column names extracted from user query."
     )
 
+class StandardizedSingleColumnName(BaseModel):
+    extracted_column_name: str = Field(
+        description="The column name extracted from user natural language query."
+    )
+    standard_column_name: str = Field(
+        default="",
+        description="The actual DB column name in 'table.column_name' form. Empty if no column matches."
+    )
+
+class StandardizedColumnNames(BaseModel):
+    items: list[StandardizedSingleColumnName] = Field(
+        description="The list of extracted column names mapped to actual DB column names."
+    )
+
 _column_name_extractor = LlmAgent(
     name="column_name_extractor",
     description=COLUMN_NAME_EXTRACTOR_DESCRIPTION,
@@ -65,6 +96,12 @@ _column_name_extractor = LlmAgent(
     output_key=BGA_COLUMN_NAMES_STATES,
     output_schema=ExtractedColumnNames,
     instruction=COLUMN_NAME_EXTRACTOR_INSTRUCTION,
+    before_model_callback=[
+        context_budget_before_model_callback,
+        llm_response_cache_before_model_callback,
+        trace_llm_before_model_callback,
+    ],
+    after_model_callback=[llm_response_cache_after_model_callback, trace_llm_after_model_callback],
     disallow_transfer_to_parent=True,
     disallow_transfer_to_peers=True,
 )
@@ -78,7 +115,9 @@ _column_name_reviewer = LlmAgent(
         stream=False,
     ),
     instruction=COLUMN_NAME_REVIEWER_INSTRUCTION,
-    tools=[exit_column_extraction_loop]
+    tools=[exit_column_extraction_loop],
+    before_model_callback=[context_budget_before_model_callback, trace_llm_before_model_callback],
+    after_model_callback=trace_llm_after_model_callback,
 )
 
 _column_name_extraction_loop_agent = LoopAgent(
@@ -87,17 +126,65 @@ _column_name_extraction_loop_agent = LoopAgent(
     max_iterations=3,
 )
 
-_sql_generator = LlmAgent(
-    name="sqk_generator",
-    description=SQL_GENERATOR_DESCRIPTION,
-    model = LiteLlm(
+_column_name_standardizer = LlmAgent(
+    name="column_name_standardizer",
+    description=COLUMN_NAME_STANDARDIZER_DESCRIPTION,
+    model=LiteLlm(
         model=os.getenv("ROOT_AGENT_MODEL", ""),
         api_base=os.getenv("ROOT_AGENT_API_BASE"),
         stream=False,
     ),
-    instruction=(SQL_GENERATOR_INSTRUCTION),
+    output_key=BGA_STANDARD_COLUMN_NAMES_STATES,
+    output_schema=StandardizedColumnNames,
+    instruction=COLUMN_NAME_STANDARDIZER_INSTRUCTION,
+    before_model_callback=[llm_response_cache_before_model_callback, trace_llm_before_model_callback],
+    after_model_callback=[llm_response_cache_after_model_callback, trace_llm_after_model_callback],
+    disallow_transfer_to_parent=True,
+    disallow_transfer_to_peers=True,
 )
 
+# 결정적 표준화 엔진으로 매핑하고, confidence가 낮은 항목이 있을 때만 _column_name_standardizer 실행
+_column_name_standardization_agent = ColumnNameStandardizationAgent(
+    name="column_name_standardization",
+    sub_agents=[_column_name_standardizer],
+)
+
+def _build_sql_generator(name: str, output_key=BGA_GENERATED_SQL_STATES, temperature=None) -> LlmAgent:
+    return LlmAgent(
+        name=name,
+        description=SQL_GENERATOR_DESCRIPTION,
+        model = LiteLlm(
+            model=os.getenv("ROOT_AGENT_MODEL", ""),
+            api_base=os.getenv("ROOT_AGENT_API_BASE"),
+            stream=False,
+        ),
+        instruction=(SQL_GENERATOR_INSTRUCTION),
+        output_key=output_key,
+        generate_content_config=(
+            types.GenerateContentConfig(temperature=temperature) if temperature is not None else None
+        ),
+        # 참고 문서가 추가된 뒤 token 예산을 적용
+        before_model_callback=[
+            get_sql_query_references_before_model_callback,
+            context_budget_before_model_callback,
+            trace_llm_before_model_callback,
+        ],
+        after_model_callback=trace_llm_after_model_callback,
+    )
+
+
+if BGA_SQL_SPECULATIVE_GENERATION:
+    # temperature가 다른 SQL 후보를 동시에 생성하고, 검증을 처음 통과한 후보를 bga_generated_sql에 저장
+    _sql_generator = SpeculativeSqlGenerationAgent(
+        name="sqk_generator",
+        sub_agents=[
+            _build_sql_generator(f"sql_generator_candidate_{i}", output_key=None, temperature=temperature)
+            for i, temperature in enumerate(BGA_SQL_SPECULATIVE_TEMPERATURES)
+        ],
+    )
+else:
+    _sql_generator = _build_sql_generator("sqk_generator")
+
 _sql_reviewer = LlmAgent(
     name="sql_reviewer",
     description=SQL_REVIEWER_DESCRIPTION,
@@ -108,20 +195,34 @@ _sql_reviewer = LlmAgent(
     ),
     instruction=(SQL_REVIEWER_INSTRUCTION),
     tools=[query_bga_database],
+    before_model_callback=[context_budget_before_model_callback, trace_llm_before_model_callback],
+    after_model_callback=trace_llm_after_model_callback,
     after_tool_callback=[save_file_artifact_after_tool_callback],
 )
 
+# 결정적 SQL 검증: 실패 시 오류를 _sql_generator로 되돌리고, 통과 시 바로 실행 (설정에 따라 _sql_reviewer 실행)
+_sql_validation_agent = SqlValidationAgent(
+    name="sql_validation",
+    sub_agents=[_sql_reviewer],
+)
+
 sql_generation_loop_agent = LoopAgent(
     name="sql_generation_loop_agent",
-    sub_agents=[_sql_generator, _sql_reviewer],
+    sub_agents=[_sql_generator, _sql_validation_agent],
     max_iterations=3,
 )
 
 data_search_agent = SequentialAgent(
     name="data_search_agent",
     sub_agents=[
-        column_name_extraction_loop_agent,
-        column_name_standardization_loop_agent,
+        _column_name_extraction_loop_agent,
+        _column_name_standardization_agent,
         sql_generation_loop_agent,
     ],
+    # 참고 문서 조회를 먼저 시작하여 semantic 캐시 조회 / 칼럼명 추출과 겹치도록 함
+    before_agent_callback=[
+        reference_prefetch_before_agent_callback,
+        semantic_sql_cache_before_agent_callback,
+    ],
+    after_agent_callback=reference_prefetch_after_agent_callback,
 )
@@ -0,0 +1,3 @@
+from .column_name_standardization_agent import ColumnNameStandardizationAgent
+from .sql_validation_agent import SqlValidationAgent
+from .speculative_sql_generation_agent import SpeculativeSqlGenerationAgent
@@ -0,0 +1,62 @@
+import logging
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+
+from agents.constants.constants import (
+    BGA_COLUMN_NAMES_STATES,
+    BGA_STANDARD_COLUMN_NAMES_STATES,
+)
+from agents.sub_agents.data_search_agent.tools.bga_column_name_standardizer import (
+    COLUMN_STANDARDIZATION_CONFIDENCE_THRESHOLD,
+    get_column_name_standardizer,
+)
+
+
+class ColumnNameStandardizationAgent(BaseAgent):
+    """
+    추출된 칼럼명(bga_column_names)을 실제 DB 칼럼명으로 매핑하는 agent
+    결정적 표준화 엔진으로 먼저 매핑하고, confidence가 낮은 항목이 있을 때만 LLM fallback agent를 실행합니다.
+    결과는 bga_standard_column_names state에 저장됩니다.
+    """
+
+    confidence_threshold: float = COLUMN_STANDARDIZATION_CONFIDENCE_THRESHOLD
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        column_names = ctx.session.state.get(BGA_COLUMN_NAMES_STATES) or {"items": []}
+        extracted_names = [
+            item["extracted_column_name"] for item in column_names.get("items", [])
+        ]
+
+        results = get_column_name_standardizer().standardize_all(extracted_names)
+        low_confidence = [
+            result.extracted_column_name
+            for result in results
+            if result.confidence < self.confidence_threshold
+        ]
+        standard_column_names = {
+            "items": [
+                {**result.to_json(), "needs_review": result.confidence < self.confidence_threshold}
+                for result in results
+            ]
+        }
+        logging.info(
+            f"[Standardization] {len(results)}개 칼럼 표준화, LLM 검토 필요: {low_confidence}"
+        )
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(
+                state_delta={BGA_STANDARD_COLUMN_NAMES_STATES: standard_column_names}
+            ),
+        )
+
+        if low_confidence and self.sub_agents:
+            async for event in self.sub_agents[0].run_async(ctx):
+                yield event
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+
+from agents.constants.constants import BGA_GENERATED_SQL_STATES, BGA_VALIDATED_SQL_STATES
+from agents.sub_agents.data_search_agent.tools.bga_sql_validator import (
+    SqlValidationResult,
+    extract_sql,
+)
+from agents.sub_agents.data_search_agent.tools.sql_generator_tools import (
+    validate_generated_sql,
+)
+
+# SQL 후보를 여러 개 동시에 생성할지 여부 (LLM token 사용량이 후보 수만큼 늘어남)
+BGA_SQL_SPECULATIVE_GENERATION = os.getenv("BGA_SQL_SPECULATIVE_GENERATION", "false").lower() == "true"
+# 후보별 temperature, 개수만큼 후보를 생성
+BGA_SQL_SPECULATIVE_TEMPERATURES = [
+    float(temperature)
+    for temperature in os.getenv("BGA_SQL_SPECULATIVE_TEMPERATURES", "0.0,0.4,0.8").split(",")
+    if temperature.strip()
+]
+
+
+@dataclass
+class _SqlCandidate:
+    agent_name: str
+    text: str = ""
+    sql: str = ""
+    result: Optional[SqlValidationResult] = None
+    events: list[Event] = field(default_factory=list)
+
+
+class SpeculativeSqlGenerationAgent(BaseAgent):
+    """
+    sub_agents (설정만 다른 SQL 생성 LlmAgent들)를 동시에 실행하여 SQL 후보를 만들고,
+    완료되는 순서대로 검증(설정 시 EXPLAIN 포함)하여 처음 통과한 후보를 선택하는 agent
+    - 선택된 후보의 출력은 bga_generated_sql state에 저장되고, 나머지 후보 실행은 취소됩니다.
+      검증 결과는 bga_validated_sql state로 전달되어 SqlValidationAgent가 같은 SQL을 다시 검증 / EXPLAIN 하지 않습니다.
+    - 통과한 후보가 없으면 가장 먼저 완료된 후보를 저장하여, 다음 SqlValidationAgent가 오류를 되돌려 주도록 합니다.
+    후보 agent는 서로의 출력이 보이지 않도록 각자의 branch에서 실행되며, 선택된 후보의 event만 session에 남습니다.
+    """
+
+    async def _generate_candidate(self, ctx: InvocationContext, agent: BaseAgent) -> _SqlCandidate:
+        branch_ctx = ctx.model_copy()
+        branch_suffix = f"{self.name}.{agent.name}"
+        branch_ctx.branch = f"{ctx.branch}.{branch_suffix}" if ctx.branch else branch_suffix
+
+        candidate = _SqlCandidate(agent_name=agent.name)
+        async for event in agent.run_async(branch_ctx):
+            candidate.events.append(event)
+            if event.author == agent.name and event.is_final_response() and event.content and event.content.parts:
+                candidate.text = "".join(part.text for part in event.content.parts if part.text and not part.thought)
+
+        candidate.sql = extract_sql(candidate.text)
+        candidate.result = await validate_generated_sql(candidate.sql)
+        logging.info(
+            f"[SpeculativeSql] {agent.name} valid: {candidate.result.valid}, errors: {candidate.result.errors}"
+        )
+        return candidate
+
+    async def _select_candidate(self, ctx: InvocationContext) -> Optional[_SqlCandidate]:
+        tasks = [asyncio.create_task(self._generate_candidate(ctx, agent)) for agent in self.sub_agents]
+        first_completed = None
+        try:
+            for next_completed in asyncio.as_completed(tasks):
+                try:
+                    candidate = await next_completed
+                except Exception as e:
+                    logging.warning(f"[SpeculativeSql] SQL 후보 생성 실패: {e}")
+                    continue
+                first_completed = first_completed or candidate
+                if candidate.result.valid:
+                    return candidate
+            return first_completed
+        finally:
+            # 선택 이후에도 실행 중인 후보의 LLM 호출 / EXPLAIN 취소
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        candidate = await self._select_candidate(ctx)
+        if candidate is None:
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                actions=EventActions(state_delta={BGA_GENERATED_SQL_STATES: "", BGA_VALIDATED_SQL_STATES: None}),
+            )
+            return
+
+        logging.info(f"[SpeculativeSql] selected: {candidate.agent_name}, valid: {candidate.result.valid}")
+        # 다음 iteration의 후보들이 이전 시도를 볼 수 있도록 현재 branch의 event로 남김
+        for event in candidate.events:
+            event.branch = ctx.branch
+            yield event
+
+        validated = (
+            {"generated_sql": candidate.sql, "result": candidate.result.to_json()} if candidate.result.valid else None
+        )
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(
+                state_delta={BGA_GENERATED_SQL_STATES: candidate.text, BGA_VALIDATED_SQL_STATES: validated}
+            ),
+        )
@@ -0,0 +1,93 @@
+import logging
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai.types import Content, Part
+
+from agents.constants.constants import (
+    BGA_GENERATED_SQL_STATES,
+    BGA_SQL_VALIDATION_STATES,
+    BGA_VALIDATED_SQL_STATES,
+)
+from agents.sub_agents.data_search_agent.tools.bga_sql_validator import (
+    BGA_SQL_VALIDATOR_DIRECT_EXECUTION,
+    SqlValidationResult,
+    extract_sql,
+)
+from agents.sub_agents.data_search_agent.tools.sql_generator_tools import (
+    execute_bga_query,
+    validate_generated_sql,
+)
+
+
+class SqlValidationAgent(BaseAgent):
+    """
+    SQL 생성 agent의 출력(bga_generated_sql)을 결정적으로 검증하는 agent
+    - SpeculativeSqlGenerationAgent가 같은 SQL을 이미 검증했으면(bga_validated_sql) 그 결과를 사용합니다.
+    - 검증 실패: 오류를 bga_sql_validation state에 저장하고 종료하여, loop의 다음 iteration에서 SQL 생성 agent가 수정하도록 합니다.
+    - 검증 통과: direct_execution이면 sql_reviewer LLM 없이 바로 실행하고 loop를 종료(escalate)합니다.
+      direct_execution이 아니면 sub_agents[0] (sql_reviewer)를 실행합니다.
+    """
+
+    direct_execution: bool = BGA_SQL_VALIDATOR_DIRECT_EXECUTION
+
+    def _validation_event(self, ctx: InvocationContext, result: SqlValidationResult, actions: EventActions = None) -> Event:
+        actions = actions or EventActions()
+        # 통과한 경우 이전 오류를 지워 SQL 생성 agent에 남지 않도록 함
+        actions.state_delta[BGA_SQL_VALIDATION_STATES] = "" if result.valid else result.to_json()
+        # 전달받은 검증 결과는 한 번만 사용
+        actions.state_delta[BGA_VALIDATED_SQL_STATES] = None
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=actions,
+        )
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        generated_sql = extract_sql(ctx.session.state.get(BGA_GENERATED_SQL_STATES) or "")
+        validated = ctx.session.state.get(BGA_VALIDATED_SQL_STATES)
+        if validated and validated["generated_sql"] == generated_sql:
+            result = SqlValidationResult(**validated["result"])
+        else:
+            result = await validate_generated_sql(generated_sql)
+        logging.info(f"[SqlValidation] valid: {result.valid}, errors: {result.errors}")
+
+        if not result.valid:
+            yield self._validation_event(ctx, result)
+            return
+
+        if not self.direct_execution:
+            yield self._validation_event(ctx, result)
+            if self.sub_agents:
+                async for event in self.sub_agents[0].run_async(ctx):
+                    yield event
+            return
+
+        actions = EventActions()
+        callback_context = CallbackContext(ctx, event_actions=actions)
+        response = await execute_bga_query(result.sql, callback_context)
+        if response["status"] != "success":
+            # guard 거부 / DB 오류도 SQL 생성 agent가 수정할 수 있도록 검증 오류로 전달
+            failed = SqlValidationResult(sql=result.sql, valid=False, errors=[response["message"]])
+            yield self._validation_event(ctx, failed, actions)
+            return
+
+        actions.escalate = True
+        row_count = response["data"]["content"]["row_count"]
+        event = self._validation_event(ctx, result, actions)
+        event.content = Content(
+            role="model",
+            parts=[
+                Part(
+                    text=f"Query successfully executed. Resulting {row_count} records stored in states. "
+                    f"Notice user to check the attachment files.\nSQL: {result.sql}"
+                )
+            ],
+        )
+        yield event
@@ -0,0 +1,10 @@
+from .column_name_extraction_tools import exit_column_extraction_loop
+from .sql_generator_tools import (
+    query_bga_database,
+    execute_bga_query,
+    validate_generated_sql,
+    get_sql_query_references_before_model_callback,
+    semantic_sql_cache_before_agent_callback,
+    reference_prefetch_before_agent_callback,
+    reference_prefetch_after_agent_callback,
+)
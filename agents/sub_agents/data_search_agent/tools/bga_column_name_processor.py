@@ -1,42 +1,130 @@
+import asyncio
 import logging
 import os
 
-import chromadb
-import chromadb.config
-import requests
+from agents.sub_agents.data_search_agent.tools.bga_embedding_batcher import get_embedding_batcher
+from agents.sub_agents.data_search_agent.tools.bga_embedding_cache import (
+    EMBEDDING_CACHE,
+    normalize_text,
+)
+from agents.sub_agents.data_search_agent.tools.bga_local_vector_index import LocalVectorIndex
+from agents.sub_agents.data_search_agent.tools.bga_retrieval_clients import (
+    TEXT_EMBEDDING_MODEL_NAME,
+    aquery_chroma_collection,
+    post_embedding_request,
+    query_chroma_collection,
+)
+from agents.utils.log_utils import span, traced
 
-BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_HOST = os.getenv("BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_HOST")
-BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_COLLECTION = os.getenv("BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_COLLECTION")
-TEXT_EMBEDDING_MODEL_URL = os.getenv("TEXT_EMBEDDING_MODEL_URL")
-TEXT_EMBEDDING_MODEL_NAME = os.getenv("TEXT_EMBEDDING_MODEL_NAME")
+# "chroma": 원격 ChromaDB 조회, "local": layer_info_column_description.json 기반 in-process index
+BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_BACKEND = os.getenv("BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_BACKEND", "chroma")
 
+_local_vector_index: LocalVectorIndex | None = None
+
+
+def _find_missing_texts(
+    text_list: list[str], embeddings: list[list[float] | None]
+) -> dict[str, str]:
+    """캐시에 없어 새로 요청해야 하는 텍스트(정규화 텍스트 -> 원문)를 반환합니다."""
+    missing_texts = {}
+    for text, embedding in zip(text_list, embeddings):
+        if embedding is None:
+            missing_texts.setdefault(normalize_text(text), text)
+    return missing_texts
+
+def _merge_new_embeddings(
+    text_list: list[str],
+    embeddings: list[list[float] | None],
+    missing_texts: dict[str, str],
+    new_embeddings: list[list[float]],
+) -> list[list[float]]:
+    """캐시 조회 결과의 빈 자리를 새로 받은 임베딩으로 채웁니다."""
+    new_embeddings_by_text = dict(zip(missing_texts, new_embeddings))
+    return [
+        embedding if embedding is not None else new_embeddings_by_text[normalize_text(text)]
+        for text, embedding in zip(text_list, embeddings)
+    ]
 
 def _get_embedding(text_list: list[str]) -> list[list[float]]:
     """get embedding from the BGE-M3-KO model"""
-    response = requests.post(
-        TEXT_EMBEDDING_MODEL_URL,
-        json={
-            "input": text_list,
-            "model": TEXT_EMBEDDING_MODEL_NAME,
-        },
-        headers={"Content-Type": "application/json"}
-    )
-    response.raise_for_status()
-    res_data = response.json()["data"]
-    logging.debug(f"vectorDB res {len(res_data)=} {len(res_data[0]['embedding'])}")
-    embeddings = list(map(lambda data: data["embedding"], res_data))
+    embeddings = EMBEDDING_CACHE.get_many(TEXT_EMBEDDING_MODEL_NAME, text_list)
+    missing_texts = _find_missing_texts(text_list, embeddings)
+
+    if missing_texts:
+        with span("rag.embedding", texts=len(missing_texts)):
+            new_embeddings = post_embedding_request(list(missing_texts.values()))
+        EMBEDDING_CACHE.put_many(TEXT_EMBEDDING_MODEL_NAME, list(missing_texts.values()), new_embeddings)
+        embeddings = _merge_new_embeddings(text_list, embeddings, missing_texts, new_embeddings)
+
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug(
+            f"embedding {len(embeddings)=} {len(missing_texts)=} cache: {EMBEDDING_CACHE.stats()}"
+        )
     return embeddings
 
-def get_sim_search(query_list: list[str], n_results: int=3):
-    chroma_client = chromadb.HttpClient(
-        host=BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_HOST,
-        settings=chromadb.config.Settings(allow_reset=True, annoymized_telemetry=False)
-    )
+async def _aget_embedding(text_list: list[str]) -> list[list[float]]:
+    """
+    get embedding from the BGE-M3-KO model without blocking the event loop.
+    캐시에 없는 텍스트는 동시에 들어온 다른 요청과 micro-batch로 묶여 한 번의 POST로 전송됩니다.
+    디스크 캐시 조회 / 저장은 thread에서 실행됩니다.
+    """
+    embeddings = await EMBEDDING_CACHE.aget_many(TEXT_EMBEDDING_MODEL_NAME, text_list)
+    missing_texts = _find_missing_texts(text_list, embeddings)
+
+    if missing_texts:
+        async with span("rag.embedding", texts=len(missing_texts)):
+            new_embeddings = await get_embedding_batcher().embed(list(missing_texts.values()))
+        await EMBEDDING_CACHE.aput_many(TEXT_EMBEDDING_MODEL_NAME, list(missing_texts.values()), new_embeddings)
+        embeddings = _merge_new_embeddings(text_list, embeddings, missing_texts, new_embeddings)
+
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug(
+            f"embedding {len(embeddings)=} {len(missing_texts)=} cache: {EMBEDDING_CACHE.stats()}"
+        )
+    return embeddings
 
-    collection = chroma_client.get_collection(BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_COLLECTION)
+def _get_local_vector_index() -> LocalVectorIndex:
+    global _local_vector_index
+
+    if _local_vector_index is None:
+        _local_vector_index = LocalVectorIndex(embed_fn=_get_embedding)
+    return _local_vector_index
+
+@traced("rag.vector_query")
+def _query_vector_db(embeddings: list[list[float]], n_results: int) -> dict:
+    if BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_BACKEND == "local":
+        return _get_local_vector_index().query(embeddings, n_results=n_results)
+    return query_chroma_collection(embeddings, n_results=n_results)
+
+@traced("rag.vector_query")
+async def _aquery_vector_db(embeddings: list[list[float]], n_results: int) -> dict:
+    if BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_BACKEND == "local":
+        # JSON 변경 시 재구성 과정에서 임베딩 요청이 발생할 수 있으므로 worker thread에서 실행
+        return await asyncio.to_thread(_get_local_vector_index().query, embeddings, n_results)
+    return await aquery_chroma_collection(embeddings, n_results=n_results)
+
+@traced("rag.sim_search")
+def get_sim_search(query_list: list[str], n_results: int=3):
+    if isinstance(query_list, str):
+        query_list = [query_list]
 
     embeddings = _get_embedding(query_list)
 
-    query_res = collection.query(query_embeddings=embeddings, n_results=n_results)
+    query_res = _query_vector_db(embeddings, n_results=n_results)
+    logging.debug(f"{query_res}")
+    return query_res["documents"]
+
+@traced("rag.sim_search")
+async def aget_sim_search(query_list: list[str], n_results: int=3):
+    """
+    get_sim_search의 비동기 버전입니다.
+    임베딩은 비동기 client로, Chroma 조회는 worker thread에서 수행하여 event loop를 block 하지 않습니다.
+    """
+    if isinstance(query_list, str):
+        query_list = [query_list]
+
+    embeddings = await _aget_embedding(query_list)
+
+    query_res = await _aquery_vector_db(embeddings, n_results=n_results)
     logging.debug(f"{query_res}")
-    return query_res["documents"]
\ No newline at end of file
+    return query_res["documents"]
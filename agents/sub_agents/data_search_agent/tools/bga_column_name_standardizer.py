@@ -0,0 +1,203 @@
+"""
+추출된 칼럼명을 실제 DB 칼럼명으로 매핑하는 결정적(deterministic) 표준화 엔진
+layer_info_column_description.json 의 table, column_name, description, example 로
+exact / alias / fuzzy / 한국어 문자 n-gram index를 구성하고, 순서대로 매칭을 시도합니다.
+"""
+
+import difflib
+import logging
+import os
+import re
+import threading
+import unicodedata
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from agents.sub_agents.data_search_agent.tools.bga_local_vector_index import (
+    BGA_LAYER_INFO_COLUMN_DESCRIPTION_PATH,
+    load_column_descriptions,
+)
+
+COLUMN_STANDARDIZATION_CONFIDENCE_THRESHOLD = float(
+    os.getenv("COLUMN_STANDARDIZATION_CONFIDENCE_THRESHOLD", "0.75")
+)
+COLUMN_STANDARDIZATION_NUM_CANDIDATES = int(os.getenv("COLUMN_STANDARDIZATION_NUM_CANDIDATES", "3"))
+
+_NON_WORD_PATTERN = re.compile(r"[\s_\-./()\[\]]+")
+_DESCRIPTION_HEAD_PATTERN = re.compile(r"^(.+?)(?:\s*에\s*대한|(?:을|를|의|은|는|이|가)\s|\s*[,(:]|$)")
+
+
+def _normalize_key(text: str) -> str:
+    """매칭용 key 정규화: NFKC, 소문자, 공백/구분자 제거"""
+    return _NON_WORD_PATTERN.sub("", unicodedata.normalize("NFKC", str(text)).lower())
+
+
+def _char_ngrams(text: str, n: int = 2) -> set[str]:
+    key = _normalize_key(text)
+    if len(key) < n:
+        return {key} if key else set()
+    return {key[i : i + n] for i in range(len(key) - n + 1)}
+
+
+@dataclass
+class StandardizedColumnName:
+    """칼럼명 하나에 대한 표준화 결과"""
+
+    extracted_column_name: str
+    standard_column_name: Optional[str] = None
+    table: Optional[str] = None
+    column_name: Optional[str] = None
+    confidence: float = 0.0
+    method: str = "none"
+    candidates: list[str] = field(default_factory=list)
+
+    def to_json(self) -> dict:
+        return {k: v for k, v in asdict(self).items() if v not in (None, [])}
+
+
+class ColumnNameStandardizer:
+    """
+    칼럼 메타데이터 기반 표준화 엔진
+    - exact: column_name 또는 table.column_name 과 정규화 후 일치 (confidence 1.0)
+    - alias: aliases 항목, description 앞부분 명사구와 일치 (confidence 0.95)
+    - example: example 값과 일치, 값으로 칼럼을 지칭한 경우 (confidence 0.8)
+    - fuzzy: exact/alias key와의 문자열 유사도 (difflib)
+    - ngram: 한국어 문자 bigram 포함도 (띄어쓰기/조사 차이에 강함)
+    """
+
+    def __init__(self, path: str = BGA_LAYER_INFO_COLUMN_DESCRIPTION_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._entries: list[dict] = []
+        self._exact_index: dict[str, list[int]] = {}
+        self._alias_index: dict[str, list[int]] = {}
+        self._example_index: dict[str, list[int]] = {}
+        self._ngram_index: dict[str, set[int]] = {}
+        self._entry_ngrams: list[set[str]] = []
+
+    def _refresh(self) -> None:
+        mtime = os.path.getmtime(self.path)
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+
+            entries = load_column_descriptions(self.path)
+            exact_index: dict[str, list[int]] = {}
+            alias_index: dict[str, list[int]] = {}
+            example_index: dict[str, list[int]] = {}
+            ngram_index: dict[str, set[int]] = {}
+            entry_ngrams: list[set[str]] = []
+
+            for i, entry in enumerate(entries):
+                table, column_name = entry.get("table", ""), entry.get("column_name", "")
+                description = entry.get("description", "") or ""
+                for key in {_normalize_key(column_name), _normalize_key(f"{table}.{column_name}")}:
+                    exact_index.setdefault(key, []).append(i)
+
+                aliases = list(entry.get("aliases", []))
+                head = _DESCRIPTION_HEAD_PATTERN.match(description.strip())
+                if head:
+                    aliases.append(head.group(1))
+                for alias in aliases:
+                    key = _normalize_key(alias)
+                    if key and i not in alias_index.get(key, []):
+                        alias_index.setdefault(key, []).append(i)
+                for example in entry.get("example", []) or []:
+                    key = _normalize_key(example)
+                    if key and i not in example_index.get(key, []):
+                        example_index.setdefault(key, []).append(i)
+
+                ngrams = set()
+                for text in [column_name, description, *entry.get("aliases", [])]:
+                    ngrams |= _char_ngrams(text)
+                entry_ngrams.append(ngrams)
+                for gram in ngrams:
+                    ngram_index.setdefault(gram, set()).add(i)
+
+            self._entries = entries
+            self._exact_index = exact_index
+            self._alias_index = alias_index
+            self._example_index = example_index
+            self._ngram_index = ngram_index
+            self._entry_ngrams = entry_ngrams
+            self._mtime = mtime
+            logging.info(f"[ColumnNameStandardizer] 칼럼 index 구성: {len(entries)}개 항목")
+
+    def _result(self, name: str, entry_ids: list[int], confidence: float, method: str) -> StandardizedColumnName:
+        entry = self._entries[entry_ids[0]]
+        # 같은 key가 여러 칼럼을 가리키면 모호하므로 confidence를 낮추고 후보로 남김
+        if len(entry_ids) > 1:
+            confidence *= 0.7
+        return StandardizedColumnName(
+            extracted_column_name=name,
+            standard_column_name=f"{entry['table']}.{entry['column_name']}",
+            table=entry["table"],
+            column_name=entry["column_name"],
+            confidence=round(confidence, 4),
+            method=method,
+            candidates=self._candidate_names(entry_ids),
+        )
+
+    def _candidate_names(self, entry_ids: list[int]) -> list[str]:
+        return [
+            f"{self._entries[i]['table']}.{self._entries[i]['column_name']}"
+            for i in entry_ids[:COLUMN_STANDARDIZATION_NUM_CANDIDATES]
+        ]
+
+    def standardize(self, name: str) -> StandardizedColumnName:
+        """칼럼명 하나를 표준 칼럼명으로 매핑합니다."""
+        self._refresh()
+        key = _normalize_key(name)
+        if not key:
+            return StandardizedColumnName(extracted_column_name=name)
+
+        if key in self._exact_index:
+            return self._result(name, self._exact_index[key], 1.0, "exact")
+        if key in self._alias_index:
+            return self._result(name, self._alias_index[key], 0.95, "alias")
+        if key in self._example_index:
+            return self._result(name, self._example_index[key], 0.8, "example")
+
+        best: Optional[StandardizedColumnName] = None
+
+        close_keys = difflib.get_close_matches(
+            key, [*self._exact_index, *self._alias_index], n=1, cutoff=0.6
+        )
+        if close_keys:
+            close_key = close_keys[0]
+            ratio = difflib.SequenceMatcher(None, key, close_key).ratio()
+            entry_ids = self._exact_index.get(close_key) or self._alias_index[close_key]
+            best = self._result(name, entry_ids, 0.9 * ratio, "fuzzy")
+
+        query_ngrams = _char_ngrams(name)
+        scores: dict[int, int] = {}
+        for gram in query_ngrams:
+            for i in self._ngram_index.get(gram, ()):
+                scores[i] = scores.get(i, 0) + 1
+        if scores:
+            ranked = sorted(scores, key=lambda i: (-scores[i], len(self._entry_ngrams[i])))
+            containment = scores[ranked[0]] / len(query_ngrams)
+            if best is None or 0.85 * containment > best.confidence:
+                top_ids = [i for i in ranked if scores[i] == scores[ranked[0]]]
+                best = self._result(name, top_ids, 0.85 * containment, "ngram")
+                best.candidates = self._candidate_names(ranked)
+
+        return best or StandardizedColumnName(extracted_column_name=name)
+
+    def standardize_all(self, names: list[str]) -> list[StandardizedColumnName]:
+        return [self.standardize(name) for name in names]
+
+
+_standardizer: Optional[ColumnNameStandardizer] = None
+
+
+def get_column_name_standardizer() -> ColumnNameStandardizer:
+    global _standardizer
+
+    if _standardizer is None:
+        _standardizer = ColumnNameStandardizer()
+    return _standardizer
@@ -0,0 +1,124 @@
+"""
+임베딩 요청 micro-batching
+동시에 실행 중인 여러 invocation의 임베딩 요청을 짧은 시간 창(window) 동안 모아
+한 번의 POST로 임베딩 서버에 보낸 뒤, 각 호출자에게 자신의 벡터만 돌려줍니다.
+"""
+
+import asyncio
+import logging
+import os
+import weakref
+from typing import Awaitable, Callable
+
+from agents.sub_agents.data_search_agent.tools.bga_retrieval_clients import apost_embedding_request
+
+TEXT_EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("TEXT_EMBEDDING_BATCH_WINDOW_MS", "5"))
+TEXT_EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("TEXT_EMBEDDING_MAX_BATCH_SIZE", "64"))
+
+EmbedFunction = Callable[[list[str]], Awaitable[list[list[float]]]]
+
+
+class EmbeddingBatcher:
+    """
+    asyncio event loop 하나에 귀속되는 임베딩 요청 batcher
+    첫 요청이 들어오면 window_ms 후에 flush 하며, 대기 중인 텍스트 수가 max_batch_size에 도달하면 즉시 flush 합니다.
+    """
+
+    def __init__(
+        self,
+        embed_fn: EmbedFunction,
+        window_ms: float = TEXT_EMBEDDING_BATCH_WINDOW_MS,
+        max_batch_size: int = TEXT_EMBEDDING_MAX_BATCH_SIZE,
+    ):
+        self._embed_fn = embed_fn
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+        self._pending: list[tuple[list[str], asyncio.Future]] = []
+        self._pending_count = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.requests = 0
+        self.batches = 0
+
+    async def embed(self, text_list: list[str]) -> list[list[float]]:
+        """text_list의 임베딩을 다른 호출자의 요청과 묶어서 계산합니다."""
+        if not text_list:
+            return []
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((list(text_list), future))
+        self._pending_count += len(text_list)
+        self.requests += 1
+
+        if self._pending_count >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending, self._pending_count = self._pending, [], 0
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: list[tuple[list[str], asyncio.Future]]) -> None:
+        # 같은 batch 안의 중복 텍스트는 한 번만 요청
+        unique_texts = list(dict.fromkeys(text for text_list, _ in batch for text in text_list))
+        chunks = [
+            unique_texts[i : i + self.max_batch_size]
+            for i in range(0, len(unique_texts), self.max_batch_size)
+        ]
+        self.batches += len(chunks)
+        logging.debug(
+            f"[EmbeddingBatcher] flush: callers={len(batch)}, texts={len(unique_texts)}, posts={len(chunks)}"
+        )
+
+        try:
+            chunk_results = await asyncio.gather(*(self._embed_fn(chunk) for chunk in chunks))
+            embeddings_by_text = {}
+            for chunk, embeddings in zip(chunks, chunk_results):
+                if len(embeddings) != len(chunk):
+                    raise ValueError(
+                        f"Embedding server returned {len(embeddings)} vectors for {len(chunk)} texts"
+                    )
+                embeddings_by_text.update(zip(chunk, embeddings))
+            for text_list, future in batch:
+                if not future.done():
+                    future.set_result([embeddings_by_text[text] for text in text_list])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # 취소 등 예상하지 못한 종료에도 호출자가 영원히 대기하지 않도록 남은 future를 정리
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Embedding batch ended without a result"))
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+        }
+
+
+_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, EmbeddingBatcher]" = weakref.WeakKeyDictionary()
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """현재 실행 중인 event loop에 대한 batcher를 반환합니다."""
+    loop = asyncio.get_running_loop()
+    if loop not in _batchers:
+        _batchers[loop] = EmbeddingBatcher(apost_embedding_request)
+    return _batchers[loop]
@@ -0,0 +1,297 @@
+"""
+임베딩 결과 2단계 캐시
+1단계는 프로세스 내 LRU, 2단계는 여러 worker 프로세스가 공유하는 디스크 저장소입니다.
+디스크 저장소는 모델별로 float32 벡터 파일(memory-mapped)과 sqlite index로 구성되며,
+key는 (모델명, 정규화된 텍스트) 입니다.
+메모리 LRU는 벡터를 float32 배열로 보관하고, 조회 결과를 반환할 때만 list[float]로 변환합니다.
+async 경로(aget_many / aput_many)는 디스크 저장소 I/O(sqlite lock 대기 포함)를 thread에서 실행하여 event loop를 막지 않습니다.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "4096"))
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR")
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    캐시 key로 사용할 수 있도록 텍스트를 정규화합니다.
+    NFKC 정규화(NBSP 포함), 연속 공백 제거를 수행합니다.
+    임베딩은 원문 그대로 계산되므로 대소문자는 구분합니다.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    return _WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+def _to_lists(results: list[Optional[np.ndarray]]) -> list[Optional[list[float]]]:
+    return [None if vector is None else vector.tolist() for vector in results]
+
+
+class _DiskEmbeddingStore:
+    """
+    모델 하나에 대한 디스크 임베딩 저장소
+    벡터는 append-only float32 파일에 행 단위로 기록하고, sqlite index가 key -> 행 번호를 매핑합니다.
+    쓰기는 sqlite의 IMMEDIATE 트랜잭션으로 프로세스 간 직렬화되며,
+    index가 commit 되기 전에 벡터를 먼저 기록하므로 reader는 항상 완성된 행만 보게 됩니다.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str):
+        os.makedirs(cache_dir, exist_ok=True)
+        model_key = hashlib.sha1(str(model_name).encode("utf-8")).hexdigest()[:16]
+        self._vectors_path = os.path.join(cache_dir, f"embeddings_{model_key}.f32")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(cache_dir, f"embeddings_{model_key}.sqlite"),
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, row INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._dim: Optional[int] = None
+        self._mmap: Optional[np.memmap] = None
+
+    def _load_dim(self) -> Optional[int]:
+        if self._dim is None:
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+            self._dim = int(row[0]) if row else None
+        return self._dim
+
+    def _vectors(self, min_rows: int) -> Optional[np.memmap]:
+        """min_rows 이상의 행이 보이도록 필요 시 벡터 파일을 다시 mapping 합니다."""
+        if self._mmap is not None and len(self._mmap) >= min_rows:
+            return self._mmap
+
+        dim = self._load_dim()
+        if dim is None or not os.path.exists(self._vectors_path):
+            return None
+        rows = os.path.getsize(self._vectors_path) // (dim * 4)
+        if rows < min_rows:
+            return None
+        self._mmap = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, dim))
+        return self._mmap
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        if not keys:
+            return {}
+
+        with self._lock:
+            placeholders = ",".join("?" * len(keys))
+            rows = self._conn.execute(
+                f"SELECT key, row FROM embeddings WHERE key IN ({placeholders})", keys
+            ).fetchall()
+            if not rows:
+                return {}
+
+            vectors = self._vectors(max(row for _, row in rows) + 1)
+            if vectors is None:
+                return {}
+            # 다시 mapping 되더라도 안전하도록 행을 복사
+            return {key: np.array(vectors[row]) for key, row in rows}
+
+    def put_many(self, items: dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._dim = None
+                dim = self._load_dim()
+                if dim is None:
+                    dim = len(next(iter(items.values())))
+                    self._conn.execute("INSERT INTO meta (name, value) VALUES ('dim', ?)", (str(dim),))
+                    self._dim = dim
+
+                placeholders = ",".join("?" * len(items))
+                existing = {
+                    key for (key,) in self._conn.execute(
+                        f"SELECT key FROM embeddings WHERE key IN ({placeholders})", list(items)
+                    )
+                }
+                new_items = [
+                    (key, vector) for key, vector in items.items()
+                    if key not in existing and len(vector) == dim
+                ]
+                if not new_items:
+                    self._conn.execute("COMMIT")
+                    return
+
+                (next_row,) = self._conn.execute(
+                    "SELECT COALESCE(MAX(row) + 1, 0) FROM embeddings"
+                ).fetchone()
+                block = np.asarray([vector for _, vector in new_items], dtype=np.float32)
+                with open(self._vectors_path, "r+b" if os.path.exists(self._vectors_path) else "wb") as f:
+                    f.seek(next_row * dim * 4)
+                    f.write(block.tobytes())
+                    f.flush()
+
+                self._conn.executemany(
+                    "INSERT INTO embeddings (key, row) VALUES (?, ?)",
+                    [(key, next_row + i) for i, (key, _) in enumerate(new_items)],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+
+class EmbeddingCache:
+    """
+    (모델명, 정규화된 텍스트) 단위 임베딩 캐시
+    메모리 LRU를 먼저 조회하고, 없으면 디스크 저장소를 조회합니다.
+    디스크에서 찾은 결과는 메모리 LRU로 승격됩니다.
+    """
+
+    def __init__(self, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES, cache_dir: Optional[str] = EMBEDDING_CACHE_DIR):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._memory: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+        self._disk_stores: dict[str, _DiskEmbeddingStore] = {}
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _disk_store(self, model_name: str) -> Optional[_DiskEmbeddingStore]:
+        if not self.cache_dir:
+            return None
+        with self._lock:
+            if model_name not in self._disk_stores:
+                self._disk_stores[model_name] = _DiskEmbeddingStore(self.cache_dir, model_name)
+            return self._disk_stores[model_name]
+
+    @staticmethod
+    def _disk_key(normalized_text: str) -> str:
+        return hashlib.sha1(normalized_text.encode("utf-8")).hexdigest()
+
+    def _remember(self, model_name: str, normalized_text: str, embedding: np.ndarray) -> None:
+        self._memory[(model_name, normalized_text)] = embedding
+        self._memory.move_to_end((model_name, normalized_text))
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _get_from_memory(
+        self, model_name: str, texts: list[str]
+    ) -> tuple[list[Optional[np.ndarray]], dict[str, list[int]]]:
+        """메모리 LRU 조회 결과와, 디스크에서 찾아야 하는 정규화 텍스트 -> 위치 목록을 반환합니다."""
+        normalized = [normalize_text(text) for text in texts]
+        results: list[Optional[np.ndarray]] = [None] * len(texts)
+        disk_lookup: dict[str, list[int]] = {}
+
+        with self._lock:
+            for i, text in enumerate(normalized):
+                embedding = self._memory.get((model_name, text))
+                if embedding is not None:
+                    self._memory.move_to_end((model_name, text))
+                    results[i] = embedding
+                    self.memory_hits += 1
+                else:
+                    disk_lookup.setdefault(text, []).append(i)
+        return results, disk_lookup
+
+    def _get_from_disk(
+        self, model_name: str, results: list[Optional[np.ndarray]], disk_lookup: dict[str, list[int]]
+    ) -> list[Optional[np.ndarray]]:
+        """디스크 저장소에서 찾은 임베딩으로 results를 채우고 메모리 LRU로 승격합니다."""
+        store = self._disk_store(model_name) if disk_lookup else None
+        if store is not None:
+            try:
+                found = store.get_many([self._disk_key(text) for text in disk_lookup])
+            except Exception as e:
+                logging.warning(f"[EmbeddingCache] 디스크 캐시 조회 실패: {e}")
+                found = {}
+
+            with self._lock:
+                for text, indices in list(disk_lookup.items()):
+                    embedding = found.get(self._disk_key(text))
+                    if embedding is None:
+                        continue
+                    self._remember(model_name, text, embedding)
+                    for i in indices:
+                        results[i] = embedding
+                    self.disk_hits += len(indices)
+                    del disk_lookup[text]
+
+        with self._lock:
+            self.misses += sum(len(indices) for indices in disk_lookup.values())
+        return results
+
+    def get_many(self, model_name: str, texts: list[str]) -> list[Optional[list[float]]]:
+        """
+        texts 각각에 대한 캐시된 임베딩을 반환합니다. 캐시에 없으면 해당 위치는 None 입니다.
+        """
+        results, disk_lookup = self._get_from_memory(model_name, texts)
+        return _to_lists(self._get_from_disk(model_name, results, disk_lookup))
+
+    async def aget_many(self, model_name: str, texts: list[str]) -> list[Optional[list[float]]]:
+        """get_many와 같으며, 메모리에 없는 텍스트의 디스크 저장소 조회는 thread에서 실행합니다."""
+        results, disk_lookup = self._get_from_memory(model_name, texts)
+        if not disk_lookup or not self.cache_dir:
+            return _to_lists(self._get_from_disk(model_name, results, disk_lookup))
+        return _to_lists(await asyncio.to_thread(self._get_from_disk, model_name, results, disk_lookup))
+
+    def _put_to_memory(
+        self, model_name: str, texts: list[str], embeddings: list[list[float]]
+    ) -> tuple[list[str], list[np.ndarray]]:
+        normalized = [normalize_text(text) for text in texts]
+        vectors = [np.asarray(embedding, dtype=np.float32) for embedding in embeddings]
+        with self._lock:
+            for text, vector in zip(normalized, vectors):
+                self._remember(model_name, text, vector)
+        return normalized, vectors
+
+    def _put_to_disk(self, model_name: str, normalized: list[str], embeddings: list[np.ndarray]) -> None:
+        store = self._disk_store(model_name)
+        if store is not None:
+            try:
+                store.put_many(
+                    {self._disk_key(text): embedding for text, embedding in zip(normalized, embeddings)}
+                )
+            except Exception as e:
+                logging.warning(f"[EmbeddingCache] 디스크 캐시 저장 실패: {e}")
+
+    def put_many(self, model_name: str, texts: list[str], embeddings: list[list[float]]) -> None:
+        """새로 계산된 임베딩을 메모리와 디스크 캐시에 저장합니다."""
+        normalized, vectors = self._put_to_memory(model_name, texts, embeddings)
+        self._put_to_disk(model_name, normalized, vectors)
+
+    async def aput_many(self, model_name: str, texts: list[str], embeddings: list[list[float]]) -> None:
+        """put_many와 같으며, 디스크 저장소 쓰기(sqlite IMMEDIATE lock 대기 포함)는 thread에서 실행합니다."""
+        normalized, vectors = self._put_to_memory(model_name, texts, embeddings)
+        if self.cache_dir:
+            await asyncio.to_thread(self._put_to_disk, model_name, normalized, vectors)
+
+    def stats(self) -> dict:
+        """캐시 크기 산정을 위한 hit/miss 통계를 반환합니다."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+EMBEDDING_CACHE = EmbeddingCache()
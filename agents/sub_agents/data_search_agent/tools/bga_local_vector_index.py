@@ -0,0 +1,153 @@
+"""
+layer_info_column_description.json 기반 프로세스 내 벡터 index
+칼럼 설명 임베딩을 NumPy 행렬로 보관하고 cosine 유사도로 top-k를 계산하여
+원격 ChromaDB 조회 없이 get_sim_search를 처리합니다.
+JSON 파일이 변경되면 변경된 항목만 다시 임베딩하여 index를 재구성합니다.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+BGA_LAYER_INFO_COLUMN_DESCRIPTION_PATH = os.getenv(
+    "BGA_LAYER_INFO_COLUMN_DESCRIPTION_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "layer_info_column_description.json"),
+)
+# "float16"은 행렬 메모리를 절반으로 줄임. 조회 시 행렬을 float32로 복사하지 않고 float32로 누적하여 계산 (BLAS를 쓰는 float32 행렬곱보다는 느림)
+LOCAL_VECTOR_INDEX_DTYPE = os.getenv("LOCAL_VECTOR_INDEX_DTYPE", "float32")
+LOCAL_VECTOR_INDEX_ANN_THRESHOLD = int(os.getenv("LOCAL_VECTOR_INDEX_ANN_THRESHOLD", "50000"))
+
+
+def load_column_descriptions(path: str = BGA_LAYER_INFO_COLUMN_DESCRIPTION_PATH) -> list[dict]:
+    """칼럼 메타데이터 JSON(table, column_name, description, data_type, example 목록)을 읽어옵니다."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def make_column_document(entry: dict) -> str:
+    """검색 결과로 LLM에 전달될 칼럼 문서 문자열을 만듭니다."""
+    return json.dumps(entry, ensure_ascii=False)
+
+
+def make_column_embedding_text(entry: dict) -> str:
+    """칼럼 항목에서 임베딩 대상 텍스트를 만듭니다."""
+    return f"{entry.get('table', '')}.{entry.get('column_name', '')}: {entry.get('description', '')}"
+
+
+class LocalVectorIndex:
+    """
+    칼럼 설명 문서에 대한 in-process 벡터 index
+    벡터는 L2 정규화된 행렬로 보관하므로 내적이 곧 cosine 유사도입니다.
+    항목 수가 ann_threshold 이상이고 hnswlib가 설치되어 있으면 HNSW ANN index를 함께 사용합니다.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[list[str]], list[list[float]]],
+        path: str = BGA_LAYER_INFO_COLUMN_DESCRIPTION_PATH,
+        dtype: str = LOCAL_VECTOR_INDEX_DTYPE,
+        ann_threshold: int = LOCAL_VECTOR_INDEX_ANN_THRESHOLD,
+    ):
+        self._embed_fn = embed_fn
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.ann_threshold = ann_threshold
+        self._lock = threading.Lock()
+        # 조회 중인 thread가 재구성 중간 상태(새 행렬 + 이전 문서 등)를 보지 않도록 index 필드 교체 / 조회에 사용
+        self._index_lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._documents: list[str] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._vectors_by_hash: dict[str, np.ndarray] = {}
+        self._ann_index = None
+
+    def _refresh(self) -> None:
+        mtime = os.path.getmtime(self.path)
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+
+            entries = load_column_descriptions(self.path)
+            documents = [make_column_document(entry) for entry in entries]
+            texts = [make_column_embedding_text(entry) for entry in entries]
+            hashes = [hashlib.sha1(text.encode("utf-8")).hexdigest() for text in texts]
+
+            # 변경되었거나 새로 추가된 항목만 임베딩
+            new_texts = {h: text for h, text in zip(hashes, texts) if h not in self._vectors_by_hash}
+            if new_texts:
+                new_vectors = np.asarray(self._embed_fn(list(new_texts.values())), dtype=np.float32)
+                new_vectors /= np.maximum(np.linalg.norm(new_vectors, axis=1, keepdims=True), 1e-12)
+                self._vectors_by_hash.update(zip(new_texts, new_vectors))
+
+            self._vectors_by_hash = {h: self._vectors_by_hash[h] for h in hashes}
+            matrix = (
+                np.stack([self._vectors_by_hash[h] for h in hashes]).astype(self.dtype)
+                if hashes else None
+            )
+            ann_index = self._build_ann_index(matrix) if len(hashes) >= self.ann_threshold else None
+            with self._index_lock:
+                self._matrix, self._documents, self._ann_index = matrix, documents, ann_index
+            self._mtime = mtime
+            logging.info(
+                f"[LocalVectorIndex] index 재구성: {len(documents)}개 항목, 신규 임베딩 {len(new_texts)}개, "
+                f"ANN: {ann_index is not None}"
+            )
+
+    def _build_ann_index(self, matrix: np.ndarray):
+        try:
+            import hnswlib
+        except ImportError:
+            logging.warning("[LocalVectorIndex] hnswlib 미설치, 전체 탐색으로 검색합니다.")
+            return None
+
+        num_elements, dim = matrix.shape
+        ann_index = hnswlib.Index(space="ip", dim=dim)
+        ann_index.init_index(max_elements=num_elements, ef_construction=200, M=16)
+        ann_index.add_items(matrix.astype(np.float32), np.arange(num_elements))
+        ann_index.set_ef(64)
+        return ann_index
+
+    def query(self, query_embeddings: list[list[float]], n_results: int) -> dict:
+        """
+        ChromaDB collection.query와 같은 형태(documents, distances)로 top-k 결과를 반환합니다.
+        distances는 1 - cosine 유사도 입니다.
+        """
+        self._refresh()
+        with self._index_lock:
+            matrix, documents, ann_index = self._matrix, self._documents, self._ann_index
+        if matrix is None:
+            return {"documents": [[] for _ in query_embeddings], "distances": [[] for _ in query_embeddings]}
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        k = min(n_results, len(documents))
+
+        if ann_index is not None:
+            labels, distances = ann_index.knn_query(queries, k=k)
+            return {
+                "documents": [[documents[i] for i in row] for row in labels],
+                "distances": distances.tolist(),
+            }
+
+        if matrix.dtype == np.float32:
+            similarities = queries @ matrix.T
+        else:
+            # float16 행렬 전체를 float32로 복사하지 않고, 변환하며 float32로 누적 계산
+            similarities = np.einsum("qd,nd->qn", queries, matrix, dtype=np.float32, casting="same_kind")
+        top_k = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        top_k_similarities = np.take_along_axis(similarities, top_k, axis=1)
+        order = np.argsort(-top_k_similarities, axis=1)
+        top_k = np.take_along_axis(top_k, order, axis=1)
+        top_k_similarities = np.take_along_axis(top_k_similarities, order, axis=1)
+        return {
+            "documents": [[documents[i] for i in row] for row in top_k],
+            "distances": (1.0 - top_k_similarities).tolist(),
+        }
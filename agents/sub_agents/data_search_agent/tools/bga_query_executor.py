@@ -0,0 +1,222 @@
+"""
+BGA DB 쿼리 실행 전략
+- plain: 일반 cursor로 fetchall 후 CSV bytes로 기록 (소량 결과용)
+- stream: named server-side cursor와 fetchmany로 결과를 읽으면서 곧바로 CSV bytes로 기록
+- copy: COPY (SELECT ...) TO STDOUT 으로 PostgreSQL이 만든 CSV bytes를 그대로 기록 (대량 결과용)
+- auto: EXPLAIN 예상 row 수에 따라 위 세 가지 중 하나를 선택
+"""
+
+import codecs
+import csv
+import io
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from decimal import Decimal
+
+import sqlglot
+from sqlglot.dialects.postgres import Postgres
+from sqlglot.tokens import TokenType
+
+from agents.constants import NUM_OF_DISPLAYED_DATA
+
+# "plain" | "stream" | "copy" | "auto"
+BGA_QUERY_EXECUTION_MODE = os.getenv("BGA_QUERY_EXECUTION_MODE", "auto")
+BGA_QUERY_FETCH_BATCH_SIZE = int(os.getenv("BGA_QUERY_FETCH_BATCH_SIZE", "2000"))
+# auto 모드에서 예상 row 수가 이 값 이상이면 stream / copy 사용
+BGA_QUERY_STREAM_ROW_THRESHOLD = int(os.getenv("BGA_QUERY_STREAM_ROW_THRESHOLD", "5000"))
+BGA_QUERY_COPY_ROW_THRESHOLD = int(os.getenv("BGA_QUERY_COPY_ROW_THRESHOLD", "100000"))
+# COPY 결과에서 header/preview를 파싱할 때 읽는 앞부분 크기
+_COPY_PREVIEW_PREFIX_BYTES = 64 * 1024
+
+
+@dataclass
+class CsvQueryResult:
+    """CSV로 기록된 쿼리 결과와 LLM에 전달할 요약 정보"""
+
+    csv_bytes: bytes
+    columns: list[str]
+    row_count: int
+    preview: list[dict] = field(default_factory=list)
+
+    def summary(self) -> dict:
+        return {
+            "row_count": self.row_count,
+            "columns": self.columns,
+            "preview": self.preview,
+        }
+
+
+def _preview_value(value):
+    """preview 값이 tool response(JSON)에 그대로 실릴 수 있도록 변환합니다."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def make_preview(columns: list[str], rows: list[tuple]) -> list[dict]:
+    return [
+        {column: _preview_value(value) for column, value in zip(columns, row)}
+        for row in rows[:NUM_OF_DISPLAYED_DATA]
+    ]
+
+
+def strip_statement(generated_sql: str) -> str:
+    """
+    다른 SQL 안에 감쌀 수 있도록 마지막 token 뒤의 세미콜론, 주석, 공백을 제거합니다.
+    끝에 남은 line comment(-- ...)가 COPY (...) / subquery 의 닫는 괄호를 주석 처리하지 않도록 합니다.
+    """
+    try:
+        tokens = Postgres().tokenize(generated_sql)
+    except sqlglot.errors.SqlglotError:
+        return generated_sql.strip().rstrip(";").strip()
+
+    while tokens and tokens[-1].token_type == TokenType.SEMICOLON:
+        tokens.pop()
+    if not tokens:
+        return ""
+    return generated_sql[tokens[0].start : tokens[-1].end + 1]
+
+
+async def explain_query(conn, generated_sql: str) -> dict:
+    """
+    EXPLAIN (FORMAT JSON) 으로 실행 없이 계획만 조회하여 최상위 plan node를 반환합니다.
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(f"EXPLAIN (FORMAT JSON) {strip_statement(generated_sql)}")
+        (plan,) = await cur.fetchone()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+async def estimate_row_count(conn, generated_sql: str) -> float | None:
+    """
+    planner가 예상한 결과 row 수를 반환합니다. 조회에 실패하면 None 입니다.
+    EXPLAIN 실패가 바깥 트랜잭션을 aborted 상태로 만들지 않도록 savepoint(중첩 transaction) 안에서 실행합니다.
+    """
+    try:
+        async with conn.transaction():
+            plan = await explain_query(conn, generated_sql)
+        return plan["Plan Rows"]
+    except Exception as e:
+        logging.warning(f"[QueryExecutor] row 수 예측 실패: {e}")
+        return None
+
+
+def choose_execution_mode(estimated_rows: float | None) -> str:
+    """예상 row 수로 실행 방식을 선택합니다. 예측할 수 없으면 메모리가 일정한 stream을 사용합니다."""
+    if estimated_rows is None:
+        return "stream"
+    if estimated_rows >= BGA_QUERY_COPY_ROW_THRESHOLD:
+        return "copy"
+    if estimated_rows >= BGA_QUERY_STREAM_ROW_THRESHOLD:
+        return "stream"
+    return "plain"
+
+
+class _CsvWriter:
+    """utf-8-sig CSV bytes를 기록하면서 row 수와 preview를 함께 수집합니다."""
+
+    def __init__(self, columns: list[str]):
+        self.columns = columns
+        self._buffer = io.BytesIO()
+        self._buffer.write(codecs.BOM_UTF8)
+        self._text_buffer = io.TextIOWrapper(self._buffer, encoding="utf-8", newline="")
+        self._writer = csv.writer(self._text_buffer, lineterminator="\n")
+        self._writer.writerow(columns)
+        self._preview_rows: list[tuple] = []
+        self.row_count = 0
+
+    def write_rows(self, rows: list[tuple]) -> None:
+        if len(self._preview_rows) < NUM_OF_DISPLAYED_DATA:
+            self._preview_rows.extend(rows[: NUM_OF_DISPLAYED_DATA - len(self._preview_rows)])
+        self._writer.writerows(rows)
+        self.row_count += len(rows)
+
+    def result(self) -> CsvQueryResult:
+        self._text_buffer.flush()
+        csv_bytes = self._buffer.getvalue()
+        self._text_buffer.detach()
+        return CsvQueryResult(
+            csv_bytes=csv_bytes,
+            columns=self.columns,
+            row_count=self.row_count,
+            preview=make_preview(self.columns, self._preview_rows),
+        )
+
+
+async def fetch_query_to_csv(conn, generated_sql: str) -> CsvQueryResult:
+    """plain 모드: 전체 결과를 한 번에 읽어 utf-8-sig CSV로 기록합니다."""
+    async with conn.cursor() as cur:
+        await cur.execute(query=generated_sql)
+        raw_res = await cur.fetchall()
+        writer = _CsvWriter([item.name for item in cur.description])
+    writer.write_rows(raw_res)
+
+    result = writer.result()
+    logging.debug(f"[QueryExecutor] plain: {result.row_count=} {len(result.csv_bytes)=}")
+    return result
+
+
+async def stream_query_to_csv(
+    conn, generated_sql: str, fetch_size: int = BGA_QUERY_FETCH_BATCH_SIZE
+) -> CsvQueryResult:
+    """
+    stream 모드: server-side cursor에서 fetch_size 단위로 읽으면서 utf-8-sig CSV로 바로 기록합니다.
+    결과 전체를 Python 객체로 보관하지 않으므로 메모리 사용량이 batch 크기 수준으로 유지됩니다.
+    """
+    # named cursor(DECLARE ... CURSOR)는 트랜잭션 안에서만 유효
+    async with conn.transaction():
+        async with conn.cursor(name=f"bga_stream_{uuid.uuid4().hex}") as cur:
+            await cur.execute(generated_sql)
+            writer = _CsvWriter([item.name for item in cur.description])
+
+            while rows := await cur.fetchmany(fetch_size):
+                writer.write_rows(rows)
+
+    result = writer.result()
+    logging.debug(f"[QueryExecutor] stream: {result.row_count=} {len(result.csv_bytes)=}")
+    return result
+
+
+async def copy_query_to_csv(conn, generated_sql: str) -> CsvQueryResult:
+    """
+    copy 모드: COPY (SELECT ...) TO STDOUT WITH CSV HEADER 로 서버가 생성한 CSV를 그대로 기록합니다.
+    row 단위 Python 객체를 만들지 않으며, 기존 artifact와 동일하게 utf-8 BOM을 붙입니다.
+    """
+    buffer = io.BytesIO()
+    buffer.write(codecs.BOM_UTF8)
+
+    async with conn.cursor() as cur:
+        async with cur.copy(
+            f"COPY ({strip_statement(generated_sql)}) TO STDOUT WITH (FORMAT CSV, HEADER)"
+        ) as copy:
+            async for data in copy:
+                buffer.write(data)
+        row_count = cur.rowcount
+
+    csv_bytes = buffer.getvalue()
+    prefix = csv_bytes[len(codecs.BOM_UTF8) : _COPY_PREVIEW_PREFIX_BYTES].decode("utf-8", errors="ignore")
+    reader = csv.reader(io.StringIO(prefix, newline=""))
+    columns = next(reader, [])
+    preview = []
+    for row in reader:
+        if len(preview) >= NUM_OF_DISPLAYED_DATA or len(row) != len(columns):
+            break
+        preview.append(dict(zip(columns, row)))
+
+    logging.debug(f"[QueryExecutor] copy: {row_count=} {len(csv_bytes)=}")
+    return CsvQueryResult(
+        csv_bytes=csv_bytes,
+        columns=columns,
+        row_count=row_count,
+        preview=preview,
+    )
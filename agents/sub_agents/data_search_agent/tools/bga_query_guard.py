@@ -0,0 +1,108 @@
+"""
+BGA DB 쿼리 실행 전 비용 guard
+EXPLAIN (FORMAT JSON) 예상 row 수 / 비용이 예산을 넘는 쿼리는 실행하지 않고
+sql_reviewer가 수정할 수 있도록 구조화된 오류를 반환합니다.
+실행되는 쿼리는 읽기 전용 트랜잭션에서 statement_timeout을 설정하여 실행하고, preview 쿼리에는 LIMIT을 적용합니다.
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+
+from agents.custom_types.tool_response import ToolResponse
+from agents.sub_agents.data_search_agent.tools.bga_query_executor import (
+    strip_statement,
+    explain_query,
+)
+
+BGA_QUERY_GUARD_ENABLED = os.getenv("BGA_QUERY_GUARD_ENABLED", "true").lower() == "true"
+BGA_QUERY_MAX_ESTIMATED_ROWS = float(os.getenv("BGA_QUERY_MAX_ESTIMATED_ROWS", "5000000"))
+BGA_QUERY_MAX_ESTIMATED_COST = float(os.getenv("BGA_QUERY_MAX_ESTIMATED_COST", "10000000"))
+BGA_QUERY_STATEMENT_TIMEOUT_MS = int(os.getenv("BGA_QUERY_STATEMENT_TIMEOUT_MS", "60000"))
+BGA_QUERY_PREVIEW_LIMIT = int(os.getenv("BGA_QUERY_PREVIEW_LIMIT", "100"))
+
+
+@dataclass
+class QueryPlanEstimate:
+    """planner가 예상한 결과 row 수와 전체 비용"""
+
+    rows: float
+    cost: float
+
+
+class QueryGuardError(Exception):
+    """
+    guard에 의해 실행이 거부된 쿼리
+    reason: invalid_sql | estimated_rows_exceeded | estimated_cost_exceeded | statement_timeout
+    """
+
+    def __init__(self, reason: str, message: str, **details):
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+        self.details = details
+
+    def to_tool_response(self) -> dict:
+        return ToolResponse(
+            status="error",
+            message=self.message,
+            data={"error_type": "query_guard", "reason": self.reason, **self.details},
+        ).to_json()
+
+
+def apply_preview_limit(generated_sql: str, limit: int = BGA_QUERY_PREVIEW_LIMIT) -> str:
+    """
+    preview 쿼리에 LIMIT을 적용합니다.
+    원본 쿼리를 subquery로 감싸므로 기존 LIMIT이 더 크더라도 limit 이하로 낮아집니다.
+    """
+    return f"SELECT * FROM ({strip_statement(generated_sql)}) AS bga_preview LIMIT {int(limit)}"
+
+
+async def set_read_only_transaction(conn) -> None:
+    """
+    현재 트랜잭션을 읽기 전용으로 설정합니다. 트랜잭션의 첫 문장으로 실행해야 합니다.
+    validator를 통과한 SQL이라도 DB에 쓰기 / 잠금을 할 수 없도록 DB 수준에서 한 번 더 막습니다.
+    """
+    async with conn.cursor() as cur:
+        await cur.execute("SET TRANSACTION READ ONLY")
+
+
+async def set_statement_timeout(conn, timeout_ms: int = BGA_QUERY_STATEMENT_TIMEOUT_MS) -> None:
+    """현재 트랜잭션에만 적용되는 statement_timeout을 설정합니다."""
+    async with conn.cursor() as cur:
+        await cur.execute("SELECT set_config('statement_timeout', %s, true)", (str(timeout_ms),))
+
+
+async def guard_query(conn, generated_sql: str) -> QueryPlanEstimate:
+    """
+    EXPLAIN으로 예상 row 수와 비용을 확인하고, 예산을 넘으면 QueryGuardError를 발생시킵니다.
+    """
+    try:
+        plan = await explain_query(conn, generated_sql)
+    except Exception as e:
+        raise QueryGuardError("invalid_sql", f"SQL could not be planned: {e}") from e
+
+    estimate = QueryPlanEstimate(rows=plan["Plan Rows"], cost=plan["Total Cost"])
+    logging.debug(f"[QueryGuard] {estimate=}")
+
+    limits = {
+        "estimated_rows": estimate.rows,
+        "estimated_cost": estimate.cost,
+        "max_estimated_rows": BGA_QUERY_MAX_ESTIMATED_ROWS,
+        "max_estimated_cost": BGA_QUERY_MAX_ESTIMATED_COST,
+    }
+    if estimate.cost > BGA_QUERY_MAX_ESTIMATED_COST:
+        raise QueryGuardError(
+            "estimated_cost_exceeded",
+            f"Query rejected: estimated cost {estimate.cost:.0f} exceeds budget {BGA_QUERY_MAX_ESTIMATED_COST:.0f}. "
+            "Narrow the WHERE conditions, avoid unnecessary joins, or aggregate the result.",
+            **limits,
+        )
+    if estimate.rows > BGA_QUERY_MAX_ESTIMATED_ROWS:
+        raise QueryGuardError(
+            "estimated_rows_exceeded",
+            f"Query rejected: estimated {estimate.rows:.0f} rows exceeds budget {BGA_QUERY_MAX_ESTIMATED_ROWS:.0f}. "
+            "Narrow the WHERE conditions or aggregate the result.",
+            **limits,
+        )
+    return estimate
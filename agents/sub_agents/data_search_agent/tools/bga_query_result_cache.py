@@ -0,0 +1,184 @@
+"""
+BGA DB 쿼리 결과 캐시 (BGA_QUERY_RESULT_CACHE_ENABLED=true 일 때만 사용)
+정규화된 SQL 문을 key로, 이미 CSV로 기록된 결과(CsvQueryResult)를 TTL + LRU로 보관합니다.
+캐시에 있으면 DB 조회와 CSV 인코딩을 모두 건너뛰고 저장된 bytes를 그대로 artifact로 저장합니다.
+보관 용량은 항목 수와 CSV bytes 합계로 제한하며, SQL 단위 또는 테이블 단위로 무효화할 수 있습니다.
+key는 SQL 문뿐이므로 TTL 동안은 DB가 바뀌어도 이전 결과를 반환합니다. 데이터가 자주 바뀌지 않는 환경에서만 켜세요.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from agents.sub_agents.data_search_agent.tools.bga_query_executor import CsvQueryResult
+
+BGA_QUERY_RESULT_CACHE_ENABLED = os.getenv("BGA_QUERY_RESULT_CACHE_ENABLED", "false").lower() == "true"
+BGA_QUERY_RESULT_CACHE_TTL_SECONDS = float(os.getenv("BGA_QUERY_RESULT_CACHE_TTL_SECONDS", "600"))
+BGA_QUERY_RESULT_CACHE_MAX_ENTRIES = int(os.getenv("BGA_QUERY_RESULT_CACHE_MAX_ENTRIES", "256"))
+BGA_QUERY_RESULT_CACHE_MAX_BYTES = int(os.getenv("BGA_QUERY_RESULT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# 문자열 상수 / 따옴표 식별자 / dollar-quoted 문자열 / 공백 / 식별자(중간의 $ 포함) / 그 외 한 글자
+_SQL_TOKEN_PATTERN = re.compile(
+    r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|(\$(?:[A-Za-z_]\w*)?\$)[\s\S]*?\1|\s+|[^\W\d][\w$]*|[^\s'\"]"
+)
+_TABLE_NAME_PATTERN = re.compile(r"\b(?:from|join)\s+((?:\"[^\"]+\"|[a-z_][\w$]*)(?:\.(?:\"[^\"]+\"|[a-z_][\w$]*))?)")
+
+
+def normalize_sql(generated_sql: str) -> str:
+    """
+    캐시 key로 사용할 수 있도록 SQL을 정규화합니다.
+    NBSP와 연속 공백을 공백 하나로 줄이고, 끝의 세미콜론을 제거하며,
+    따옴표 밖의 keyword / 식별자를 소문자로 변환합니다. (PostgreSQL은 따옴표 없는 식별자를 소문자로 취급)
+    문자열 상수와 dollar-quoted 문자열($$...$$, $tag$...$tag$)은 그대로 둡니다.
+    """
+    tokens = []
+    for match in _SQL_TOKEN_PATTERN.finditer(generated_sql.replace("\u00A0", " ")):
+        token = match.group(0)
+        if token.isspace():
+            tokens.append(" ")
+        elif token[0] in "'\"" or match.group(1):
+            tokens.append(token)
+        else:
+            tokens.append(token.lower())
+    return "".join(tokens).strip().rstrip(";").strip()
+
+
+def extract_table_names(normalized_sql: str) -> set[str]:
+    """
+    정규화된 SQL의 FROM / JOIN 절에서 테이블명을 추출합니다.
+    schema.table 형태는 schema가 붙은 이름과 테이블명 두 가지로 모두 등록합니다.
+    """
+    without_literals = re.sub(r"'(?:[^']|'')*'", "''", normalized_sql)
+    tables = set()
+    for name in _TABLE_NAME_PATTERN.findall(without_literals):
+        name = name.replace('"', "").lower()
+        tables.add(name)
+        tables.add(name.rsplit(".", 1)[-1])
+    return tables
+
+
+@dataclass
+class _CacheEntry:
+    result: CsvQueryResult
+    tables: set[str]
+    expires_at: float
+    size: int
+
+
+class QueryResultCache:
+    """
+    정규화된 SQL 단위 쿼리 결과 캐시 (TTL + 항목 수 / bytes 기준 LRU)
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = BGA_QUERY_RESULT_CACHE_TTL_SECONDS,
+        max_entries: int = BGA_QUERY_RESULT_CACHE_MAX_ENTRIES,
+        max_bytes: int = BGA_QUERY_RESULT_CACHE_MAX_BYTES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._total_bytes -= entry.size
+
+    def get(self, generated_sql: str) -> Optional[CsvQueryResult]:
+        """캐시된 결과를 반환합니다. 없거나 만료되었으면 None 입니다."""
+        key = normalize_sql(generated_sql)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.result
+
+    def put(self, generated_sql: str, result: CsvQueryResult) -> None:
+        """결과를 캐시에 저장합니다. 단일 결과가 max_bytes보다 크면 저장하지 않습니다."""
+        size = len(result.csv_bytes)
+        if size > self.max_bytes:
+            logging.debug(f"[QueryResultCache] 결과가 너무 커서 캐시하지 않음: {size=}")
+            return
+
+        key = normalize_sql(generated_sql)
+        entry = _CacheEntry(
+            result=result,
+            tables=extract_table_names(key),
+            expires_at=time.monotonic() + self.ttl_seconds,
+            size=size,
+        )
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._total_bytes += size
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, generated_sql: Optional[str] = None) -> int:
+        """
+        SQL 하나에 대한 결과를 무효화합니다. generated_sql이 None이면 전체를 비웁니다.
+
+        Returns:
+            int: 제거된 항목 수
+        """
+        with self._lock:
+            if generated_sql is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._total_bytes = 0
+                return removed
+
+            key = normalize_sql(generated_sql)
+            if key not in self._entries:
+                return 0
+            self._remove(key)
+            return 1
+
+    def invalidate_tables(self, tables: Iterable[str]) -> int:
+        """
+        주어진 테이블을 참조하는 모든 결과를 무효화합니다. (데이터 적재 후 호출)
+
+        Returns:
+            int: 제거된 항목 수
+        """
+        tables = {table.replace('"', "").lower() for table in tables}
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry.tables & tables]
+            for key in keys:
+                self._remove(key)
+        logging.info(f"[QueryResultCache] 테이블 {sorted(tables)} 관련 결과 {len(keys)}개 무효화")
+        return len(keys)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+QUERY_RESULT_CACHE = QueryResultCache()
@@ -0,0 +1,89 @@
+"""
+SQL 생성 참고 문서(RAG) 조회의 prefetch
+참고 문서 조회는 사용자 질문만 사용하므로, data_search_agent 시작 시점에 background task로 시작하여
+칼럼명 추출 loop의 LLM 호출과 겹치도록 합니다. SQL 생성 agent는 같은 invocation의 task 결과를 기다립니다.
+"""
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Optional
+
+from agents.sub_agents.data_search_agent.tools.bga_column_name_processor import (
+    aget_sim_search,
+)
+
+BGA_REFERENCE_PREFETCH_ENABLED = os.getenv("BGA_REFERENCE_PREFETCH_ENABLED", "true").lower() == "true"
+BGA_REFERENCE_N_RESULTS = int(os.getenv("BGA_REFERENCE_N_RESULTS", "5"))
+# 소비되지 않은 prefetch task가 쌓이지 않도록 유지할 최대 invocation 수
+BGA_REFERENCE_PREFETCH_MAX_PENDING = int(os.getenv("BGA_REFERENCE_PREFETCH_MAX_PENDING", "256"))
+
+
+class ReferencePrefetchRegistry:
+    """
+    invocation_id -> 참고 문서 조회 task
+    같은 invocation의 여러 agent(speculative SQL 후보 등)가 하나의 task 결과를 함께 사용합니다.
+    최대 개수를 넘으면 가장 오래된 task부터 취소하고 제거합니다.
+    """
+
+    def __init__(self, max_pending: int = BGA_REFERENCE_PREFETCH_MAX_PENDING):
+        self.max_pending = max_pending
+        self._tasks: OrderedDict[str, asyncio.Task] = OrderedDict()
+
+    def start(self, invocation_id: str, user_input: str, n_results: int = BGA_REFERENCE_N_RESULTS) -> asyncio.Task:
+        """invocation의 참고 문서 조회 task를 시작합니다. 이미 시작된 task가 있으면 그대로 반환합니다."""
+        task = self._tasks.get(invocation_id)
+        if task is not None:
+            return task
+
+        task = asyncio.create_task(aget_sim_search(user_input, n_results=n_results))
+        self._tasks[invocation_id] = task
+        while len(self._tasks) > self.max_pending:
+            _, evicted = self._tasks.popitem(last=False)
+            evicted.cancel()
+        return task
+
+    async def get(self, invocation_id: str, user_input: str, n_results: int = BGA_REFERENCE_N_RESULTS) -> list:
+        """
+        prefetch task의 결과를 기다려 반환합니다.
+        task가 없거나 실패한 경우 바로 조회합니다.
+        """
+        task = self._tasks.get(invocation_id)
+        if task is not None:
+            try:
+                # 한 agent의 취소가 공유 task를 취소하지 않도록 shield
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise
+            except Exception as e:
+                logging.warning(f"[ReferencePrefetch] prefetch 실패, 다시 조회: {e}")
+        return await aget_sim_search(user_input, n_results=n_results)
+
+    def discard(self, invocation_id: str) -> None:
+        """invocation의 task를 제거하고, 아직 실행 중이면 취소합니다."""
+        task = self._tasks.pop(invocation_id, None)
+        if task is not None:
+            task.cancel()
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+
+REFERENCE_PREFETCH_REGISTRY = ReferencePrefetchRegistry()
+
+
+def start_reference_prefetch(invocation_id: str, user_input: Optional[str]) -> None:
+    if not BGA_REFERENCE_PREFETCH_ENABLED or not user_input:
+        return
+    REFERENCE_PREFETCH_REGISTRY.start(invocation_id, user_input)
+    logging.debug(f"[ReferencePrefetch] started: {invocation_id}, pending: {len(REFERENCE_PREFETCH_REGISTRY)}")
+
+
+async def get_reference_docs(invocation_id: str, user_input: str) -> list:
+    return await REFERENCE_PREFETCH_REGISTRY.get(invocation_id, user_input)
+
+
+def discard_reference_prefetch(invocation_id: str) -> None:
+    REFERENCE_PREFETCH_REGISTRY.discard(invocation_id)
@@ -0,0 +1,195 @@
+"""
+BGE-M3-KO 임베딩 서버와 ChromaDB에 대한 프로세스 단위 client 관리
+매 호출마다 연결을 새로 맺지 않도록 keep-alive session과 collection handle을 재사용하고,
+서버 연결이 끊어진 경우 client를 재생성한 뒤 한 번 재시도합니다.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import weakref
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_HOST = os.getenv("BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_HOST")
+BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_COLLECTION = os.getenv("BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_COLLECTION")
+TEXT_EMBEDDING_MODEL_URL = os.getenv("TEXT_EMBEDDING_MODEL_URL")
+TEXT_EMBEDDING_MODEL_NAME = os.getenv("TEXT_EMBEDDING_MODEL_NAME")
+TEXT_EMBEDDING_MODEL_POOL_SIZE = int(os.getenv("TEXT_EMBEDDING_MODEL_POOL_SIZE", "10"))
+TEXT_EMBEDDING_MODEL_TIMEOUT = float(os.getenv("TEXT_EMBEDDING_MODEL_TIMEOUT", "10"))
+
+_lock = threading.Lock()
+_embedding_session: requests.Session | None = None
+_chroma_client = None
+_chroma_collection = None
+_async_embedding_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_embedding_session() -> requests.Session:
+    """
+    임베딩 서버 호출에 사용할 keep-alive session을 반환합니다.
+    최초 호출 시 connection pool 크기가 설정된 session을 생성합니다.
+    """
+    global _embedding_session
+
+    if _embedding_session is None:
+        with _lock:
+            if _embedding_session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=TEXT_EMBEDDING_MODEL_POOL_SIZE,
+                    pool_maxsize=TEXT_EMBEDDING_MODEL_POOL_SIZE,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update({"Content-Type": "application/json"})
+                _embedding_session = session
+                logging.info(
+                    f"[Retrieval] embedding session 생성, pool_size: {TEXT_EMBEDDING_MODEL_POOL_SIZE}"
+                )
+    return _embedding_session
+
+
+def reset_embedding_session() -> None:
+    """임베딩 session을 닫고 다음 호출에서 새로 생성되도록 합니다."""
+    global _embedding_session
+
+    with _lock:
+        if _embedding_session is not None:
+            _embedding_session.close()
+        _embedding_session = None
+
+
+def get_async_embedding_client() -> httpx.AsyncClient:
+    """
+    현재 event loop에 귀속된 비동기 임베딩 client를 반환합니다.
+    httpx.AsyncClient는 생성된 loop 밖에서 재사용할 수 없으므로 loop 별로 하나씩 유지합니다.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_embedding_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            headers={"Content-Type": "application/json"},
+            timeout=TEXT_EMBEDDING_MODEL_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=TEXT_EMBEDDING_MODEL_POOL_SIZE,
+                max_keepalive_connections=TEXT_EMBEDDING_MODEL_POOL_SIZE,
+            ),
+        )
+        _async_embedding_clients[loop] = client
+        logging.info(
+            f"[Retrieval] async embedding client 생성, pool_size: {TEXT_EMBEDDING_MODEL_POOL_SIZE}"
+        )
+    return client
+
+
+async def reset_async_embedding_client() -> None:
+    """현재 event loop의 비동기 임베딩 client를 닫고 다음 호출에서 새로 생성되도록 합니다."""
+    client = _async_embedding_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def get_chroma_collection():
+    """
+    ChromaDB collection handle을 반환합니다.
+    client와 collection은 프로세스 내에서 한 번만 생성되어 재사용됩니다.
+    """
+    global _chroma_client, _chroma_collection
+
+    if _chroma_collection is None:
+        with _lock:
+            if _chroma_collection is None:
+                # chromadb는 import 비용이 크므로 첫 조회 시점에 import
+                import chromadb
+                import chromadb.config
+
+                _chroma_client = chromadb.HttpClient(
+                    host=BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_HOST,
+                    settings=chromadb.config.Settings(
+                        allow_reset=True,
+                        anonymized_telemetry=False,
+                    ),
+                )
+                _chroma_collection = _chroma_client.get_collection(
+                    BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_COLLECTION
+                )
+                logging.info(
+                    f"[Retrieval] chroma collection 연결: {BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_COLLECTION}"
+                )
+    return _chroma_collection
+
+
+def reset_chroma_client() -> None:
+    """캐시된 ChromaDB client와 collection handle을 폐기합니다."""
+    global _chroma_client, _chroma_collection
+
+    with _lock:
+        _chroma_client = None
+        _chroma_collection = None
+
+
+def post_embedding_request(text_list: list[str]) -> list[list[float]]:
+    """
+    임베딩 서버에 text_list를 한 번의 POST로 요청합니다.
+    연결 오류가 발생하면 session을 재생성하고 한 번 재시도합니다.
+    """
+    payload = {
+        "input": text_list,
+        "model": TEXT_EMBEDDING_MODEL_NAME,
+    }
+    try:
+        response = get_embedding_session().post(
+            TEXT_EMBEDDING_MODEL_URL, json=payload, timeout=TEXT_EMBEDDING_MODEL_TIMEOUT
+        )
+    except requests.ConnectionError as e:
+        logging.warning(f"[Retrieval] embedding 서버 연결 실패, 재연결 후 재시도: {e}")
+        reset_embedding_session()
+        response = get_embedding_session().post(
+            TEXT_EMBEDDING_MODEL_URL, json=payload, timeout=TEXT_EMBEDDING_MODEL_TIMEOUT
+        )
+    response.raise_for_status()
+    return [data["embedding"] for data in response.json()["data"]]
+
+
+async def apost_embedding_request(text_list: list[str]) -> list[list[float]]:
+    """
+    post_embedding_request의 비동기 버전입니다. event loop를 block 하지 않습니다.
+    연결 오류가 발생하면 client를 재생성하고 한 번 재시도합니다.
+    """
+    payload = {
+        "input": text_list,
+        "model": TEXT_EMBEDDING_MODEL_NAME,
+    }
+    try:
+        response = await get_async_embedding_client().post(TEXT_EMBEDDING_MODEL_URL, json=payload)
+    except (httpx.NetworkError, httpx.RemoteProtocolError) as e:
+        logging.warning(f"[Retrieval] embedding 서버 연결 실패, 재연결 후 재시도: {e}")
+        await reset_async_embedding_client()
+        response = await get_async_embedding_client().post(TEXT_EMBEDDING_MODEL_URL, json=payload)
+    response.raise_for_status()
+    return [data["embedding"] for data in response.json()["data"]]
+
+
+def query_chroma_collection(embeddings: list[list[float]], n_results: int) -> dict:
+    """
+    캐시된 collection으로 유사도 검색을 수행합니다.
+    서버 재시작 등으로 연결 / 전송 오류가 발생하면 client를 재생성하고 한 번 재시도합니다.
+    (잘못된 요청 등 다른 오류는 재시도하지 않고 그대로 전달)
+    """
+    try:
+        return get_chroma_collection().query(query_embeddings=embeddings, n_results=n_results)
+    except (httpx.TransportError, ConnectionError) as e:
+        logging.warning(f"[Retrieval] chroma 조회 실패, 재연결 후 재시도: {e}")
+        reset_chroma_client()
+        return get_chroma_collection().query(query_embeddings=embeddings, n_results=n_results)
+
+
+async def aquery_chroma_collection(embeddings: list[list[float]], n_results: int) -> dict:
+    """
+    query_chroma_collection을 worker thread에서 실행하여 event loop를 block 하지 않습니다.
+    """
+    return await asyncio.to_thread(query_chroma_collection, embeddings, n_results)
@@ -0,0 +1,210 @@
+"""
+질문 → SQL 의미(semantic) 캐시
+query_bga_database가 성공한 (질문 임베딩, 추출된 칼럼명, 최종 SQL)을 보관하고,
+새 질문의 임베딩과 cosine 유사도가 threshold 이상인 항목이 있으면
+캐시된 SQL을 SQL 생성에 참고로 전달(seed)하거나, direct 모드에서는 바로 실행합니다.
+연도 / 지역 / ID 등 literal만 다른 질문도 유사도가 threshold를 넘을 수 있으므로,
+direct 재사용은 두 질문의 숫자와 따옴표 literal이 모두 같을 때만 허용합니다.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+from agents.sub_agents.data_search_agent.tools.bga_column_name_processor import _aget_embedding
+from agents.sub_agents.data_search_agent.tools.bga_embedding_cache import normalize_text
+
+SEMANTIC_SQL_CACHE_ENABLED = os.getenv("SEMANTIC_SQL_CACHE_ENABLED", "true").lower() == "true"
+# "seed": SQL 생성 agent에 참고 SQL로 전달, "direct": literal이 같으면 검증 후 캐시된 SQL을 바로 실행
+SEMANTIC_SQL_CACHE_MODE = os.getenv("SEMANTIC_SQL_CACHE_MODE", "seed")
+SEMANTIC_SQL_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_SQL_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_SQL_CACHE_TTL_SECONDS = float(os.getenv("SEMANTIC_SQL_CACHE_TTL_SECONDS", "86400"))
+SEMANTIC_SQL_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_SQL_CACHE_MAX_ENTRIES", "1024"))
+
+_QUOTED_LITERAL_PATTERN = re.compile(r"'([^']*)'|\"([^\"]*)\"|“([^”]*)”|‘([^’]*)’|「([^」]*)」|『([^』]*)』")
+_NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def extract_literals(question: str) -> Counter:
+    """
+    질문에서 숫자와 따옴표로 감싼 literal을 추출합니다.
+    숫자의 천 단위 구분자(,)는 제거하여 "1,000"과 "1000"을 같은 값으로 봅니다.
+    """
+    text = normalize_text(question)
+    literals = Counter()
+    for match in _QUOTED_LITERAL_PATTERN.finditer(text):
+        literals[("quoted", next(group for group in match.groups() if group is not None).strip())] += 1
+    for number in _NUMBER_PATTERN.findall(_QUOTED_LITERAL_PATTERN.sub(" ", text)):
+        literals[("number", number.replace(",", ""))] += 1
+    return literals
+
+
+def literals_match(question: str, other: str) -> bool:
+    """두 질문의 숫자와 따옴표 literal이 모두 같으면 True"""
+    return extract_literals(question) == extract_literals(other)
+
+
+@dataclass
+class SemanticSqlCacheEntry:
+    """성공적으로 실행된 질문과 SQL"""
+
+    question: str
+    sql: str
+    column_names: dict = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    last_used_at: float = field(default_factory=time.monotonic)
+    hits: int = 0
+
+    def to_json(self, similarity: Optional[float] = None) -> dict:
+        res = {"question": self.question, "sql": self.sql}
+        if similarity is not None:
+            res["similarity"] = round(similarity, 4)
+        return res
+
+
+class SemanticSqlCache:
+    """
+    질문 임베딩 기반 SQL 캐시
+    임베딩은 L2 정규화된 행렬로 보관하므로 내적이 곧 cosine 유사도입니다.
+    항목 수가 max_entries를 넘으면 가장 오래 사용되지 않은 항목부터 제거하고, ttl_seconds가 지난 항목은 조회되지 않습니다.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[list[str]], Awaitable[list[list[float]]]],
+        threshold: float = SEMANTIC_SQL_CACHE_THRESHOLD,
+        ttl_seconds: float = SEMANTIC_SQL_CACHE_TTL_SECONDS,
+        max_entries: int = SEMANTIC_SQL_CACHE_MAX_ENTRIES,
+    ):
+        self._embed_fn = embed_fn
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # 임계 구역에 await가 없으므로 threading.Lock 사용 (singleton이 특정 event loop에 묶이지 않도록)
+        self._lock = threading.Lock()
+        self._entries: list[SemanticSqlCacheEntry] = []
+        # 앞쪽 len(self._entries)개 행만 유효한 임베딩 buffer (저장할 때마다 전체 행렬을 복사하지 않도록 2배씩 늘림)
+        self._buffer: Optional[np.ndarray] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def _embed(self, question: str) -> np.ndarray:
+        (embedding,) = await self._embed_fn([normalize_text(question)])
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    @property
+    def _matrix(self) -> Optional[np.ndarray]:
+        return self._buffer[: len(self._entries)] if self._entries else None
+
+    def _append(self, entry: SemanticSqlCacheEntry, vector: np.ndarray) -> None:
+        size = len(self._entries)
+        if self._buffer is None or size == len(self._buffer):
+            buffer = np.empty((max(16, 2 * size), len(vector)), dtype=np.float32)
+            if size:
+                buffer[:size] = self._buffer[:size]
+            self._buffer = buffer
+        self._buffer[size] = vector
+        self._entries.append(entry)
+
+    def _remove(self, indices: list[int]) -> None:
+        removed = set(indices)
+        keep = [i for i in range(len(self._entries)) if i not in removed]
+        if keep:
+            self._buffer[: len(keep)] = self._buffer[keep]
+        self._entries = [self._entries[i] for i in keep]
+
+    def _remove_one(self, index: int) -> None:
+        """마지막 항목을 index 위치로 옮겨 한 행만 복사합니다."""
+        last = len(self._entries) - 1
+        if index != last:
+            self._entries[index] = self._entries[last]
+            self._buffer[index] = self._buffer[last]
+        self._entries.pop()
+
+    def _remove_expired(self) -> None:
+        now = time.time()
+        expired = [
+            i for i, entry in enumerate(self._entries) if now - entry.created_at > self.ttl_seconds
+        ]
+        if expired:
+            self._remove(expired)
+            self.evictions += len(expired)
+
+    async def lookup(self, question: str) -> Optional[tuple[SemanticSqlCacheEntry, float]]:
+        """
+        질문과 가장 유사한 캐시 항목을 찾습니다.
+
+        Returns:
+            tuple[SemanticSqlCacheEntry, float] | None: threshold 이상인 항목과 유사도, 없으면 None
+        """
+        vector = await self._embed(question)
+        with self._lock:
+            self._remove_expired()
+            if self._matrix is None:
+                self.misses += 1
+                return None
+
+            similarities = self._matrix @ vector
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                logging.debug(f"[SemanticSqlCache] miss: {similarity=:.4f}")
+                return None
+
+            entry = self._entries[best]
+            entry.hits += 1
+            entry.last_used_at = time.monotonic()
+            self.hits += 1
+        logging.info(f"[SemanticSqlCache] hit: {similarity=:.4f} question={entry.question!r}")
+        return entry, similarity
+
+    async def store(self, question: str, sql: str, column_names: Optional[dict] = None) -> None:
+        """성공한 질문과 SQL을 저장합니다. 거의 같은 질문이 이미 있으면 그 항목을 갱신합니다."""
+        vector = await self._embed(question)
+        entry = SemanticSqlCacheEntry(question=question, sql=sql, column_names=column_names or {})
+        with self._lock:
+            if self._matrix is not None:
+                similarities = self._matrix @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self._entries[best] = entry
+                    self._buffer[best] = vector
+                    return
+
+            self._append(entry, vector)
+            if len(self._entries) > self.max_entries:
+                lru = min(range(len(self._entries)), key=lambda i: self._entries[i].last_used_at)
+                self._remove_one(lru)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_semantic_sql_cache: Optional[SemanticSqlCache] = None
+
+
+def get_semantic_sql_cache() -> SemanticSqlCache:
+    global _semantic_sql_cache
+
+    if _semantic_sql_cache is None:
+        _semantic_sql_cache = SemanticSqlCache(embed_fn=_aget_embedding)
+    return _semantic_sql_cache
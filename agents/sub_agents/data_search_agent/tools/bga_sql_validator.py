@@ -0,0 +1,321 @@
+"""
+생성된 SQL의 결정적(deterministic) 검증
+- 구문: sqlglot(postgres dialect)으로 parsing, SQL 문은 하나만 허용
+- 읽기 전용: SELECT / UNION 등 조회 문만 허용하고, INSERT / UPDATE / DELETE / DDL / SELECT INTO,
+  FOR UPDATE 등 잠금 절, 허용 목록에 없는 함수(nextval, setval, pg_terminate_backend 등 부작용 가능)는 거부
+- 식별자: layer_info_column_description.json 또는 DB의 information_schema 기준으로 테이블 / 칼럼명 확인
+- (선택) EXPLAIN: 실제 실행 없이 planner로 검증
+오류는 SQL 생성 agent가 바로 수정할 수 있도록 구체적인 메시지(비슷한 이름 후보 포함)로 반환합니다.
+"""
+
+import difflib
+import logging
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+import sqlglot
+from sqlglot import exp
+
+from agents.sub_agents.data_search_agent.tools.bga_local_vector_index import (
+    BGA_LAYER_INFO_COLUMN_DESCRIPTION_PATH,
+    load_column_descriptions,
+)
+
+# "json": layer_info_column_description.json, "db": information_schema, "none": 식별자 검사 안 함
+BGA_SQL_VALIDATOR_CATALOG = os.getenv("BGA_SQL_VALIDATOR_CATALOG", "json")
+BGA_SQL_VALIDATOR_SCHEMAS = [
+    schema.strip() for schema in os.getenv("BGA_SQL_VALIDATOR_SCHEMAS", "public").split(",") if schema.strip()
+]
+BGA_SQL_VALIDATOR_EXPLAIN = os.getenv("BGA_SQL_VALIDATOR_EXPLAIN", "false").lower() == "true"
+# 검증을 통과한 SQL을 sql_reviewer LLM 없이 바로 실행할지 여부
+BGA_SQL_VALIDATOR_DIRECT_EXECUTION = os.getenv("BGA_SQL_VALIDATOR_DIRECT_EXECUTION", "true").lower() == "true"
+# sqlglot이 알지 못하는 함수 중 추가로 허용할 함수명 (콤마 구분)
+BGA_SQL_VALIDATOR_ALLOWED_FUNCTIONS = [
+    name.strip().lower()
+    for name in os.getenv("BGA_SQL_VALIDATOR_ALLOWED_FUNCTIONS", "").split(",")
+    if name.strip()
+]
+
+_SQL_CODE_BLOCK_PATTERN = re.compile(r"```(?:sql|postgresql)?\s*(.*?)```", re.IGNORECASE | re.DOTALL)
+# 코드 블록이 없을 때 SQL 시작 위치: 줄 시작의 대문자 keyword > 문장 중간의 대문자 keyword > 줄 시작의 소문자 keyword
+_SQL_START_PATTERNS = (
+    re.compile(r"^[ \t]*(SELECT|WITH)\b", re.MULTILINE),
+    re.compile(r"\b(SELECT|WITH)\b"),
+    re.compile(r"^[ \t]*(select|with)\s", re.MULTILINE | re.IGNORECASE),
+)
+_WRITE_EXPRESSIONS = (
+    exp.Insert,
+    exp.Update,
+    exp.Delete,
+    exp.Merge,
+    exp.Create,
+    exp.Drop,
+    exp.Alter,
+    exp.TruncateTable,
+    exp.Command,
+    exp.Into,
+    exp.Lock,
+)
+# sqlglot이 표준 함수로 인식하지 못하는(exp.Anonymous) PostgreSQL 함수 중 부작용이 없는 함수
+# sqlglot이 인식하는 함수(COUNT, DATE_TRUNC, TO_CHAR 등)는 모두 허용
+_ALLOWED_ANONYMOUS_FUNCTIONS = {
+    "age",
+    "cardinality",
+    "every",
+    "isfinite",
+    "json_build_object",
+    "jsonb_agg",
+    "jsonb_array_elements",
+    "jsonb_build_object",
+    "jsonb_each",
+    "jsonb_extract_path_text",
+    "jsonb_object_keys",
+    "make_date",
+    "regexp_match",
+    "regexp_matches",
+    "regexp_split_to_array",
+    "to_json",
+    "to_jsonb",
+    *BGA_SQL_VALIDATOR_ALLOWED_FUNCTIONS,
+}
+
+
+@dataclass
+class SqlValidationResult:
+    """SQL 검증 결과"""
+
+    sql: str
+    valid: bool
+    errors: list[str] = field(default_factory=list)
+
+    def to_json(self) -> dict:
+        return asdict(self)
+
+
+def extract_sql(text: str) -> str:
+    """
+    LLM 출력에서 SQL 문을 추출합니다.
+    ```sql 코드 블록이 있으면 마지막 블록(수정된 최종 SQL)의 내용을, 없으면 SELECT / WITH 부터 끝까지를 사용합니다.
+    설명 문장의 "select" 등을 SQL로 오인하지 않도록 keyword는 대문자이거나 줄 시작에 있어야 합니다.
+    """
+    if not text:
+        return ""
+    code_blocks = [block.strip() for block in _SQL_CODE_BLOCK_PATTERN.findall(text) if block.strip()]
+    if code_blocks:
+        return code_blocks[-1]
+    for pattern in _SQL_START_PATTERNS:
+        start = pattern.search(text)
+        if start:
+            return text[start.start(1):].strip()
+    return text.strip()
+
+
+class SchemaCatalog:
+    """
+    테이블명 -> 칼럼명 집합
+    JSON 파일 기반 catalog는 파일이 변경되면 다시 읽습니다.
+    """
+
+    def __init__(self, tables: Optional[dict[str, set[str]]] = None, path: Optional[str] = None):
+        self.path = path
+        self._tables = tables or {}
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_json(cls, path: str = BGA_LAYER_INFO_COLUMN_DESCRIPTION_PATH) -> "SchemaCatalog":
+        return cls(path=path)
+
+    @classmethod
+    async def from_information_schema(
+        cls, conn, schemas: list[str] = BGA_SQL_VALIDATOR_SCHEMAS
+    ) -> "SchemaCatalog":
+        """DB의 information_schema.columns로 catalog를 만듭니다."""
+        tables: dict[str, set[str]] = {}
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT table_name, column_name FROM information_schema.columns WHERE table_schema = ANY(%s)",
+                (schemas,),
+            )
+            for table_name, column_name in await cur.fetchall():
+                tables.setdefault(table_name.lower(), set()).add(column_name.lower())
+        return cls(tables=tables)
+
+    @property
+    def tables(self) -> dict[str, set[str]]:
+        if self.path is not None:
+            self._refresh()
+        return self._tables
+
+    def _refresh(self) -> None:
+        mtime = os.path.getmtime(self.path)
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            tables: dict[str, set[str]] = {}
+            for entry in load_column_descriptions(self.path):
+                tables.setdefault(entry["table"].lower(), set()).add(entry["column_name"].lower())
+            self._tables = tables
+            self._mtime = mtime
+
+
+def _did_you_mean(name: str, candidates) -> str:
+    matches = difflib.get_close_matches(name, list(candidates), n=3, cutoff=0.6)
+    return f" Did you mean: {', '.join(matches)}?" if matches else ""
+
+
+def _check_read_only(statement: exp.Expression) -> list[str]:
+    if not isinstance(statement, exp.Query):
+        return [f"Only SELECT statements are allowed, got {statement.key.upper()}."]
+    for node in statement.find_all(*_WRITE_EXPRESSIONS):
+        if isinstance(node, exp.Lock):
+            return ["Locking clauses (FOR UPDATE / FOR SHARE) are not allowed in read-only queries."]
+        return [f"Only read-only SELECT statements are allowed, found {node.key.upper()}."]
+    for function in statement.find_all(exp.Anonymous):
+        if function.name.lower() not in _ALLOWED_ANONYMOUS_FUNCTIONS:
+            return [
+                f"Function '{function.name}' is not allowed in read-only queries. "
+                "Use standard SQL functions and aggregates only."
+            ]
+    return []
+
+
+def _check_identifiers(statement: exp.Expression, catalog: SchemaCatalog) -> list[str]:
+    errors = []
+    known_tables = catalog.tables
+    cte_names = {cte.alias_or_name.lower() for cte in statement.find_all(exp.CTE)}
+    # subquery / CTE처럼 catalog로 칼럼을 알 수 없는 source의 alias
+    derived_sources = set(cte_names)
+    for subquery in statement.find_all(exp.Subquery, exp.Unnest):
+        if subquery.alias:
+            derived_sources.add(subquery.alias.lower())
+
+    sources: dict[str, str] = {}
+    has_unknown_table = False
+    for table in statement.find_all(exp.Table):
+        name = table.name.lower()
+        # generate_series(...), unnest(...) 등 table 함수
+        if not name or isinstance(table.this, exp.Func):
+            if table.alias:
+                derived_sources.add(table.alias.lower())
+            continue
+        if name in cte_names:
+            derived_sources.add((table.alias or name).lower())
+            continue
+        if name not in known_tables:
+            errors.append(f"Unknown table '{table.name}'.{_did_you_mean(name, known_tables)}")
+            has_unknown_table = True
+            continue
+        sources[name] = name
+        if table.alias:
+            sources[table.alias.lower()] = name
+
+    select_aliases = {alias.alias.lower() for alias in statement.find_all(exp.Alias)}
+    referenced_columns = set().union(*(known_tables[name] for name in set(sources.values()))) if sources else set()
+    for column in statement.find_all(exp.Column):
+        name = column.name.lower()
+        if not name or isinstance(column.this, exp.Star):
+            continue
+        qualifier = column.table.lower()
+        if qualifier:
+            if qualifier in derived_sources:
+                continue
+            if qualifier not in sources:
+                errors.append(f"Unknown table or alias '{column.table}' in '{column.sql()}'.")
+            elif name not in known_tables[sources[qualifier]]:
+                table_name = sources[qualifier]
+                errors.append(
+                    f"Unknown column '{column.name}' in table '{table_name}'."
+                    f"{_did_you_mean(name, known_tables[table_name])}"
+                )
+        elif not (derived_sources or has_unknown_table) and name not in referenced_columns and name not in select_aliases:
+            errors.append(
+                f"Unknown column '{column.name}' in tables {sorted(set(sources.values()))}."
+                f"{_did_you_mean(name, referenced_columns)}"
+            )
+    return list(dict.fromkeys(errors))
+
+
+def validate_sql(generated_sql: str, catalog: Optional[SchemaCatalog] = None) -> SqlValidationResult:
+    """
+    SQL을 parsing 하여 구문, 읽기 전용 여부, (catalog가 있으면) 테이블 / 칼럼명을 검사합니다.
+
+    Args:
+        generated_sql: 검사할 SQL 문
+        catalog: 식별자 검사에 사용할 schema catalog, None이면 식별자 검사를 하지 않음
+
+    Returns:
+        SqlValidationResult: 검증 결과와 오류 목록
+    """
+    sql = generated_sql.replace("\u00A0", " ").strip()
+    if not sql:
+        return SqlValidationResult(sql=sql, valid=False, errors=["No SQL statement found."])
+
+    try:
+        statements = [statement for statement in sqlglot.parse(sql, read="postgres") if statement is not None]
+    except sqlglot.errors.ParseError as e:
+        details = "; ".join(
+            f"{error.get('description')} near '{error.get('highlight')}' (line {error.get('line')}, col {error.get('col')})"
+            for error in e.errors
+        )
+        return SqlValidationResult(sql=sql, valid=False, errors=[f"Syntax error: {details or e}"])
+
+    if len(statements) != 1:
+        return SqlValidationResult(
+            sql=sql, valid=False, errors=[f"Exactly one SQL statement is allowed, got {len(statements)}."]
+        )
+
+    statement = statements[0]
+    errors = _check_read_only(statement)
+    if not errors and catalog is not None:
+        errors = _check_identifiers(statement, catalog)
+
+    logging.debug(f"[SqlValidator] {errors=}")
+    return SqlValidationResult(sql=sql, valid=not errors, errors=errors)
+
+
+async def explain_sql(conn, result: SqlValidationResult) -> SqlValidationResult:
+    """
+    검증을 통과한 SQL을 EXPLAIN으로 실행 없이 planner에 전달하여, DB 수준의 오류(타입, 권한 등)를 확인합니다.
+    """
+    if not result.valid:
+        return result
+
+    from agents.sub_agents.data_search_agent.tools.bga_query_executor import explain_query
+
+    try:
+        await explain_query(conn, result.sql)
+    except Exception as e:
+        return SqlValidationResult(sql=result.sql, valid=False, errors=[f"EXPLAIN failed: {e}"])
+    return result
+
+
+_catalog: Optional[SchemaCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+async def get_schema_catalog(conn=None) -> Optional[SchemaCatalog]:
+    """
+    BGA_SQL_VALIDATOR_CATALOG 설정에 따른 catalog를 반환합니다.
+    "db" 설정은 처음 호출될 때 conn으로 information_schema를 한 번 조회합니다.
+    """
+    global _catalog
+
+    if BGA_SQL_VALIDATOR_CATALOG == "none":
+        return None
+    if _catalog is None:
+        if BGA_SQL_VALIDATOR_CATALOG == "db":
+            if conn is None:
+                return None
+            catalog = await SchemaCatalog.from_information_schema(conn)
+        else:
+            catalog = SchemaCatalog.from_json()
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = catalog
+    return _catalog
@@ -1,16 +1,63 @@
 import json
 import logging 
+from typing import Optional
 
 from google.adk.tools import ToolContext
-from google.adk.agnets.callback_context import CallbackContext
+from google.adk.agents.callback_context import CallbackContext
 from google.adk.models import LlmRequest
 from google.genai.types import Content, Part 
+from psycopg.errors import QueryCanceled
 
+from agents.constants.constants import (
+    BGA_CACHED_SQL_STATES,
+    BGA_COLUMN_NAMES_REF_DOCS_STATES,
+    BGA_COLUMN_NAMES_STATES,
+)
 from agents.custom_types.tool_response import ToolResponse, ToolResponseData
-from agents.sub_agents.data_search_agent.tools.bga_column_name_processor import (
-    get_sim_search,
+from agents.sub_agents.data_search_agent.tools.bga_query_executor import (
+    BGA_QUERY_EXECUTION_MODE,
+    CsvQueryResult,
+    choose_execution_mode,
+    copy_query_to_csv,
+    estimate_row_count,
+    fetch_query_to_csv,
+    stream_query_to_csv,
+)
+from agents.sub_agents.data_search_agent.tools.bga_query_guard import (
+    BGA_QUERY_GUARD_ENABLED,
+    BGA_QUERY_STATEMENT_TIMEOUT_MS,
+    QueryGuardError,
+    apply_preview_limit,
+    guard_query,
+    set_read_only_transaction,
+    set_statement_timeout,
+)
+from agents.sub_agents.data_search_agent.tools.bga_reference_prefetch import (
+    discard_reference_prefetch,
+    get_reference_docs,
+    start_reference_prefetch,
+)
+from agents.sub_agents.data_search_agent.tools.bga_query_result_cache import (
+    BGA_QUERY_RESULT_CACHE_ENABLED,
+    QUERY_RESULT_CACHE,
+)
+from agents.sub_agents.data_search_agent.tools.bga_semantic_sql_cache import (
+    SEMANTIC_SQL_CACHE_ENABLED,
+    SEMANTIC_SQL_CACHE_MODE,
+    get_semantic_sql_cache,
+    literals_match,
+)
+from agents.sub_agents.data_search_agent.tools.bga_sql_validator import (
+    BGA_SQL_VALIDATOR_CATALOG,
+    BGA_SQL_VALIDATOR_EXPLAIN,
+    SqlValidationResult,
+    explain_sql,
+    get_schema_catalog,
+    validate_sql,
 )
 from agents.utils.database_utils import POOL
+from agents.utils.file_utils import save_table_artifact
+from agents.utils.log_utils import span, traced
 
 def _serialize_for_cell(data):
     """
@@ -21,60 +68,302 @@ def _serialize_for_cell(data):
     s = data.replace("\u00A0", " ")
     return s
 
-async def query_bga_database(generated_sql: str, tool_context: ToolContext):
+async def _resolve_execution_mode(
+    conn, generated_sql: str, estimated_rows: float | None = None
+) -> str:
+    if BGA_QUERY_EXECUTION_MODE != "auto":
+        return BGA_QUERY_EXECUTION_MODE
+
+    if estimated_rows is None:
+        estimated_rows = await estimate_row_count(conn, generated_sql)
+    execution_mode = choose_execution_mode(estimated_rows)
+    logging.debug(f"[Tool] query_bga_database: {estimated_rows=} {execution_mode=}")
+    return execution_mode
+
+
+async def _execute_to_csv(conn, generated_sql: str, execution_mode: str) -> CsvQueryResult:
+    if execution_mode == "copy":
+        return await copy_query_to_csv(conn, generated_sql)
+    if execution_mode == "stream":
+        return await stream_query_to_csv(conn, generated_sql)
+    return await fetch_query_to_csv(conn, generated_sql)
+
+
+async def _guarded_execute(generated_sql: str) -> CsvQueryResult:
     """
-    Query data from BGA database using given SQL statement.
-    Args:
-        generated_sql: str. Complete SQL statement for PostgreSQL database.
+    읽기 전용 트랜잭션에서 guard(EXPLAIN 비용 확인, statement_timeout)를 거쳐 쿼리를 실행하고 결과를 CSV로 기록합니다.
     """
+    async with span("sql.execute"), POOL.connection() as conn:
+        logging.debug(f"{conn}")
+        async with conn.transaction():
+            await set_read_only_transaction(conn)
+            await set_statement_timeout(conn)
 
-    generated_sql = _serialize_for_cell(generated_sql)
-    res = []
+            estimated_rows = None
+            if BGA_QUERY_GUARD_ENABLED:
+                estimated_rows = (await guard_query(conn, generated_sql)).rows
 
-    logging.debug(f"Generated SQL: {generated_sql}")
-    async with POOL.connection() as conn:
-        logging.debug(f"{conn}")
-        async with conn.cursor() as cur:
+            execution_mode = await _resolve_execution_mode(conn, generated_sql, estimated_rows)
             try:
-                await cur.execute(query=generated_sql)
-                raw_res = await cur.fetchall()
-                columns = [item.name for item in cur.description]
-                res = [{k: v for k, v in zip(columns, row)} for row in raw_res]
+                return await _execute_to_csv(conn, generated_sql, execution_mode)
+            except QueryCanceled as e:
+                raise QueryGuardError(
+                    "statement_timeout",
+                    f"Query cancelled after exceeding statement_timeout ({BGA_QUERY_STATEMENT_TIMEOUT_MS} ms). "
+                    "Narrow the WHERE conditions or aggregate the result.",
+                    statement_timeout_ms=BGA_QUERY_STATEMENT_TIMEOUT_MS,
+                ) from e
+
 
-            except Exception as e:
-                return ToolResponse(
-                    status="error", message=f"Error while querying DB: {e}"
-                ).to_json()
+async def _cached_execute(generated_sql: str) -> CsvQueryResult:
+    """결과 캐시를 먼저 조회하고, 없으면 DB에서 실행한 결과를 캐시에 저장합니다."""
+    if BGA_QUERY_RESULT_CACHE_ENABLED:
+        result = QUERY_RESULT_CACHE.get(generated_sql)
+        if result is not None:
+            logging.info(f"[Tool] query_bga_database: 결과 캐시 사용 ({QUERY_RESULT_CACHE.stats()})")
+            return result
 
+    result = await _guarded_execute(generated_sql)
+    if BGA_QUERY_RESULT_CACHE_ENABLED:
+        QUERY_RESULT_CACHE.put(generated_sql, result)
+    return result
 
-    logging.debug(f"[Tool] query_bga_database: {res=}"[:100])
-    tool_context.actions.escalate = True
+
+async def _save_csv_query_result(
+    generated_sql: str, result: CsvQueryResult, context: ToolContext | CallbackContext
+) -> dict:
+    file_name = await save_table_artifact(
+        context, result.csv_bytes, data_length=result.row_count, sql_query=generated_sql
+    )
+
+    logging.debug(f"[Tool] query_bga_database: {result.row_count=} {file_name=}")
     return ToolResponse(
-        status = "success",
-        message = f"SQL executed.",
-        data = ToolResponseData(
-            type="csv_table", content={"sql": generated_sql, "records": res}
+        status="success",
+        message=f"SQL executed. Resulting {result.row_count} records stored in {file_name}.",
+        data=ToolResponseData(
+            type="csv_table",
+            content={"sql": generated_sql, "artifact": file_name, **result.summary()},
         ).to_json(),
     ).to_json()
 
 
-def get_sql_query_references_before_model_callback(
+async def query_bga_database(generated_sql: str, tool_context: ToolContext, preview: bool = False):
+    """
+    Query data from BGA database using given SQL statement.
+    Args:
+        generated_sql: str. Complete SQL statement for PostgreSQL database.
+        preview: bool. If true, only the first rows of the result are fetched to check the query.
+    """
+
+    if preview:
+        generated_sql = apply_preview_limit(_serialize_for_cell(generated_sql))
+
+    logging.debug(f"Generated SQL: {generated_sql}")
+    response = await execute_bga_query(generated_sql, tool_context, store_semantic_cache=not preview)
+    if response["status"] == "success":
+        tool_context.actions.escalate = True
+    return response
+
+
+@traced("sql.query")
+async def execute_bga_query(
+    generated_sql: str, context: ToolContext | CallbackContext, store_semantic_cache: bool = True
+) -> dict:
+    """
+    SQL을 실행하여 결과를 artifact로 저장하고, 성공하면 질문과 SQL을 semantic 캐시에 저장합니다.
+    """
+    response = await run_bga_query_to_artifact(generated_sql, context)
+    if response["status"] == "success" and SEMANTIC_SQL_CACHE_ENABLED and store_semantic_cache:
+        await _store_semantic_sql_cache(context, generated_sql)
+    return response
+
+
+@traced("sql.validate")
+async def validate_generated_sql(generated_sql: str) -> SqlValidationResult:
+    """
+    생성된 SQL을 실행 전에 검증합니다. (구문, 읽기 전용, schema catalog 식별자, 설정 시 EXPLAIN)
+    DB 연결은 information_schema catalog를 처음 만들거나 EXPLAIN을 실행할 때만 사용합니다.
+    """
+    generated_sql = _serialize_for_cell(generated_sql)
+    needs_connection = BGA_SQL_VALIDATOR_EXPLAIN or (
+        BGA_SQL_VALIDATOR_CATALOG == "db" and await get_schema_catalog() is None
+    )
+    if not needs_connection:
+        return validate_sql(generated_sql, await get_schema_catalog())
+
+    try:
+        async with POOL.connection() as conn:
+            result = validate_sql(generated_sql, await get_schema_catalog(conn))
+            if BGA_SQL_VALIDATOR_EXPLAIN:
+                result = await explain_sql(conn, result)
+    except Exception as e:
+        logging.warning(f"[SqlValidator] DB 검증 실패, 로컬 검증 결과만 사용: {e}")
+        result = validate_sql(generated_sql, await get_schema_catalog())
+    return result
+
+
+async def run_bga_query_to_artifact(
+    generated_sql: str, context: ToolContext | CallbackContext
+) -> dict:
+    """
+    SQL을 실행하여 결과를 CSV artifact로 바로 저장하고, 요약(row 수, 칼럼, preview)만 반환합니다.
+    같은 SQL의 결과가 캐시에 있으면 DB 조회 없이 캐시된 CSV를 저장합니다.
+    """
+
+    generated_sql = _serialize_for_cell(generated_sql)
+    try:
+        result = await _cached_execute(generated_sql)
+    except QueryGuardError as e:
+        logging.info(f"[Tool] query_bga_database rejected: {e.reason} {e.details}")
+        return e.to_tool_response()
+    except Exception as e:
+        return ToolResponse(
+            status="error", message=f"Error while querying DB: {e}"
+        ).to_json()
+
+    return await _save_csv_query_result(generated_sql, result, context)
+
+
+def _get_user_input(context: ToolContext | CallbackContext) -> Optional[str]:
+    if context.user_content is None or not context.user_content.parts:
+        return None
+    return context.user_content.parts[0].text
+
+
+async def _store_semantic_sql_cache(context: ToolContext | CallbackContext, generated_sql: str) -> None:
+    """실행에 성공한 질문과 SQL을 semantic 캐시에 저장합니다. 실패해도 tool 결과에는 영향을 주지 않습니다."""
+    user_input = _get_user_input(context)
+    if not user_input:
+        return
+    try:
+        await get_semantic_sql_cache().store(
+            user_input,
+            _serialize_for_cell(generated_sql),
+            column_names=context.state.get(BGA_COLUMN_NAMES_STATES),
+        )
+    except Exception as e:
+        logging.warning(f"[SemanticSqlCache] 저장 실패: {e}")
+
+
+async def _can_reuse_directly(user_input: str, cached_question: str, cached_sql: str) -> bool:
+    """캐시된 SQL을 검증 없이 다른 질문에 실행하지 않도록 literal 일치와 SQL 검증을 확인합니다."""
+    if not literals_match(user_input, cached_question):
+        logging.info(f"[SemanticSqlCache] literal 불일치, 참고 SQL로만 사용: {cached_question!r}")
+        return False
+
+    validation = await validate_generated_sql(cached_sql)
+    if not validation.valid:
+        logging.info(f"[SemanticSqlCache] 캐시된 SQL 검증 실패, 참고 SQL로만 사용: {validation.errors}")
+        return False
+    return True
+
+
+@traced("callback.before_agent.semantic_sql_cache")
+async def semantic_sql_cache_before_agent_callback(
+    callback_context: CallbackContext,
+) -> Optional[Content]:
+    """
+    before_agent_callback to reuse SQL of a semantically similar question answered before.
+    direct 모드에서는 두 질문의 literal이 같고 캐시된 SQL이 검증을 통과한 경우에만 바로 실행하여
+    칼럼명 추출 / SQL 생성 loop 전체를 건너뛰고,
+    그 외(seed 모드, literal 불일치, 검증 / 실행 실패)에는 bga_cached_sql state로 SQL 생성 agent에 전달합니다.
+
+    Returns:
+        Optional[Content]: direct 모드에서 캐시된 SQL 실행에 성공하면 agent 실행을 대신할 응답
+    """
+    if not SEMANTIC_SQL_CACHE_ENABLED:
+        return None
+
+    # 이전 질문에서 남은 참고 SQL 제거
+    if callback_context.state.get(BGA_CACHED_SQL_STATES):
+        callback_context.state[BGA_CACHED_SQL_STATES] = ""
+
+    user_input = _get_user_input(callback_context)
+    if not user_input:
+        return None
+
+    cache = get_semantic_sql_cache()
+    try:
+        hit = await cache.lookup(user_input)
+    except Exception as e:
+        logging.warning(f"[SemanticSqlCache] 조회 실패: {e}")
+        return None
+    logging.debug(f"[SemanticSqlCache] {cache.stats()}")
+    if hit is None:
+        return None
+
+    entry, similarity = hit
+    if SEMANTIC_SQL_CACHE_MODE == "direct" and await _can_reuse_directly(user_input, entry.question, entry.sql):
+        response = await run_bga_query_to_artifact(entry.sql, callback_context)
+        if response["status"] == "success":
+            # SQL 생성 단계를 건너뛰므로 참고 문서 prefetch는 필요 없음
+            discard_reference_prefetch(callback_context.invocation_id)
+            if entry.column_names:
+                callback_context.state[BGA_COLUMN_NAMES_STATES] = entry.column_names
+            row_count = response["data"]["content"]["row_count"]
+            return Content(
+                parts=[
+                    Part(
+                        text=f"Query successfully executed with SQL reused from a previous similar question. "
+                        f"Resulting {row_count} records stored in states. Notice user to check the attachment files.\n"
+                        f"SQL: {entry.sql}"
+                    )
+                ],
+                role="model",
+            )
+        logging.info(f"[SemanticSqlCache] 캐시된 SQL 실행 실패, 전체 pipeline으로 진행: {response['message']}")
+
+    callback_context.state[BGA_CACHED_SQL_STATES] = json.dumps(
+        entry.to_json(similarity), ensure_ascii=False
+    )
+    return None
+
+
+@traced("callback.before_agent.reference_prefetch")
+def reference_prefetch_before_agent_callback(callback_context: CallbackContext) -> None:
+    """
+    before_agent_callback to start retrieving SQL reference documents in the background.
+    조회는 사용자 질문만 사용하므로 칼럼명 추출 loop와 동시에 진행되며, SQL 생성 agent가 결과를 기다립니다.
+    """
+    # 이전 질문의 참고 문서 제거
+    if callback_context.state.get(BGA_COLUMN_NAMES_REF_DOCS_STATES):
+        callback_context.state[BGA_COLUMN_NAMES_REF_DOCS_STATES] = ""
+    start_reference_prefetch(callback_context.invocation_id, _get_user_input(callback_context))
+    return None
+
+
+def reference_prefetch_after_agent_callback(callback_context: CallbackContext) -> None:
+    discard_reference_prefetch(callback_context.invocation_id)
+    return None
+
+
+@traced("callback.before_model.sql_query_references")
+async def get_sql_query_references_before_model_callback(
     callback_context: CallbackContext, llm_request: LlmRequest
 ):
-    user_input = callback_context.user_content.parts[0].text 
-    docs = get_sim_search(user_input, n_results=5)
+    """
+    before_model_callback to add reference documents retrieved for the user query.
+    prefetch 된 조회 결과를 기다려 bga_column_names_reference_docs state에 저장하고 요청에 추가합니다.
+    state에 이미 있으면 instruction에 포함되어 있으므로 다시 추가하지 않습니다.
+    """
+    if callback_context.state.get(BGA_COLUMN_NAMES_REF_DOCS_STATES):
+        return
+
+    user_input = _get_user_input(callback_context)
+    if not user_input:
+        return
+    docs = json.dumps(
+        await get_reference_docs(callback_context.invocation_id, user_input), ensure_ascii=False
+    )
+    callback_context.state[BGA_COLUMN_NAMES_REF_DOCS_STATES] = docs
     context_contents = Content(
         parts = [
             Part(
-                text=f"Retrieved docs relevant to user query: {json.dumps(docs, ensure_ascii=False)}"
+                text=f"Retrieved docs relevant to user query: {docs}"
             )
         ],
         role="user",
     )
     llm_request.contents.append(context_contents)
-    logging.debug(f"{llm_request=}")
+    logging.debug("Added reference docs: len(docs)=%d len(llm_request.contents)=%d", len(docs), len(llm_request.contents))
     return 
-
-
-
-    
\ No newline at end of file
@@ -1,7 +1,6 @@
 # Utils
 from .prompt_utils import get_prompt_yaml
 from .file_utils import(
-    save_file_artifact
+    save_table_artifact
 )
-
-from 
\ No newline at end of file
+from .table_format_utils import decode_table, encode_table
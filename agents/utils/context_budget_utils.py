@@ -0,0 +1,164 @@
+"""
+LLM 요청 context token 예산 관리
+before_model_callback으로 llm_request.contents의 오래된 대화를 잘라 agent별 token 예산 안에 맞춥니다.
+- 항상 유지: system instruction(state로 주입되는 bga_column_names, 참고 문서 포함), 최신 사용자 질문, 최근 contents
+- 오래된 contents는 가장 오래된 것부터 제거하며, function call / response 쌍은 함께 제거합니다.
+- 제거된 구간은 한 줄 요약 content로 대체합니다.
+token 수는 tokenizer 없이 문자 수 기반으로 추정합니다. (ASCII 4자당 1 token, 그 외 문자 1자당 1 token)
+"""
+
+import logging
+import math
+import os
+from typing import Optional
+
+import google.genai.types as types
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+
+from .log_utils import traced
+
+# agent별 예산은 LLM_CONTEXT_TOKEN_BUDGET_<AGENT_NAME> 으로 지정 (0 이하이면 제한 없음)
+LLM_CONTEXT_TOKEN_BUDGET = int(os.getenv("LLM_CONTEXT_TOKEN_BUDGET", "16000"))
+# 예산과 무관하게 유지할 최근 contents 수 (현재 loop iteration의 tool 호출 / 응답)
+LLM_CONTEXT_KEEP_RECENT_CONTENTS = int(os.getenv("LLM_CONTEXT_KEEP_RECENT_CONTENTS", "4"))
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """문자 수 기반 token 수 추정"""
+    if not text:
+        return 0
+    num_of_ascii = sum(1 for char in text if char.isascii())
+    return math.ceil(num_of_ascii / 4) + (len(text) - num_of_ascii)
+
+
+def _estimate_part_tokens(part: types.Part) -> int:
+    if part.text:
+        return estimate_tokens(part.text)
+    if part.function_call:
+        return estimate_tokens(f"{part.function_call.name}{part.function_call.args}")
+    if part.function_response:
+        return estimate_tokens(f"{part.function_response.name}{part.function_response.response}")
+    return 0
+
+
+def estimate_content_tokens(content: types.Content) -> int:
+    return sum(_estimate_part_tokens(part) for part in content.parts or [])
+
+
+def _get_token_budget(agent_name: str) -> int:
+    return int(os.getenv(f"LLM_CONTEXT_TOKEN_BUDGET_{agent_name.upper()}", LLM_CONTEXT_TOKEN_BUDGET))
+
+
+def _find_latest_question_index(
+    contents: list[types.Content], user_content: Optional[types.Content]
+) -> Optional[int]:
+    """현재 invocation의 사용자 질문 content 위치를 찾습니다. 없으면 마지막 user text content 입니다."""
+    question = user_content.parts[0].text if user_content and user_content.parts else None
+    fallback = None
+    for i in range(len(contents) - 1, -1, -1):
+        content = contents[i]
+        if content.role != "user" or not content.parts or not content.parts[0].text:
+            continue
+        if question is None or content.parts[0].text == question:
+            return i
+        if fallback is None:
+            fallback = i
+    return fallback
+
+
+def _call_keys(parts: list[types.Part], attribute: str) -> set[str]:
+    """function_call / function_response part들의 id 집합 (id가 없으면 함수 이름 사용)"""
+    return {
+        getattr(part, attribute).id or getattr(part, attribute).name
+        for part in parts
+        if getattr(part, attribute)
+    }
+
+
+def _group_droppable_units(contents: list[types.Content], protected: set[int]) -> list[list[int]]:
+    """
+    제거 가능한 contents를 제거 단위로 묶습니다.
+    function_call content는 바로 뒤 content가 같은 id의 function_response일 때만 그 content와 한 단위입니다.
+    (응답이 아직 없거나 이미 제거된 call은 단독 단위)
+    """
+    units = []
+    i = 0
+    while i < len(contents):
+        unit = [i]
+        call_keys = _call_keys(contents[i].parts or [], "function_call")
+        if call_keys and i + 1 < len(contents):
+            response_keys = _call_keys(contents[i + 1].parts or [], "function_response")
+            if response_keys and response_keys == call_keys:
+                unit.append(i + 1)
+        i = unit[-1] + 1
+        if not protected.intersection(unit):
+            units.append(unit)
+    return units
+
+
+@traced("callback.before_model.context_budget")
+def context_budget_before_model_callback(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """
+    before_model_callback to keep llm_request.contents within the agent's token budget.
+    RAG 문서를 contents에 추가하는 callback이 있으면 그 뒤에 배치해야 추가된 문서도 예산에 포함됩니다.
+
+    Returns:
+        Optional[LlmResponse]: 항상 None (요청만 수정)
+    """
+    budget = _get_token_budget(callback_context.agent_name)
+    contents = llm_request.contents
+    if budget <= 0 or not contents:
+        return None
+
+    system_instruction = llm_request.config.system_instruction if llm_request.config else None
+    system_tokens = estimate_tokens(system_instruction) if isinstance(system_instruction, str) else 0
+    content_tokens = [estimate_content_tokens(content) for content in contents]
+    total_tokens = system_tokens + sum(content_tokens)
+    if total_tokens <= budget:
+        return None
+
+    protected = set(range(max(0, len(contents) - LLM_CONTEXT_KEEP_RECENT_CONTENTS), len(contents)))
+    question_index = _find_latest_question_index(contents, callback_context.user_content)
+    if question_index is not None:
+        protected.add(question_index)
+
+    dropped: set[int] = set()
+    remaining_tokens = total_tokens
+    for unit in _group_droppable_units(contents, protected):
+        if remaining_tokens <= budget:
+            break
+        dropped.update(unit)
+        remaining_tokens -= sum(content_tokens[i] for i in unit)
+
+    if not dropped:
+        logging.info(
+            f"[ContextBudget] {callback_context.agent_name}: {total_tokens} tokens > budget {budget}, 제거 가능한 contents 없음"
+        )
+        return None
+
+    dropped_tokens = total_tokens - remaining_tokens
+    summary = types.Content(
+        role="user",
+        parts=[
+            types.Part(
+                text=f"[Context] {len(dropped)} earlier messages (~{dropped_tokens} tokens) were omitted to fit the context budget."
+            )
+        ],
+    )
+    first_dropped = min(dropped)
+    new_contents = []
+    for i, content in enumerate(contents):
+        if i == first_dropped:
+            new_contents.append(summary)
+        if i not in dropped:
+            new_contents.append(content)
+    llm_request.contents = new_contents
+
+    logging.info(
+        f"[ContextBudget] {callback_context.agent_name}: {total_tokens} -> {remaining_tokens} tokens "
+        f"(saved {dropped_tokens}, budget {budget}, dropped {len(dropped)}/{len(contents)} contents)"
+    )
+    return None
@@ -1,30 +1,38 @@
 from base64 import b64decode
+import asyncio
 import io
 import json
 import logging
 import os
-from copy import deepcopy
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, Optional, List
+from typing import TYPE_CHECKING, Any, Dict, Optional, List
 from dateutil.tz import tzlocal
 
 import google.genai.types as types
-import pandas as pd
 from google.adk.agents.callback_context import CallbackContext 
 from google.adk.models import LlmRequest, LlmResponse
 from google.adk.tools.base_tool import BaseTool 
 from google.adk.tools.tool_context import ToolContext 
-from mcp import types as mcp_types
-from mcp import ClientSession
-from mcp.client.sse import sse_client
-from mcp.types import CallToolResult
 
 from agents.custom_types.tool_response import ToolResponse, ToolResponseData
 from ..constants import NUM_OF_DISPLAYED_DATA
+from .log_utils import span, traced
+from .mcp_session_utils import get_mcp_session_pool
 from .state_manager_utils import add_artifact_to_state, get_all_states
+from .table_format_utils import (
+    TABLE_ARTIFACT_COMPRESSION,
+    TABLE_ARTIFACT_FORMAT,
+    encode_table,
+)
 from ..constants import ARTIFACT_STATES, NUM_OF_DISPLAYED_DATA
 
+# pandas, mcp는 import 비용이 크므로 실제로 사용하는 함수 안에서 import
+if TYPE_CHECKING:
+    import pandas as pd
+    from mcp import types as mcp_types
+    from mcp.types import CallToolResult
+
 
 class BeforeModelCallbackState(Enum):
     START_QUERY_IMG_SIMILARITY = 0
@@ -37,8 +45,8 @@ mime_lookup_for_tool = {
 }
 
 def make_subset_data(
-    total_count: int, data_df: pd.DataFrame
-) -> tuple[pd.DataFrame, dict]:
+    total_count: int, data_df: "pd.DataFrame"
+) -> tuple["pd.DataFrame", dict]:
     """
     function to extract only a few pieces of data from the dataframe
 
@@ -92,9 +100,10 @@ def make_artifact_structure_for_xlsx(tool_response: dict) -> types.Part:
 
 async def get_content_from_rag_server(
     url:str,
-) -> tuple[mcp_types.BlobResourceContents, dict]:
+) -> tuple["mcp_types.BlobResourceContents", dict]:
     """
     function to get contents from rag server
+    process 전체에서 공유하는 MCP session pool을 사용하므로 연결 / initialize() 없이 요청 한 번으로 읽습니다.
 
     Args:
         url: URI information of data to be read from the RAG server
@@ -107,25 +116,96 @@ async def get_content_from_rag_server(
     part0 = None
     ret_dict = None
     try:
-        async with sse_client(url=os.getenv("SQL_GENERATION_TOOL")) as streams:
-            async with ClientSession(*streams) as session:
-                await session.initialize()
-                rr: mcp_types.ReadResourceResult - await session.read_resource(url)
-                if not rr.contents:
-                    ret_dict = {
-                        "status": "error",
-                        "reason": f"No content for resource: {url}",
-                    }
-                else:
-                    part0 = rr.contents[0]
+        rr = await get_mcp_session_pool().read_resource(url)
+        if not rr.contents:
+            ret_dict = {
+                "status": "error",
+                "reason": f"No content for resource: {url}",
+            }
+        else:
+            part0 = rr.contents[0]
     except Exception as e:
         ret_dict = {"status": "error", "reason": f"resources.read 실패: {e}"}
     return part0, ret_dict
 
+async def get_contents_from_rag_server(
+    urls: list[str],
+) -> list[tuple["mcp_types.BlobResourceContents", dict]]:
+    """
+    function to get several contents from rag server over one session
+
+    Args:
+        urls: URI list of data to be read from the RAG server
+
+    Returns:
+        list[tuple]: (content, return dict) for each url, in the same order as get_content_from_rag_server
+    """
+
+    ret = []
+    for url, rr in zip(urls, await get_mcp_session_pool().read_resources(urls)):
+        if isinstance(rr, Exception):
+            ret.append((None, {"status": "error", "reason": f"resources.read 실패: {rr}"}))
+        elif not rr.contents:
+            ret.append((None, {"status": "error", "reason": f"No content for resource: {url}"}))
+        else:
+            ret.append((rr.contents[0], None))
+    return ret
+
+async def save_table_artifact(
+    context: ToolContext | CallbackContext,
+    data: bytes,
+    data_length: int,
+    sql_query: Optional[str] = None,
+    table_format: str = TABLE_ARTIFACT_FORMAT,
+    compression: Optional[str] = TABLE_ARTIFACT_COMPRESSION,
+) -> str:
+    """
+    function to save table data as artifact and register it to artifact states
+
+    Args:
+        context: tool or callback context used to save the artifact
+        data: encoded table data (utf-8-sig CSV bytes)
+        data_length: number of records in the table
+        sql_query: SQL statement that produced the table
+        table_format: artifact format ("csv", "parquet", "arrow")
+        compression: artifact compression ("none", "gzip", "zstd")
+
+    Returns:
+        str: saved artifact file name
+    """
+
+    with span("artifact.encode", format=table_format, compression=compression):
+        # Parquet / Arrow 변환과 압축은 결과가 크면 오래 걸리므로 event loop를 막지 않도록 thread에서 실행
+        encoded = await asyncio.to_thread(encode_table, data, table_format=table_format, compression=compression)
+    artifact_to_save = types.Part(
+        inline_data=types.Blob(mime_type=encoded.mime_type, data=encoded.data)
+    )
+    now = datetime.now(tzlocal())
+    file_name = f'output_data_{now.strftime("%Y%m%d_%H%M%S")}{encoded.extension}'
+    async with span("artifact.save", bytes=len(encoded.data)):
+        version = await context.save_artifact(filename=file_name, artifact=artifact_to_save)
+
+    add_artifact_to_state(
+        artifact_type="table",
+        context=context,
+        filename=file_name,
+        mime_type=encoded.mime_type,
+        data_length=data_length,
+        sql_query=sql_query,
+        table_format=encoded.format,
+        compression=encoded.compression,
+    )
+
+    states = context.state.get(ARTIFACT_STATES, {})
+    logging.info(f"[STATE] DATA_SEARCH_AGENT - 개수: {len(states)}, 키: {list(states.keys())}, 상태: {get_all_states(context)}")
+    logging.debug(f"[Artifact] {file_name}: {len(data)=} -> {len(encoded.data)=}")
+    return file_name
+
+@traced("callback.after_tool.save_file_artifact")
 async def save_file_artifact_after_tool_callback(
     tool: BaseTool,
     args: Dict[str, Any],
-    tool_response: CallToolResult,
+    tool_response: "CallToolResult",
     tool_context: ToolContext,
 ) -> Dict:
     """
@@ -159,38 +239,38 @@ async def save_file_artifact_after_tool_callback(
 
     logging.debug(f"file_mime_type: {file_mime_type}")
 
-    if tool_response.get("data", None) is not None:
-        tool_response_data = tool_response.get("data")
-        if tool_response_data.get("type", None) is None:
-            raise ValueError(f"Tool response data must have 'type' property: {tool_response_data}")
+    # 오류 응답(query guard 거부, statement_timeout 등)은 agent가 SQL을 수정할 수 있도록 그대로 전달
+    if tool_response.get("status") == "error":
+        logging.info(f"[Callback] Error response from '{tool_name}', nothing to save")
+        return None
+
+    tool_response_data = tool_response.get("data", None)
+    if isinstance(tool_response_data, dict) and tool_response_data.get("type", None) is not None:
         tool_response_data_type = tool_response_data.get("type")
         if tool_response_data_type == "csv_table":
-            table_content = tool_response_data.get("content", None).get("records", [])
+            table_content = tool_response_data.get("content", None)
             if table_content is None:
                 raise ValueError(f"Tool response data empty: {table_content=}")
-            
-            data_df = pd.DataFrame.from_records(table_content)
+
+            # query_bga_database: tool 실행 중 이미 artifact로 저장됨 (결과 캐시 bytes 재사용)
+            if table_content.get("artifact") is not None:
+                total_count = table_content.get("row_count", 0)
+                return ToolResponse(status="success", message=f"Query successfully executed. Resulting {total_count} records stored in states. Notice user to check the attachment files.").to_json()
+
+            import pandas as pd
+
+            data_df = pd.DataFrame.from_records(table_content.get("records", []))
             text_data = data_df.to_csv(index=False, encoding="utf-8-sig")
             csv_bytes = text_data.encode(encoding="utf-8-sig")
-
-            csv_artifact = types.Part(inline_data=types.Blob(mime_type="text/csv", data=csv_bytes))
-            now = datetime.now(tzlocal())
-            file_name = f'output_data_{now.strftime("%Y%m%d_%H%M%S")}.csv'
-            version = await tool_context.save_artifact(filename=file_name, artifact=csv_artifact)
             total_count = len(data_df)
 
-            artifact = add_artifact_to_state(
-                artifact_type="table",
-                context=tool_context,
-                filename=file_name,
-                mime_type="text/csv",
-                data_length = total_count,
-                sql_query = args.get("sql_queery")
+            await save_table_artifact(
+                tool_context,
+                csv_bytes,
+                data_length=total_count,
+                sql_query=args.get("generated_sql"),
             )
 
-            states = tool_context.state.get(ARTIFACT_STATES, {})
-            logging.info(f"[STATE] DATA_SEARCH_AGENT - 개수: {len(states)}, 키: {list(states.keys())}, 상태: {get_all_states(tool_context)}")
-
             return ToolResponse(status="success", message=f"Query successfully executed. Resulting {total_count} records stored in states. Notice user to check the attachment files.").to_json()
 
     if tool_name == "generate_chart_from_data":
@@ -267,6 +347,7 @@ async def save_file_artifact_after_tool_callback(
 
 
 
+@traced("callback.before_agent.save_imgfile_artifact")
 async def save_imgfile_artifact_before_agent_callback(
     callback_context: CallbackContext,
 ) -> Optional[types.Content]:
@@ -320,12 +401,15 @@ async def save_imgfile_artifact_before_agent_callback(
         return types.Content(parts=[types.Part(text.error_message)])
 
 
+@traced("callback.before_model.remove_non_text_part")
 def remove_non_text_part_from_llmrequest_before_model_callback(
     callback_context: CallbackContext, llm_request: LlmRequest
 ) -> Optional[LlmResponse]:
 
     """
     before_model_callback to reduce size of the llm_request.contents and remove inline_data in content.part.
+    llm_request.contents는 model 호출마다 session event로부터 새로 만들어지는 객체이므로 복사 없이 직접 수정하며,
+    inline_data가 있는 content의 parts만 다시 구성합니다.
 
     Args:
         llm_request: provides an interface that users use to request natural language processing tasks.
@@ -341,24 +425,20 @@ def remove_non_text_part_from_llmrequest_before_model_callback(
     logging.debug(
         f"Entering Agent: {callback_context.agent_name} (Inv: {callback_context.invocation_id})"
     )
-    logging.debug(f"Contents of the Original LLM Request: {llm_request.contents}")
 
-    new_contents: list[types.Content] = []
+    num_of_removed_parts = 0
+    num_of_pruned_contents = 0
     for content in llm_request.contents:
-        new_content = deepcopy(content)
-
-        parts_without_inline_data = list(
-            filter(
-                lambda part: getattr(part, "inline_data", None) == None, content.parts
-            )
-        )
-
-        logging.debug(f"{parts_without_inline_data}")
-        new_content.parts = parts_without_inline_data
-        new_contents.append(new_content)
+        parts = content.parts
+        if not parts or all(getattr(part, "inline_data", None) is None for part in parts):
+            continue
 
-    llm_request.contents = new_contents
+        content.parts = [part for part in parts if getattr(part, "inline_data", None) is None]
+        num_of_removed_parts += len(parts) - len(content.parts)
+        num_of_pruned_contents += 1
 
-    logging.debug(f"Modified llm_request.contents : '{llm_request.contents}'")
+    logging.debug(
+        f"Pruned llm_request.contents: {len(llm_request.contents)=} {num_of_pruned_contents=} {num_of_removed_parts=}"
+    )
 
-    return None
\ No newline at end of file
+    return None
@@ -0,0 +1,271 @@
+"""
+LLM 응답 디스크 캐시
+output_schema가 고정된 agent(column_name_extractor 등)는 같은 instruction / 같은 질문에 대해 사실상 같은 응답을 내므로,
+before_model_callback에서 캐시된 응답을 반환하여 모델 호출을 건너뜁니다.
+- 사용할 agent는 LLM_RESPONSE_CACHE_AGENTS(콤마 구분 agent 이름)로 지정합니다. (기본값: 사용 안 함)
+- key는 (모델, system instruction, context 예산 적용 후 contents, response schema)의 sha256 입니다.
+  function call id처럼 요청마다 바뀌는 값은 key에서 제외합니다.
+- 저장소는 여러 worker 프로세스가 공유하는 sqlite 파일이며, TTL과 개수 / 크기 제한을 넘으면 오래 사용하지 않은 응답부터 삭제합니다.
+- sqlite I/O(다른 프로세스의 lock 대기 포함)는 event loop를 막지 않도록 thread에서 실행합니다.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Optional
+
+import google.genai.types as types
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from pydantic import BaseModel, ValidationError
+
+from .log_utils import traced
+
+LLM_RESPONSE_CACHE_AGENTS = {
+    name.strip() for name in os.getenv("LLM_RESPONSE_CACHE_AGENTS", "").split(",") if name.strip()
+}
+LLM_RESPONSE_CACHE_DIR = os.getenv(
+    "LLM_RESPONSE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "bga_llm_response_cache")
+)
+LLM_RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("LLM_RESPONSE_CACHE_TTL_SECONDS", "604800"))
+LLM_RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("LLM_RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+LLM_RESPONSE_CACHE_MAX_BYTES = int(os.getenv("LLM_RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+def _canonical_part(part: types.Part) -> Optional[dict]:
+    if part.text is not None:
+        return {"text": part.text}
+    if part.function_call:
+        return {"function_call": part.function_call.name, "args": part.function_call.args}
+    if part.function_response:
+        return {"function_response": part.function_response.name, "response": part.function_response.response}
+    return None
+
+
+def _canonical_schema(schema) -> Optional[dict | str]:
+    if schema is None:
+        return None
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        return schema.model_json_schema()
+    if isinstance(schema, BaseModel):
+        return schema.model_dump(mode="json", exclude_none=True)
+    return str(schema)
+
+
+def build_cache_key(llm_request: LlmRequest) -> str:
+    """
+    LLM 요청의 캐시 key를 만듭니다.
+
+    Args:
+        llm_request: context 예산 등 다른 before_model_callback이 적용된 요청
+
+    Returns:
+        str: (모델, system instruction, contents, response schema)의 sha256 hex digest
+    """
+    config = llm_request.config
+    contents = [
+        {"role": content.role, "parts": [_canonical_part(part) for part in content.parts or []]}
+        for content in llm_request.contents or []
+    ]
+    payload = {
+        "model": llm_request.model,
+        "instruction": config.system_instruction if config and isinstance(config.system_instruction, str) else None,
+        "contents": contents,
+        "schema": _canonical_schema(config.response_schema) if config else None,
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LlmResponseCache:
+    """
+    key -> 응답 content(JSON) sqlite 저장소
+    조회 시 마지막 사용 시각을 갱신하고, 저장 시 만료된 응답과 개수 / 크기 제한을 넘는 오래된 응답을 삭제합니다.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = LLM_RESPONSE_CACHE_DIR,
+        ttl_seconds: float = LLM_RESPONSE_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes: int = LLM_RESPONSE_CACHE_MAX_BYTES,
+    ):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._conn = sqlite3.connect(
+                os.path.join(self.cache_dir, "llm_responses.sqlite"),
+                timeout=30,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, agent TEXT NOT NULL, response TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        return self._conn
+
+    def get(self, key: str) -> Optional[types.Content]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND created_at >= ?", (key, now - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return types.Content.model_validate_json(row[0])
+
+    def put(self, key: str, agent_name: str, content: types.Content) -> None:
+        response = content.model_dump_json(exclude_none=True)
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, agent, response, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, agent_name, response, size, now, now),
+                )
+                conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+                count, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+                if count > self.max_entries or total_bytes > self.max_bytes:
+                    # 최근 사용 순으로 개수 / 크기 제한 안에 들어가는 응답만 남기고 한 번에 삭제
+                    evicted = conn.execute(
+                        "DELETE FROM responses WHERE key IN ("
+                        "SELECT key FROM ("
+                        "SELECT key, ROW_NUMBER() OVER newest AS newer_count, SUM(size) OVER newest AS newer_bytes "
+                        "FROM responses WINDOW newest AS (ORDER BY accessed_at DESC, key ROWS UNBOUNDED PRECEDING)"
+                        ") WHERE newer_count > ? OR newer_bytes > ?)",
+                        (self.max_entries, self.max_bytes),
+                    ).rowcount
+                    logging.info(f"[LlmResponseCache] 제한 초과로 {evicted}개 응답 삭제")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    async def aget(self, key: str) -> Optional[types.Content]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, agent_name: str, content: types.Content) -> None:
+        await asyncio.to_thread(self.put, key, agent_name, content)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+LLM_RESPONSE_CACHE = LlmResponseCache()
+
+# before_model_callback에서 계산한 (key, response schema)를 after_model_callback에서 사용
+# (응답이 오지 않은 항목이 쌓이지 않도록 개수 제한)
+_pending_keys: dict[tuple[str, str], tuple[str, object]] = {}
+_PENDING_KEYS_MAX_ENTRIES = 4096
+
+
+def _is_valid_response(response_schema, content: types.Content) -> bool:
+    """response schema가 pydantic model이면 응답 text가 schema에 맞는 경우에만 저장합니다."""
+    text = "".join(part.text or "" for part in content.parts or [])
+    if not text:
+        return False
+    if isinstance(response_schema, type) and issubclass(response_schema, BaseModel):
+        try:
+            response_schema.model_validate_json(text)
+        except ValidationError:
+            return False
+    return True
+
+
+@traced("callback.before_model.llm_response_cache")
+async def llm_response_cache_before_model_callback(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """
+    before_model_callback to return a cached response for agents listed in LLM_RESPONSE_CACHE_AGENTS.
+    key에 최종 contents가 포함되도록 context_budget_before_model_callback 뒤, trace_llm_before_model_callback 앞에 배치합니다.
+
+    Returns:
+        Optional[LlmResponse]: 캐시된 응답, 없으면 None (모델 호출)
+    """
+    agent_name = callback_context.agent_name
+    if agent_name not in LLM_RESPONSE_CACHE_AGENTS:
+        return None
+
+    key = build_cache_key(llm_request)
+    try:
+        content = await LLM_RESPONSE_CACHE.aget(key)
+    except Exception as e:
+        logging.warning(f"[LlmResponseCache] 캐시 조회 실패: {e}")
+        return None
+
+    if content is not None:
+        logging.info(f"[LlmResponseCache] {agent_name}: 캐시된 응답 사용 (key={key[:12]})")
+        return LlmResponse(content=content)
+
+    while len(_pending_keys) >= _PENDING_KEYS_MAX_ENTRIES:
+        del _pending_keys[next(iter(_pending_keys))]
+    response_schema = llm_request.config.response_schema if llm_request.config else None
+    _pending_keys[(callback_context.invocation_id, agent_name)] = (key, response_schema)
+    return None
+
+
+async def llm_response_cache_after_model_callback(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> Optional[LlmResponse]:
+    """
+    after_model_callback to store the model response for agents listed in LLM_RESPONSE_CACHE_AGENTS.
+    오류 / partial 응답, schema에 맞지 않는 응답은 저장하지 않습니다.
+
+    Returns:
+        Optional[LlmResponse]: 항상 None (응답은 수정하지 않음)
+    """
+    pending = _pending_keys.pop((callback_context.invocation_id, callback_context.agent_name), None)
+    if pending is None:
+        return None
+    key, response_schema = pending
+    content = llm_response.content
+    if (
+        llm_response.error_code
+        or llm_response.partial
+        or content is None
+        or not _is_valid_response(response_schema, content)
+    ):
+        return None
+
+    try:
+        await LLM_RESPONSE_CACHE.aput(key, callback_context.agent_name, content)
+    except Exception as e:
+        logging.warning(f"[LlmResponseCache] 캐시 저장 실패: {e}")
+    return None
@@ -0,0 +1,351 @@
+"""
+pipeline 단계별 latency tracing / metrics
+- span: 단계 하나의 실행 시간을 측정하여 단계별 histogram에 기록하고, invocation_id와 함께 log로 남깁니다.
+- invocation_id는 contextvar로 전달되므로 callback 안에서 호출한 함수나 생성한 task의 span에도 같은 id가 붙습니다.
+- metrics는 Prometheus text format으로 HTTP endpoint(METRICS_EXPORT_PORT) 또는 파일(METRICS_EXPORT_PATH)로 내보냅니다.
+  (agent module import 시 시작은 METRICS_EXPORTER_AUTOSTART=true 일 때만)
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# 0이면 HTTP endpoint를 열지 않음
+METRICS_EXPORT_PORT = int(os.getenv("METRICS_EXPORT_PORT", "0"))
+# 비어 있으면 파일로 내보내지 않음
+METRICS_EXPORT_PATH = os.getenv("METRICS_EXPORT_PATH", "")
+METRICS_EXPORT_INTERVAL_SECONDS = float(os.getenv("METRICS_EXPORT_INTERVAL_SECONDS", "15"))
+# true이면 agent module import 시 exporter를 시작 (server process에서만 켜고, 테스트 / benchmark에서는 끔)
+METRICS_EXPORTER_AUTOSTART = os.getenv("METRICS_EXPORTER_AUTOSTART", "false").lower() == "true"
+# 이 시간 이상 걸린 span은 INFO로 기록 (그 외는 DEBUG)
+TRACE_SLOW_SPAN_MS = float(os.getenv("TRACE_SLOW_SPAN_MS", "1000"))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+INVOCATION_ID: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("invocation_id", default=None)
+_CURRENT_SPAN: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_span", default=None)
+
+
+def bind_invocation_id(invocation_id: Optional[str]) -> Optional[contextvars.Token]:
+    """
+    현재 context(및 이후 생성되는 task)의 span에 붙일 invocation_id를 설정합니다.
+    호출한 쪽의 context에 남지 않도록, 반환된 token을 작업이 끝난 뒤 reset_invocation_id로 되돌려야 합니다.
+    """
+    if invocation_id and INVOCATION_ID.get() != invocation_id:
+        return INVOCATION_ID.set(invocation_id)
+    return None
+
+
+def reset_invocation_id(token: Optional[contextvars.Token]) -> None:
+    """bind_invocation_id 이전의 invocation_id로 되돌립니다."""
+    if token is None:
+        return
+    try:
+        INVOCATION_ID.reset(token)
+    except ValueError:
+        # 다른 context에서 종료된 경우
+        pass
+
+
+class InvocationIdFilter(logging.Filter):
+    """log record에 invocation_id 속성을 추가합니다. (format 예: "%(invocation_id)s %(message)s")"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.invocation_id = INVOCATION_ID.get() or "-"
+        return True
+
+
+class Histogram:
+    """누적 bucket histogram (Prometheus histogram과 같은 구조)"""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """bucket 상한 기준 근사 분위수"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for upper, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return upper
+        return float("inf")
+
+
+class MetricsRegistry:
+    """단계(stage)별 latency histogram과 오류 수"""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms: dict[str, Histogram] = {}
+        self._errors: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            if error:
+                self._errors[stage] = self._errors.get(stage, 0) + 1
+
+    def summary(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                stage: {
+                    "count": histogram.count,
+                    "mean_ms": histogram.sum / histogram.count * 1000 if histogram.count else 0.0,
+                    "p50_ms": histogram.quantile(0.5) * 1000,
+                    "p95_ms": histogram.quantile(0.95) * 1000,
+                    "errors": self._errors.get(stage, 0),
+                }
+                for stage, histogram in sorted(self._histograms.items())
+            }
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        lines = [
+            "# HELP bga_stage_duration_seconds Latency of each agent pipeline stage.",
+            "# TYPE bga_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for upper, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'bga_stage_duration_seconds_bucket{{stage="{stage}",le="{upper}"}} {cumulative}')
+                lines.append(f'bga_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'bga_stage_duration_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+                lines.append(f'bga_stage_duration_seconds_count{{stage="{stage}"}} {histogram.count}')
+            lines.append("# HELP bga_stage_errors_total Number of stage executions that raised an exception.")
+            lines.append("# TYPE bga_stage_errors_total counter")
+            for stage, count in sorted(self._errors.items()):
+                lines.append(f'bga_stage_errors_total{{stage="{stage}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._errors.clear()
+
+
+METRICS = MetricsRegistry()
+
+
+class span:
+    """
+    단계 하나의 실행 시간을 측정합니다. with / async with 모두 사용할 수 있습니다.
+
+    Args:
+        stage: histogram 이름으로 사용할 단계명 (예: "rag.embedding", "sql.execute")
+        **attributes: log에 함께 남길 값
+    """
+
+    def __init__(self, stage: str, **attributes):
+        self.stage = stage
+        self.attributes = attributes
+        self._start = 0.0
+        self._token = None
+
+    def __enter__(self) -> "span":
+        self._token = _CURRENT_SPAN.set(self.stage)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = time.perf_counter() - self._start
+        parent = None
+        if self._token is not None:
+            parent = self._token.old_value if self._token.old_value is not contextvars.Token.MISSING else None
+            try:
+                _CURRENT_SPAN.reset(self._token)
+            except ValueError:
+                # 다른 context(예: generator가 다른 task에서 재개)에서 종료된 경우
+                pass
+        if not METRICS_ENABLED:
+            return
+
+        error = exc_type is not None and not issubclass(exc_type, (GeneratorExit, asyncio.CancelledError))
+        METRICS.observe(self.stage, elapsed, error=error)
+        elapsed_ms = elapsed * 1000
+        level = logging.INFO if elapsed_ms >= TRACE_SLOW_SPAN_MS else logging.DEBUG
+        if logging.getLogger().isEnabledFor(level):
+            attributes = "".join(f" {key}={value}" for key, value in self.attributes.items())
+            logging.log(
+                level,
+                f"[Trace] invocation={INVOCATION_ID.get() or '-'} stage={self.stage} parent={parent or '-'} "
+                f"{elapsed_ms:.1f}ms{' error=' + exc_type.__name__ if error else ''}{attributes}",
+            )
+
+    async def __aenter__(self) -> "span":
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.__exit__(exc_type, exc, tb)
+
+
+def _find_invocation_id(args, kwargs) -> Optional[str]:
+    for value in (*args, *kwargs.values()):
+        invocation_id = getattr(value, "invocation_id", None)
+        if isinstance(invocation_id, str):
+            return invocation_id
+    return None
+
+
+def traced(stage: str) -> Callable:
+    """
+    함수 실행을 span으로 감싸는 decorator (sync / async 함수 모두 지원)
+    인자 중 invocation_id 속성이 있는 객체(CallbackContext, ToolContext 등)가 있으면 invocation_id를 설정합니다.
+    """
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                token = bind_invocation_id(_find_invocation_id(args, kwargs))
+                try:
+                    with span(stage):
+                        return await func(*args, **kwargs)
+                finally:
+                    reset_invocation_id(token)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = bind_invocation_id(_find_invocation_id(args, kwargs))
+            try:
+                with span(stage):
+                    return func(*args, **kwargs)
+            finally:
+                reset_invocation_id(token)
+
+        return wrapper
+
+    return decorator
+
+
+# LLM 호출 시작 시각: (invocation_id, agent_name) -> perf_counter
+# 오류 / 취소로 after_model_callback이 호출되지 않은 항목이 쌓이지 않도록 개수 제한
+_llm_call_starts: dict[tuple[str, str], float] = {}
+_LLM_CALL_STARTS_MAX_ENTRIES = 4096
+
+
+def trace_llm_before_model_callback(callback_context, llm_request) -> None:
+    """
+    before_model_callback to start timing the LLM call. before_model_callback 목록의 마지막에 배치합니다.
+    (LLM 호출 log에는 callback_context.invocation_id를 직접 사용하므로 contextvar는 설정하지 않음)
+    """
+    while len(_llm_call_starts) >= _LLM_CALL_STARTS_MAX_ENTRIES:
+        del _llm_call_starts[next(iter(_llm_call_starts))]
+    _llm_call_starts[(callback_context.invocation_id, callback_context.agent_name)] = time.perf_counter()
+    return None
+
+
+def trace_llm_after_model_callback(callback_context, llm_response) -> None:
+    """after_model_callback to record the LLM call latency as the "llm.<agent_name>" stage."""
+    start = _llm_call_starts.pop((callback_context.invocation_id, callback_context.agent_name), None)
+    if start is None or not METRICS_ENABLED:
+        return None
+
+    elapsed = time.perf_counter() - start
+    stage = f"llm.{callback_context.agent_name}"
+    error = bool(getattr(llm_response, "error_code", None))
+    METRICS.observe(stage, elapsed, error=error)
+    elapsed_ms = elapsed * 1000
+    usage = getattr(llm_response, "usage_metadata", None)
+    logging.log(
+        logging.INFO if elapsed_ms >= TRACE_SLOW_SPAN_MS else logging.DEBUG,
+        f"[Trace] invocation={callback_context.invocation_id} stage={stage} {elapsed_ms:.1f}ms"
+        f"{f' tokens={usage.total_token_count}' if usage else ''}",
+    )
+    return None
+
+
+def export_metrics_to_file(path: str = METRICS_EXPORT_PATH) -> None:
+    """metrics를 Prometheus text format으로 파일에 씁니다. (node_exporter textfile collector 용)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(METRICS.render_prometheus())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        body = METRICS.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        return
+
+
+_exporter_started = False
+_exporter_lock = threading.Lock()
+
+
+def start_metrics_exporter(
+    port: int = METRICS_EXPORT_PORT,
+    path: str = METRICS_EXPORT_PATH,
+    interval: float = METRICS_EXPORT_INTERVAL_SECONDS,
+) -> Optional[ThreadingHTTPServer]:
+    """
+    설정에 따라 /metrics HTTP endpoint와 주기적 파일 export를 daemon thread로 시작합니다.
+    process 당 한 번만 시작합니다.
+
+    Returns:
+        Optional[ThreadingHTTPServer]: HTTP endpoint를 연 경우 그 server
+    """
+    global _exporter_started
+
+    with _exporter_lock:
+        if _exporter_started or not METRICS_ENABLED:
+            return None
+        _exporter_started = True
+
+    server = None
+    if port:
+        server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        logging.info(f"[Metrics] Prometheus endpoint: http://0.0.0.0:{port}/metrics")
+
+    if path:
+
+        def export_loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    export_metrics_to_file(path)
+                except Exception as e:
+                    logging.warning(f"[Metrics] 파일 export 실패: {e}")
+
+        threading.Thread(target=export_loop, name="metrics-file", daemon=True).start()
+        logging.info(f"[Metrics] {interval}초마다 {path}에 export")
+    return server
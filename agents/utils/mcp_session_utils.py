@@ -0,0 +1,321 @@
+"""
+RAG 서버(MCP, SSE transport) session pool
+resource를 읽을 때마다 SSE 연결 / ClientSession 생성 / initialize() handshake를 반복하지 않도록
+process 전체에서 초기화된 session을 재사용합니다.
+- sse_client / ClientSession은 anyio task group 기반이라 연 task에서 닫아야 하므로, 연결마다 owner task가 연결을 유지합니다.
+- 일정 시간 사용하지 않은 session은 사용 전에 ping으로 확인하고, 끊긴 연결은 다시 연결합니다.
+- 동시 요청 수는 semaphore로 제한합니다.
+- 변하지 않는 resource(MCP_IMMUTABLE_URI_PREFIXES)는 개수 / 크기 제한이 있는 LRU 캐시에 저장합니다.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+
+from .log_utils import span
+
+# mcp는 import 비용이 크므로 연결을 만들 때 import
+if TYPE_CHECKING:
+    from mcp import ClientSession
+    from mcp import types as mcp_types
+
+MCP_SESSION_POOL_SIZE = int(os.getenv("MCP_SESSION_POOL_SIZE", "2"))
+MCP_MAX_CONCURRENT_REQUESTS = int(os.getenv("MCP_MAX_CONCURRENT_REQUESTS", "16"))
+# 마지막 사용 후 이 시간이 지난 session은 사용 전에 ping으로 상태 확인
+MCP_PING_INTERVAL_SECONDS = float(os.getenv("MCP_PING_INTERVAL_SECONDS", "30"))
+MCP_REQUEST_TIMEOUT_SECONDS = float(os.getenv("MCP_REQUEST_TIMEOUT_SECONDS", "30"))
+# 캐시할 resource URI prefix 목록 (콤마 구분), 비어 있으면 캐시하지 않음
+MCP_IMMUTABLE_URI_PREFIXES = [
+    prefix.strip() for prefix in os.getenv("MCP_IMMUTABLE_URI_PREFIXES", "").split(",") if prefix.strip()
+]
+MCP_RESOURCE_CACHE_MAX_ENTRIES = int(os.getenv("MCP_RESOURCE_CACHE_MAX_ENTRIES", "256"))
+MCP_RESOURCE_CACHE_MAX_BYTES = int(os.getenv("MCP_RESOURCE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+def _estimate_result_bytes(result: "mcp_types.ReadResourceResult") -> int:
+    size = 0
+    for content in result.contents:
+        size += len(getattr(content, "blob", None) or getattr(content, "text", None) or "")
+    return size
+
+
+class McpResourceCache:
+    """resource URI -> ReadResourceResult LRU 캐시 (개수 / 크기 제한)"""
+
+    def __init__(
+        self,
+        max_entries: int = MCP_RESOURCE_CACHE_MAX_ENTRIES,
+        max_bytes: int = MCP_RESOURCE_CACHE_MAX_BYTES,
+        immutable_prefixes: Optional[list[str]] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.immutable_prefixes = MCP_IMMUTABLE_URI_PREFIXES if immutable_prefixes is None else immutable_prefixes
+        self._entries: OrderedDict[str, tuple["mcp_types.ReadResourceResult", int]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def is_cacheable(self, uri: str) -> bool:
+        return any(uri.startswith(prefix) for prefix in self.immutable_prefixes)
+
+    def get(self, uri: str) -> Optional["mcp_types.ReadResourceResult"]:
+        if not self.is_cacheable(uri):
+            return None
+        entry = self._entries.get(uri)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(uri)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, uri: str, result: "mcp_types.ReadResourceResult") -> None:
+        if not self.is_cacheable(uri):
+            return
+        size = _estimate_result_bytes(result)
+        if size > self.max_bytes:
+            return
+        if uri in self._entries:
+            self._bytes -= self._entries.pop(uri)[1]
+        self._entries[uri] = (result, size)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+class _McpConnection:
+    """owner task 안에서 SSE 연결과 초기화된 ClientSession을 유지하는 연결 하나"""
+
+    def __init__(self, server_url: str):
+        self.server_url = server_url
+        self.session: Optional["ClientSession"] = None
+        self.last_used = 0.0
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._error: Optional[BaseException] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        try:
+            # SSE 연결 / initialize()가 응답하지 않으면 호출한 쪽이 무한히 기다리지 않도록 제한
+            await asyncio.wait_for(self._ready.wait(), timeout=MCP_REQUEST_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            raise ConnectionError(
+                f"MCP 서버 연결 시간 초과 ({MCP_REQUEST_TIMEOUT_SECONDS}s): {self.server_url}"
+            ) from None
+        if not self.alive:
+            raise ConnectionError(f"MCP 서버 연결 실패: {self.server_url}: {self._error}")
+        self.last_used = time.monotonic()
+
+    async def _run(self) -> None:
+        from mcp import ClientSession
+        from mcp.client.sse import sse_client
+
+        try:
+            async with sse_client(url=self.server_url) as streams:
+                async with ClientSession(*streams) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._closing.wait()
+        except Exception as e:
+            self._error = e
+            logging.info(f"[McpSessionPool] 연결 종료: {e}")
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def ping(self) -> bool:
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout=MCP_REQUEST_TIMEOUT_SECONDS)
+        except Exception as e:
+            logging.info(f"[McpSessionPool] ping 실패: {e}")
+            return False
+        self.last_used = time.monotonic()
+        return True
+
+    async def close(self) -> None:
+        self._closing.set()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def cancel(self) -> None:
+        """실행 중이 아닌 event loop에 남은 연결의 owner task를 취소합니다. (loop가 다시 실행되면 정리됨)"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+
+class McpSessionPool:
+    """
+    MCP 서버 하나에 대한 session pool
+    연결은 처음 필요할 때 만들고, 요청은 연결들에 round-robin으로 분배합니다.
+    ClientSession은 request id로 응답을 구분하므로 한 session에서 여러 요청을 동시에 보낼 수 있습니다.
+    """
+
+    def __init__(
+        self,
+        server_url: str,
+        size: int = MCP_SESSION_POOL_SIZE,
+        max_concurrent_requests: int = MCP_MAX_CONCURRENT_REQUESTS,
+        cache: Optional[McpResourceCache] = None,
+    ):
+        self.server_url = server_url
+        self.cache = cache or McpResourceCache()
+        self._connections: list[Optional[_McpConnection]] = [None] * max(1, size)
+        self._next = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent_requests)
+        self._locks = [asyncio.Lock() for _ in self._connections]
+
+    async def _acquire_connection(self, reconnect: bool = False) -> _McpConnection:
+        """round-robin으로 연결을 고르고, 끊겼거나 ping에 실패하면 다시 연결합니다."""
+        index = self._next
+        self._next = (self._next + 1) % len(self._connections)
+        async with self._locks[index]:
+            connection = self._connections[index]
+            if connection is not None and not reconnect and connection.alive:
+                idle = time.monotonic() - connection.last_used
+                if idle < MCP_PING_INTERVAL_SECONDS or await connection.ping():
+                    return connection
+
+            if connection is not None:
+                await connection.close()
+            connection = _McpConnection(self.server_url)
+            self._connections[index] = connection
+            await connection.start()
+            logging.info(f"[McpSessionPool] 연결 {index} 초기화 완료: {self.server_url}")
+            return connection
+
+    async def _read(self, connection: _McpConnection, uri: str) -> "mcp_types.ReadResourceResult":
+        from pydantic import AnyUrl
+
+        async with self._semaphore, span("mcp.read_resource"):
+            result = await asyncio.wait_for(
+                connection.session.read_resource(AnyUrl(uri)), timeout=MCP_REQUEST_TIMEOUT_SECONDS
+            )
+        connection.last_used = time.monotonic()
+        self.cache.put(uri, result)
+        return result
+
+    async def read_resource(self, uri: str) -> "mcp_types.ReadResourceResult":
+        """
+        resource 하나를 읽습니다. 연결이 끊겨 실패한 경우 한 번 다시 연결하여 재시도합니다.
+
+        Args:
+            uri: 읽을 resource URI
+
+        Returns:
+            mcp_types.ReadResourceResult: resource 읽기 결과
+        """
+        cached = self.cache.get(uri)
+        if cached is not None:
+            return cached
+
+        connection = await self._acquire_connection()
+        try:
+            return await self._read(connection, uri)
+        except Exception as e:
+            if connection.alive:
+                raise
+            logging.info(f"[McpSessionPool] 연결이 끊겨 재시도: {e}")
+        return await self._read(await self._acquire_connection(reconnect=True), uri)
+
+    async def read_resources(self, uris: list[str]) -> list["mcp_types.ReadResourceResult | Exception"]:
+        """
+        여러 resource를 한 session에서 동시에 읽습니다.
+        결과는 uris 순서이며, 실패한 resource는 예외 객체로 반환합니다.
+        """
+        results: list = [self.cache.get(uri) for uri in uris]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+
+        connection = await self._acquire_connection()
+        responses = await asyncio.gather(
+            *(self._read(connection, uris[i]) for i in pending), return_exceptions=True
+        )
+        if not connection.alive and any(isinstance(response, Exception) for response in responses):
+            connection = await self._acquire_connection(reconnect=True)
+            retry = [j for j, response in enumerate(responses) if isinstance(response, Exception)]
+            retried = await asyncio.gather(
+                *(self._read(connection, uris[pending[j]]) for j in retry), return_exceptions=True
+            )
+            for j, response in zip(retry, retried):
+                responses[j] = response
+
+        for i, response in zip(pending, responses):
+            results[i] = response
+        return results
+
+    async def close(self) -> None:
+        connections = [connection for connection in self._connections if connection is not None]
+        self._connections = [None] * len(self._connections)
+        await asyncio.gather(*(connection.close() for connection in connections), return_exceptions=True)
+
+    def cancel(self) -> None:
+        """다른 event loop에서 만든 pool의 연결을 현재 loop에서 await 하지 않고 취소합니다."""
+        connections = [connection for connection in self._connections if connection is not None]
+        self._connections = [None] * len(self._connections)
+        for connection in connections:
+            connection.cancel()
+
+
+_pools: dict[str, McpSessionPool] = {}
+_pools_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _release_stale_pools(pools: list[McpSessionPool], loop: asyncio.AbstractEventLoop) -> None:
+    """
+    event loop가 바뀌어 더 이상 사용하지 않는 pool의 연결을 정리합니다.
+    연결은 이전 loop에 묶여 있으므로 그 loop에서 닫습니다.
+    - 이전 loop가 다른 thread에서 실행 중: 그 loop에서 close()
+    - 실행 중이 아님: owner task 취소 (loop가 닫혔다면 task와 연결도 이미 종료됨)
+    """
+    if not pools or loop is None or loop.is_closed():
+        return
+    if loop.is_running():
+        for pool in pools:
+            asyncio.run_coroutine_threadsafe(pool.close(), loop)
+    else:
+        for pool in pools:
+            pool.cancel()
+    logging.info(f"[McpSessionPool] event loop 변경으로 이전 pool {len(pools)}개 정리")
+
+
+def get_mcp_session_pool(server_url: Optional[str] = None) -> McpSessionPool:
+    """
+    server_url(기본값 SQL_GENERATION_TOOL)에 대한 process 전체 session pool을 반환합니다.
+    연결은 event loop에 묶이므로, event loop가 바뀌면 pool을 새로 만듭니다.
+    """
+    global _pools_loop
+
+    server_url = server_url or os.getenv("SQL_GENERATION_TOOL")
+    loop = asyncio.get_running_loop()
+    if loop is not _pools_loop:
+        stale_pools = list(_pools.values())
+        _pools.clear()
+        _release_stale_pools(stale_pools, _pools_loop)
+        _pools_loop = loop
+    if server_url not in _pools:
+        _pools[server_url] = McpSessionPool(server_url)
+    return _pools[server_url]
+
+
+async def close_mcp_session_pools() -> None:
+    pools = list(_pools.values())
+    _pools.clear()
+    await asyncio.gather(*(pool.close() for pool in pools), return_exceptions=True)
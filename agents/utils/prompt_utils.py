@@ -1,6 +1,81 @@
 import os
+import sys
+import threading
+import time
 import yaml
-import inspect
+
+# prompt.yaml 변경 시 다시 읽어올지 여부 (mtime 비교)
+# 변경된 prompt는 get_prompt_instruction_provider로 만든 agent instruction에 다음 LLM 요청부터 반영됩니다.
+PROMPT_HOT_RELOAD = os.getenv("PROMPT_HOT_RELOAD", "true").lower() == "true"
+# 파일별 mtime 확인 최소 간격 (LLM 요청마다 os.stat 하지 않도록)
+PROMPT_HOT_RELOAD_INTERVAL_SECONDS = float(os.getenv("PROMPT_HOT_RELOAD_INTERVAL_SECONDS", "2"))
+
+
+class PromptRegistry:
+    """
+    prompt yaml 파일별 parsing 결과 캐시
+    파일은 처음 조회할 때 한 번만 parsing 하며, hot_reload가 켜져 있으면
+    check_interval 마다 mtime을 확인하여 바뀐 경우에만 다시 읽습니다.
+    """
+
+    def __init__(
+        self, hot_reload: bool = PROMPT_HOT_RELOAD, check_interval: float = PROMPT_HOT_RELOAD_INTERVAL_SECONDS
+    ):
+        self.hot_reload = hot_reload
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._configs: dict[str, tuple[float, dict]] = {}
+        self._checked_at: dict[str, float] = {}
+
+    def load(self, path: str) -> dict:
+        """path의 yaml을 parsing 한 결과를 반환합니다."""
+        cached = self._configs.get(path)
+        if cached is not None and not self.hot_reload:
+            return cached[1]
+
+        now = time.monotonic()
+        if cached is not None and now - self._checked_at.get(path, 0.0) < self.check_interval:
+            return cached[1]
+        self._checked_at[path] = now
+
+        mtime = os.path.getmtime(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with self._lock:
+            cached = self._configs.get(path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+            with open(path, "r", encoding="utf-8") as f:
+                config = yaml.safe_load(f) or {}
+            self._configs[path] = (mtime, config)
+            return config
+
+    def get(self, path: str, tag: str):
+        """
+        Args:
+            path (str): yaml 파일의 절대 경로
+            tag (str): the tag of the prompt. separate multiple tags with a dot (e.g., "tag1.tag2.tag3" )
+        """
+        current = self.load(path)
+        for key in tag.split("."):
+            current = current.get(key, {})
+        return current
+
+    def clear(self) -> None:
+        with self._lock:
+            self._configs.clear()
+            self._checked_at.clear()
+
+
+PROMPT_REGISTRY = PromptRegistry()
+
+
+def _resolve_prompt_path(path, caller_frame) -> str:
+    caller_dir = os.path.dirname(os.path.abspath(caller_frame.f_code.co_filename))
+    return os.path.abspath(os.path.join(caller_dir, path if path is not None else "prompt.yaml"))
+
 
 def get_prompt_yaml(tag, path=None):
     """
@@ -12,24 +87,28 @@ def get_prompt_yaml(tag, path=None):
         str: the prompt corresponding to the tag in the yaml file. If the tag does not exist, returns an empty string.
     """
 
-    if path is None:
-        caller_file = inspect.stack()[1].filename
-        caller_dir = os.path.dirname(caller_file)
-        path = os.path.join(caller_dir, "prompt.yaml")
+    # inspect.stack()은 전체 stack의 frame 정보(소스 코드 포함)를 만들기 때문에 호출한 frame의 파일명만 조회
+    return PROMPT_REGISTRY.get(_resolve_prompt_path(path, sys._getframe(1)), tag)
+
 
-    else:
-        caller_file = inspect.stack()[1].filename
-        caller_dir = os.path.dirname(caller_file)
-        path = os.path.join(caller_dir, path)
-        path = os.path.abspath(path)
+def get_prompt_instruction_provider(tag, path=None):
+    """
+    LLM 요청 시점에 prompt를 조회하는 agent instruction(InstructionProvider)을 반환합니다.
+    문자열 instruction은 agent 생성 시점에 고정되므로, hot reload된 prompt를 반영하려면 이 함수를 사용합니다.
+    InstructionProvider에는 ADK가 state를 주입하지 않으므로 {key?} 치환을 직접 수행합니다.
+
+    Args:
+        tag (str): the tag of the prompt. separate multiple tags with a dot (e.g., "tag1.tag2.tag3" )
+        path (str): the path to the yaml file, default is prompt.yaml in the caller's directory
+    Returns:
+        Callable[[ReadonlyContext], Awaitable[str]]: LlmAgent의 instruction / global_instruction에 전달할 함수
+    """
+    from google.adk.utils.instructions_utils import inject_session_state
 
-    with open(path, "r", encoding='utr-8') as f:
-        config = yaml.safe_load(f)
+    path = _resolve_prompt_path(path, sys._getframe(1))
 
-    keys = tag.split(".")
-    current = config
-    for key in keys:
-        current = current.get(key, {})
-    return current
+    async def instruction_provider(readonly_context) -> str:
+        return await inject_session_state(PROMPT_REGISTRY.get(path, tag), readonly_context)
 
-    
\ No newline at end of file
+    instruction_provider.__name__ = f"prompt_{tag.replace('.', '_')}"
+    return instruction_provider
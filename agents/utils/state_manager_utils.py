@@ -1,36 +1,91 @@
 """
 통합되 State 관리 유틸리티
 AppState 객체를 사용하여 table 과 img artifacts를 하나의 state에서 관리합니다.
+
+artifact_states는 {invocation_id: {"artifacts": [artifact json, ...]}} 형태이며,
+artifact 추가는 바깥 mapping(최대 ARTIFACT_STATES_MAX_INVOCATIONS 개)과 현재 invocation의 list만 복사하므로
+session 길이와 무관하며, 이전 event의 state_delta에 기록된 dict는 수정하지 않습니다.
+AppState 모델로의 parsing은 조회하는 invocation에 대해서만 필요할 때 수행합니다.
+오래된 invocation은 ARTIFACT_STATES_MAX_INVOCATIONS 개수를 넘으면 먼저 생성된 순서대로 제거됩니다.
 """
 
-from typing import Dict, List, Literal, Tuple, Optional
+from typing import Dict, Iterator, List, Literal, Mapping, Tuple, Optional
 import logging
-from copy import deepcopy
+import os
 
 from google.adk.tools.tool_context import ToolContext
 from google.adk.agents.callback_context import CallbackContext
-import pandas as pd
 
 from ..custom_types import AppState, ImgArtifact, TableArtifact
 from ..constants import ARTIFACT_STATES
 
+# session에 보관할 최대 invocation 수 (0 이하이면 제한 없음)
+ARTIFACT_STATES_MAX_INVOCATIONS = int(os.getenv("ARTIFACT_STATES_MAX_INVOCATIONS", "20"))
+
+
+class _LazyAppStates(Mapping):
+    """
+    invocation_id -> AppState mapping
+    조회한 invocation만 AppState로 parsing 하고 결과를 재사용합니다.
+    """
+
+    def __init__(self, raw_states: Dict[str, Dict]):
+        self._raw_states = raw_states
+        self._parsed: Dict[str, AppState] = {}
+
+    def __getitem__(self, invocation_id: str) -> AppState:
+        if invocation_id not in self._parsed:
+            self._parsed[invocation_id] = AppState.from_json(self._raw_states[invocation_id])
+        return self._parsed[invocation_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._raw_states)
+
+    def __len__(self) -> int:
+        return len(self._raw_states)
+
+    def __repr__(self) -> str:
+        counts = {
+            invocation_id: len(state.get("artifacts", []))
+            for invocation_id, state in self._raw_states.items()
+        }
+        return f"{self.__class__.__name__}(artifacts={counts})"
+
+
+def _evict_old_invocations(states: Dict[str, Dict], keep_invocation_id: str) -> None:
+    """
+    보관 개수를 넘은 오래된 invocation을 제거합니다. dict는 삽입 순서를 유지하므로 앞에서부터 제거합니다.
+    states는 state에 저장된 dict가 아닌 복사본이어야 합니다.
+    """
+    if ARTIFACT_STATES_MAX_INVOCATIONS <= 0:
+        return
+
+    while len(states) > ARTIFACT_STATES_MAX_INVOCATIONS:
+        oldest = next(iter(states))
+        if oldest == keep_invocation_id:
+            break
+        del states[oldest]
+        logging.info(f"[STATE] 오래된 invocation 제거, invocation_id: {oldest}")
+
+
 def _initialize_state(context: ToolContext | CallbackContext, invocation_id: str) -> Dict:
     """
-    새로운 State 객체를 초기화하고 tool context에 저장합니다.
+    invocation의 State 객체가 포함된 artifact states 복사본을 반환합니다.
     기존 상태가 있으면 덮어쓰지 않고 유지합니다.
+    바깥 mapping만 복사하므로 invocation별 값은 기존 dict와 공유되며, 수정하려면 새 dict로 교체해야 합니다.
 
     Args:
         context: 상태 정보를 포함하는 context
         invocation_id: invocation의 고유 식별자
     """
 
-    states = context.state.get(ARTIFACT_STATES, {})
+    states = dict(context.state.get(ARTIFACT_STATES) or {})
 
     if invocation_id not in states:
-        state = AppState()
-        states[invocation_id] = state.to_json()
+        states[invocation_id] = AppState().to_json()
+        _evict_old_invocations(states, invocation_id)
+        logging.info(f"[STATE] 초기화, invocation_id: {invocation_id}")
 
-    logging.info(f"[STATE] 초기화, invocation_id: {invocation_id}")
     return states
 
 def add_artifact_to_state(
@@ -41,6 +96,8 @@ def add_artifact_to_state(
     img_size: Optional[Tuple[int, int]] = None,
     data_length: Optional[int] = None,
     sql_query: Optional[str] = None,
+    table_format: Optional[str] = None,
+    compression: Optional[str] = None,
 ) -> ImgArtifact | TableArtifact | None:
     """
     State의 artifacts 리스트에 새로운 artifact를 추가합니다.
@@ -57,16 +114,16 @@ def add_artifact_to_state(
         data_length: 데이터 크기
         columns: 데이터 컬럼명 list
         sql_query: 모델이 생성한 SQL 문
+        table_format: 테이블 artifact 저장 형식 ("csv", "parquet", "arrow")
+        compression: 테이블 artifact 압축 방식 ("gzip", "zstd")
 
     Returns:
         성공적으로 추가되면 True, 실패하면 False
-        
+
     """
 
     invocation_id = context.invocation_id
     artifact_states = _initialize_state(context, invocation_id)
-    current_artifact_states = AppState.from_json(artifact_states[invocation_id])
-    new_artifact_states = deepcopy(artifact_states)
 
     # 받아온 Context 활용하여 필수값 채우기
     user_query = context.user_content.parts[0].text
@@ -81,24 +138,31 @@ def add_artifact_to_state(
             mime_type=mime_type,
             function_call_id=function_call_id if function_call_id else f"user_input_from_invocation_{invocation_id}",
             user_query=user_query,
+            img_size=img_size,
         )
     elif artifact_type == "table":
         artifact = TableArtifact(
             filename=filename,
             mime_type=mime_type,
-            function_call_id=function_call_id,
+            # SqlValidationAgent / semantic 캐시처럼 tool 호출 밖(CallbackContext)에서 저장한 경우 function_call_id 없음
+            function_call_id=function_call_id if function_call_id else f"agent_from_invocation_{invocation_id}",
             user_query=user_query,
             sql_query=sql_query,
             data_length=data_length,
+            format=table_format,
+            compression=compression,
         )
     else:
         error_message = f"[STATE] 지원하지 않는 artifact_type: {artifact_type}"
         logging.error(error_message)
         raise ValueError(error_message)
-    
-    current_artifact_states.artifacts.append(artifact)
-    new_artifact_states[invocation_id] = current_artifact_states.to_json()
-    context.state[ARTIFACT_STATES] = new_artifact_states
+
+    # 이전 event의 state_delta와 dict를 공유하지 않도록 바깥 mapping과 현재 invocation의 list만 새로 만들어 대입
+    entry = artifact_states[invocation_id]
+    context.state[ARTIFACT_STATES] = {
+        **artifact_states,
+        invocation_id: {**entry, "artifacts": [*entry.get("artifacts", []), artifact.to_json()]},
+    }
     logging.info(
         f"[STATE] artifact 추가, invocation_id: {invocation_id}, artifact: {artifact}"
     )
@@ -117,7 +181,7 @@ def get_state(tool_context: ToolContext, invocation_id: str) -> Optional[AppStat
     """
 
     if (
-        ARTIFACT_STATES not in tool_context.State
+        ARTIFACT_STATES not in tool_context.state
         or invocation_id not in tool_context.state[ARTIFACT_STATES]
     ):
         return None
@@ -142,26 +206,26 @@ def delete_state(tool_context: ToolContext, invocation_id: str) -> bool:
     ):
         return False
 
-    del tool_context.state[ARTIFACT_STATES][invocation_id]
+    tool_context.state[ARTIFACT_STATES] = {
+        key: value for key, value in tool_context.state[ARTIFACT_STATES].items() if key != invocation_id
+    }
     return True
 
-def get_all_states(tool_context: ToolContext) -> Dict[str, AppState]:
+def get_all_states(tool_context: ToolContext) -> Mapping[str, AppState]:
     """
     tool context에서 모든 state 객체를 조회합니다.
+    AppState parsing은 각 invocation을 처음 조회할 때 수행됩니다.
 
-    Args:   
+    Args:
         tool_context: 상태정보를 포함하는 tool context
-    
+
     Returns:
         invocation_id를 AppState 객체에 매핑하는 딕너리
     """
     if ARTIFACT_STATES not in tool_context.state:
         return {}
 
-    return {
-        invocation_id: AppState.from_json(state_json)
-        for invocation_id, state_json in tool_context.state[ARTIFACT_STATES].items()
-    }
+    return _LazyAppStates(tool_context.state[ARTIFACT_STATES])
 
 def clear_all_states(tool_context: ToolContext) -> None:
     """
@@ -0,0 +1,166 @@
+"""
+테이블 artifact 저장 형식 변환 유틸리티
+쿼리 결과(utf-8-sig CSV bytes)를 CSV / gzip·zstd 압축 CSV / Parquet / Arrow IPC 중 선택한 형식으로 변환하고,
+저장된 형식 정보(TableArtifact.format, compression)로 다시 DataFrame으로 읽어옵니다.
+pyarrow, zstandard는 선택 의존성이며, 설치되어 있지 않으면 경고 후 가능한 형식으로 대체합니다.
+"""
+
+import csv
+import gzip
+import io
+import logging
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# "csv" | "parquet" | "arrow"
+TABLE_ARTIFACT_FORMAT = os.getenv("TABLE_ARTIFACT_FORMAT", "csv")
+# "none" | "gzip" | "zstd" (parquet / arrow 는 파일 내부 압축 codec으로 사용)
+TABLE_ARTIFACT_COMPRESSION = os.getenv("TABLE_ARTIFACT_COMPRESSION", "none")
+
+_CSV_COMPRESSION_INFO = {
+    None: ("text/csv", ".csv"),
+    "gzip": ("application/gzip", ".csv.gz"),
+    "zstd": ("application/zstd", ".csv.zst"),
+}
+_COLUMNAR_FORMAT_INFO = {
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", ".arrow"),
+}
+
+
+@dataclass
+class EncodedTable:
+    """저장 형식으로 변환된 테이블 데이터"""
+
+    data: bytes
+    format: str
+    compression: Optional[str]
+    mime_type: str
+    extension: str
+
+
+def _normalize_compression(compression: Optional[str]) -> Optional[str]:
+    if compression is None or compression.lower() in ("", "none"):
+        return None
+    return compression.lower()
+
+
+def _zstd_compress(data: bytes) -> Optional[bytes]:
+    try:
+        import zstandard
+    except ImportError:
+        logging.warning("[TableFormat] zstandard 미설치, gzip으로 압축합니다.")
+        return None
+    return zstandard.ZstdCompressor().compress(data)
+
+
+def _csv_to_arrow_table(csv_bytes: bytes):
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    # 타입을 추론하면 "00123" 같은 text 값이 정수로 바뀌므로 모든 열을 CSV에 기록된 문자열 그대로 저장
+    # (utf-8 BOM은 pyarrow CSV reader가 건너뜀, 빈 값도 null이 아닌 빈 문자열로 유지)
+    header = next(csv.reader(io.TextIOWrapper(io.BytesIO(csv_bytes), encoding="utf-8-sig", newline="")), [])
+    return pa_csv.read_csv(
+        io.BytesIO(csv_bytes),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in header},
+            strings_can_be_null=False,
+        ),
+    )
+
+
+def _encode_csv(csv_bytes: bytes, compression: Optional[str]) -> EncodedTable:
+    if compression not in _CSV_COMPRESSION_INFO:
+        logging.warning(f"[TableFormat] 지원하지 않는 압축 방식: {compression}, 압축하지 않습니다.")
+        compression = None
+
+    data = csv_bytes
+    if compression == "zstd":
+        data = _zstd_compress(csv_bytes)
+        if data is None:
+            compression = "gzip"
+    if compression == "gzip":
+        data = gzip.compress(csv_bytes, compresslevel=6)
+
+    mime_type, extension = _CSV_COMPRESSION_INFO[compression]
+    return EncodedTable(data, "csv", compression, mime_type, extension)
+
+
+def _encode_columnar(csv_bytes: bytes, table_format: str, compression: Optional[str]) -> EncodedTable:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = _csv_to_arrow_table(csv_bytes)
+    sink = io.BytesIO()
+    if table_format == "parquet":
+        pq.write_table(table, sink, compression=compression or "none")
+    else:
+        # Arrow IPC는 lz4 / zstd 만 지원
+        if compression not in (None, "zstd", "lz4"):
+            logging.warning(f"[TableFormat] Arrow IPC에서 지원하지 않는 압축 방식: {compression}, zstd를 사용합니다.")
+            compression = "zstd"
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+
+    mime_type, extension = _COLUMNAR_FORMAT_INFO[table_format]
+    return EncodedTable(sink.getvalue(), table_format, compression, mime_type, extension)
+
+
+def encode_table(
+    csv_bytes: bytes,
+    table_format: str = TABLE_ARTIFACT_FORMAT,
+    compression: Optional[str] = TABLE_ARTIFACT_COMPRESSION,
+) -> EncodedTable:
+    """
+    utf-8-sig CSV bytes를 지정한 artifact 저장 형식으로 변환합니다.
+
+    Args:
+        csv_bytes: 쿼리 결과 CSV bytes
+        table_format: "csv" | "parquet" | "arrow"
+        compression: "none" | "gzip" | "zstd"
+
+    Returns:
+        EncodedTable: 변환된 데이터와 실제 적용된 형식 / 압축 방식, MIME 타입, 파일 확장자
+    """
+    table_format = (table_format or "csv").lower()
+    compression = _normalize_compression(compression)
+
+    if table_format in _COLUMNAR_FORMAT_INFO:
+        try:
+            return _encode_columnar(csv_bytes, table_format, compression)
+        except ImportError:
+            logging.warning(f"[TableFormat] pyarrow 미설치, {table_format} 대신 CSV로 저장합니다.")
+    elif table_format != "csv":
+        logging.warning(f"[TableFormat] 지원하지 않는 형식: {table_format}, CSV로 저장합니다.")
+
+    return _encode_csv(csv_bytes, compression)
+
+
+def decode_table(data: bytes, table_format: Optional[str] = "csv", compression: Optional[str] = None) -> "pd.DataFrame":
+    """
+    encode_table로 저장한 artifact bytes를 DataFrame으로 읽어옵니다.
+    TableArtifact의 format, compression 값을 그대로 전달하면 됩니다. (기존 artifact는 format이 없으므로 CSV로 취급)
+    """
+    import pandas as pd
+
+    table_format = table_format or "csv"
+    if table_format == "parquet":
+        return pd.read_parquet(io.BytesIO(data))
+    if table_format == "arrow":
+        import pyarrow as pa
+
+        return pa.ipc.open_file(io.BytesIO(data)).read_all().to_pandas()
+
+    if compression == "zstd":
+        import zstandard
+
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    elif compression == "gzip":
+        data = gzip.decompress(data)
+    return pd.read_csv(io.BytesIO(data), encoding="utf-8-sig")
@@ -0,0 +1,181 @@
+"""
+외부 서버 없이 실행하는 end-to-end benchmark
+LiteLlm 대신 ScriptedLlm, 로컬 가짜 임베딩 서버, in-process Chroma collection, 가짜 DB pool로
+root_agent 또는 data_search_agent를 ADK Runner로 실행하여 질문 파일을 재생합니다.
+질문별 latency의 p50/p95/p99, 질문당 LLM 호출 수, 단계별 복사 bytes와 단계별 latency(log_utils metrics)를 출력합니다.
+
+캐시(semantic SQL / 결과 / 임베딩)는 process 단위이므로 --repeat 2 이상이면 두 번째부터 캐시된 경로가 측정됩니다.
+캐시 없는 경로만 보려면 SEMANTIC_SQL_CACHE_ENABLED=false 등으로 실행합니다. (DB 결과 캐시는 BGA_QUERY_RESULT_CACHE_ENABLED=true 일 때만 사용)
+
+Usage:
+    python benchmarks/bench_e2e.py [--agent root|data_search] [--questions benchmarks/data/questions.jsonl]
+        [--repeat 3] [--llm-latency-ms 300] [--embedding-latency-ms 20] [--db-latency-ms 10] [--rows 1000]
+        [--json report.json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import offline_stubs
+from offline_stubs import (
+    BYTES,
+    LLM_CALLS,
+    FakeEmbeddingServer,
+    FakePool,
+    percentile,
+)
+
+DEFAULT_QUESTIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "questions.jsonl")
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    """bench_e2e / bench_load 공통 stub 설정"""
+    parser.add_argument("--agent", choices=["root", "data_search"], default="root")
+    parser.add_argument("--questions", default=DEFAULT_QUESTIONS_PATH)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=20.0)
+    parser.add_argument("--db-latency-ms", type=float, default=10.0)
+    parser.add_argument("--jitter", type=float, default=0.2, help="지연 시간 변동 비율 (0.2 = ±20%%)")
+    parser.add_argument("--rows", type=int, default=1000, help="SELECT 한 번에 반환할 행 수")
+    parser.add_argument("--pool-size", type=int, default=10, help="가짜 DB pool의 최대 연결 수")
+    parser.add_argument("--log-level", default="WARNING")
+
+
+def setup_offline_pipeline(args) -> dict:
+    """
+    stub을 띄우고 agents를 import 하여 모델을 교체한 뒤 runner를 만듭니다.
+
+    Returns:
+        dict: runner, questions, embedding_server, pool
+    """
+    logging.basicConfig(level=args.log_level)
+
+    embedding_server = FakeEmbeddingServer(latency_ms=args.embedding_latency_ms, jitter=args.jitter).start()
+    offline_stubs.configure_environment(embedding_server.url)
+    pool = FakePool(
+        max_size=args.pool_size, rows_per_query=args.rows, latency_ms=args.db_latency_ms, jitter=args.jitter
+    )
+    offline_stubs.install_fake_pool(pool)
+
+    if args.agent == "root":
+        from agents.agent import root_agent as agent
+    else:
+        from agents.sub_agents.data_search_agent import data_search_agent as agent
+
+    offline_stubs.install_in_process_chroma()
+    questions = offline_stubs.load_questions(args.questions)
+    num_of_llm_agents = offline_stubs.install_scripted_llm(
+        agent, questions, latency_ms=args.llm_latency_ms, jitter=args.jitter
+    )
+    logging.info(f"[Benchmark] {num_of_llm_agents} LlmAgent 모델을 ScriptedLlm으로 교체")
+    return {
+        "runner": offline_stubs.make_runner(agent),
+        "questions": questions,
+        "embedding_server": embedding_server,
+        "pool": pool,
+    }
+
+
+def stage_latency_summary() -> dict:
+    from agents.utils.log_utils import METRICS
+
+    return METRICS.summary()
+
+
+async def run_benchmark(args) -> dict:
+    setup = setup_offline_pipeline(args)
+    runner, questions = setup["runner"], setup["questions"]
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    bytes_by_question: dict[str, list[dict]] = defaultdict(list)
+    errors = []
+    for _ in range(args.repeat):
+        for question in questions:
+            before = BYTES.snapshot()
+            result = await offline_stubs.run_question(runner, question)
+            latencies[question.request_id].append(result["latency_s"])
+            bytes_by_question[question.request_id].append(BYTES.diff(BYTES.snapshot(), before))
+            if result["error"]:
+                errors.append({"request_id": question.request_id, "error": result["error"]})
+
+    all_latencies = [latency for values in latencies.values() for latency in values]
+    num_of_runs = len(all_latencies)
+    total_bytes = BYTES.snapshot()
+    return {
+        "agent": args.agent,
+        "runs": num_of_runs,
+        "errors": errors,
+        "latency_ms": {
+            "p50": percentile(all_latencies, 50) * 1000,
+            "p95": percentile(all_latencies, 95) * 1000,
+            "p99": percentile(all_latencies, 99) * 1000,
+            "mean": sum(all_latencies) / num_of_runs * 1000 if num_of_runs else 0.0,
+        },
+        "llm_calls_per_question": sum(LLM_CALLS.calls_by_question.values()) / num_of_runs if num_of_runs else 0.0,
+        "llm_calls_by_agent": dict(LLM_CALLS.calls_by_agent),
+        "bytes_per_question": {stage: value / num_of_runs for stage, value in total_bytes.items()} if num_of_runs else {},
+        "questions": {
+            question.request_id: {
+                "title": question.title,
+                "p50_ms": percentile(latencies[question.request_id], 50) * 1000,
+                "llm_calls": LLM_CALLS.calls_by_question.get(question.request_id, 0) / args.repeat,
+                "bytes": bytes_by_question[question.request_id][0] if bytes_by_question[question.request_id] else {},
+            }
+            for question in questions
+        },
+        "stages": stage_latency_summary(),
+        "embedding_server": {"requests": setup["embedding_server"].requests, "texts": setup["embedding_server"].texts},
+    }
+
+
+def print_report(report: dict) -> None:
+    latency = report["latency_ms"]
+    print(f"agent: {report['agent']}, runs: {report['runs']}, errors: {len(report['errors'])}")
+    print(
+        f"latency  p50 {latency['p50']:.1f} ms  p95 {latency['p95']:.1f} ms  "
+        f"p99 {latency['p99']:.1f} ms  mean {latency['mean']:.1f} ms"
+    )
+    print(f"LLM calls per question: {report['llm_calls_per_question']:.2f}  {report['llm_calls_by_agent']}")
+    print(f"embedding server: {report['embedding_server']}")
+    print("bytes per question:")
+    for stage, value in sorted(report["bytes_per_question"].items()):
+        print(f"    {stage:<20} {value:>12,.0f}")
+    print("questions:")
+    for request_id, summary in report["questions"].items():
+        print(
+            f"    {request_id} p50 {summary['p50_ms']:8.1f} ms  LLM calls {summary['llm_calls']:.1f}  "
+            f"{summary['title']}"
+        )
+    print("stages:")
+    for stage, summary in report["stages"].items():
+        print(
+            f"    {stage:<50} n={summary['count']:<5} mean {summary['mean_ms']:8.1f} ms  "
+            f"p95<= {summary['p95_ms']:8.1f} ms  errors {summary['errors']}"
+        )
+    for error in report["errors"][:5]:
+        print(f"error: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    add_stub_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="보고서를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+agents package import 시간 benchmark
+모듈마다 새 python process에서 import 시간을 반복 측정하고, import 후 로드된 무거운 의존성을 함께 출력합니다.
+worker 기동 시간이 늘어나거나 lazy import가 깨지는 회귀를 확인하는 용도입니다.
+
+Usage:
+    python benchmarks/bench_import_time.py [--repeat 5] [module ...]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = [
+    "agents.utils",
+    "agents.utils.file_utils",
+    "agents.sub_agents.data_search_agent.tools.bga_column_name_processor",
+    "agents.sub_agents.data_search_agent.tools",
+    "agents.agent",
+]
+# 첫 사용 시점까지 import 되지 않아야 하는 의존성
+HEAVY_MODULES = ["pandas", "pyarrow", "chromadb", "mcp", "mcp.client.sse", "numpy", "litellm"]
+
+_MEASURE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+error = None
+try:
+    __import__({module!r})
+except Exception as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "elapsed_ms": elapsed * 1000,
+    "error": error,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(module: str, repeat: int) -> dict:
+    env = {**os.environ, "LITELLM_LOCAL_MODEL_COST_MAP": "True"}
+    script = _MEASURE_SCRIPT.format(module=module, heavy=HEAVY_MODULES)
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    elapsed = [run["elapsed_ms"] for run in runs]
+    return {
+        "median_ms": statistics.median(elapsed),
+        "min_ms": min(elapsed),
+        "error": runs[-1]["error"],
+        "loaded": runs[-1]["loaded"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"python {sys.version.split()[0]}, repeat: {args.repeat}")
+    for module in args.modules:
+        result = measure(module, args.repeat)
+        print(
+            f"{module}\n"
+            f"    median {result['median_ms']:.1f} ms, min {result['min_ms']:.1f} ms\n"
+            f"    heavy modules loaded: {result['loaded'] or '-'}"
+        )
+        if result["error"]:
+            print(f"    import failed: {result['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+동시 session 부하 테스트 / saturation 보고서
+bench_e2e와 같은 offline stub 위에서 동시 invocation 수를 단계적으로 늘리며
+단계마다 처리량, latency, DB pool 대기 시간(queueing delay), event loop 지연, RSS를 기록하고,
+처리량이 더 이상 늘지 않는 단계와 그때 가장 먼저 한계에 도달한 구성 요소를 보고서로 씁니다.
+
+기본으로 질문마다 body를 바꾼 변형을 사용하여 semantic SQL / 임베딩 캐시를 우회합니다. (--reuse-questions 로 끔)
+DB 결과 캐시는 기본으로 꺼져 있습니다. (BGA_QUERY_RESULT_CACHE_ENABLED=true 로 켬)
+
+Usage:
+    python benchmarks/bench_load.py [--concurrency 1,2,4,8,16,32] [--requests-per-worker 4]
+        [--pool-size 4] [--llm-latency-ms 300] [--report saturation_report.md] [--json saturation.json]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import offline_stubs
+from bench_e2e import add_stub_arguments, setup_offline_pipeline
+from offline_stubs import percentile
+
+# 동시 실행 수를 늘려도 처리량 증가율이 이 값 미만이면 포화로 판단
+SATURATION_THROUGHPUT_GAIN = 0.10
+# 또는 p95 latency가 첫 단계의 이 배수를 넘으면 포화로 판단 (queueing delay가 처리 시간을 넘어선 지점)
+SATURATION_P95_RATIO = 2.0
+# event loop 지연이 이 값 이상이면 loop를 block 하는 작업이 있다고 판단
+EVENT_LOOP_LAG_LIMIT_MS = 50.0
+
+
+def _current_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # /proc이 없는 환경: 최대 RSS로 대신함 (Linux: KB, macOS: bytes)
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class EventLoopMonitor:
+    """일정 간격으로 sleep 하여 예정보다 늦게 깨어난 시간(event loop lag)과 RSS를 기록합니다."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags: list[float] = []
+        self.peak_rss = 0
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - start - self.interval))
+            self.peak_rss = max(self.peak_rss, _current_rss_bytes())
+
+    def start(self) -> None:
+        self.lags.clear()
+        self.peak_rss = _current_rss_bytes()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+async def run_level(runner, questions, concurrency: int, requests_per_worker: int, variants, pool) -> dict:
+    """동시 worker concurrency 개가 각각 requests_per_worker 개의 질문을 연속으로 실행합니다."""
+    from agents.utils.log_utils import METRICS
+
+    METRICS.reset()
+    pool.waits.clear()
+    pool.max_in_use = 0
+    monitor = EventLoopMonitor()
+    latencies: list[float] = []
+    errors: list[str] = []
+    next_question = itertools.cycle(questions)
+
+    async def worker() -> None:
+        for _ in range(requests_per_worker):
+            question = next(next_question)
+            if variants is not None:
+                question = offline_stubs.make_variant(question, next(variants))
+            result = await offline_stubs.run_question(runner, question)
+            latencies.append(result["latency_s"])
+            if result["error"]:
+                errors.append(result["error"])
+
+    monitor.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await monitor.stop()
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "elapsed_s": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+        },
+        "db_pool": {
+            "size": pool.max_size,
+            "max_in_use": pool.max_in_use,
+            "wait_p50_ms": percentile(pool.waits, 50) * 1000,
+            "wait_p95_ms": percentile(pool.waits, 95) * 1000,
+            "wait_max_ms": max(pool.waits, default=0.0) * 1000,
+        },
+        "event_loop_lag_ms": {
+            "p95": percentile(monitor.lags, 95) * 1000,
+            "max": max(monitor.lags, default=0.0) * 1000,
+        },
+        "peak_rss_mb": monitor.peak_rss / 1024 / 1024,
+        "stages": METRICS.summary(),
+    }
+
+
+def find_saturation(levels: list[dict]) -> dict:
+    """
+    처리량 증가율이 SATURATION_THROUGHPUT_GAIN 미만으로 떨어지거나
+    p95 latency가 첫 단계의 SATURATION_P95_RATIO 배를 넘은 첫 단계를 포화 지점으로 보고,
+    첫 단계와 비교하여 가장 먼저 한계에 도달한 구성 요소를 추정합니다.
+    """
+    saturated = None
+    for previous, current in zip(levels, levels[1:]):
+        gain = current["throughput_rps"] / previous["throughput_rps"] - 1 if previous["throughput_rps"] else 0.0
+        p95_ratio = current["latency_ms"]["p95"] / levels[0]["latency_ms"]["p95"] if levels[0]["latency_ms"]["p95"] else 0.0
+        if gain < SATURATION_THROUGHPUT_GAIN or p95_ratio > SATURATION_P95_RATIO:
+            saturated = current
+            break
+    if saturated is None:
+        return {"saturated": False, "max_throughput_rps": max(level["throughput_rps"] for level in levels)}
+
+    baseline = levels[0]
+    findings = []
+    pool = saturated["db_pool"]
+    if pool["max_in_use"] >= pool["size"] and pool["wait_p95_ms"] >= 0.1 * saturated["latency_ms"]["p50"]:
+        findings.append(
+            f"DB POOL: 연결 {pool['size']}개가 모두 사용 중이며 연결 대기 p95 {pool['wait_p95_ms']:.1f} ms"
+        )
+    if saturated["event_loop_lag_ms"]["p95"] >= EVENT_LOOP_LAG_LIMIT_MS:
+        findings.append(
+            f"EVENT LOOP: loop 지연 p95 {saturated['event_loop_lag_ms']['p95']:.1f} ms "
+            "(loop를 block 하는 동기 작업 확인 필요)"
+        )
+    if saturated["peak_rss_mb"] >= 2 * baseline["peak_rss_mb"]:
+        findings.append(f"MEMORY: peak RSS {baseline['peak_rss_mb']:.0f} MB -> {saturated['peak_rss_mb']:.0f} MB")
+
+    # 단계별 평균 latency 증가 배율
+    growth = []
+    for stage, summary in saturated["stages"].items():
+        base = baseline["stages"].get(stage)
+        if base and base["mean_ms"] > 0 and summary["count"]:
+            growth.append((summary["mean_ms"] / base["mean_ms"], stage, base["mean_ms"], summary["mean_ms"]))
+    growth.sort(reverse=True)
+
+    return {
+        "saturated": True,
+        "concurrency": saturated["concurrency"],
+        "max_throughput_rps": max(level["throughput_rps"] for level in levels),
+        "findings": findings,
+        "stage_growth": [
+            {"stage": stage, "ratio": ratio, "baseline_mean_ms": base, "mean_ms": mean}
+            for ratio, stage, base, mean in growth[:5]
+        ],
+    }
+
+
+def render_report(args, levels: list[dict], saturation: dict) -> str:
+    lines = [
+        "# Saturation report",
+        "",
+        f"- agent: {args.agent}, requests per worker: {args.requests_per_worker}",
+        f"- stub latency: LLM {args.llm_latency_ms} ms, embedding {args.embedding_latency_ms} ms, "
+        f"DB {args.db_latency_ms} ms (±{args.jitter:.0%}), rows per query {args.rows}, DB pool {args.pool_size}",
+        "",
+        "| concurrency | rps | p50 ms | p95 ms | p99 ms | pool wait p95 ms | pool in use | loop lag p95 ms | peak RSS MB | errors |",
+        "|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|",
+    ]
+    for level in levels:
+        latency = level["latency_ms"]
+        lines.append(
+            f"| {level['concurrency']} | {level['throughput_rps']:.2f} | {latency['p50']:.0f} | {latency['p95']:.0f} "
+            f"| {latency['p99']:.0f} | {level['db_pool']['wait_p95_ms']:.1f} "
+            f"| {level['db_pool']['max_in_use']}/{level['db_pool']['size']} "
+            f"| {level['event_loop_lag_ms']['p95']:.1f} | {level['peak_rss_mb']:.0f} | {level['errors']} |"
+        )
+
+    lines.append("")
+    if not saturation["saturated"]:
+        lines.append(
+            f"측정한 범위에서는 포화되지 않았습니다. (최대 {saturation['max_throughput_rps']:.2f} rps) "
+            "--concurrency 범위를 늘려 다시 측정하세요."
+        )
+        return "\n".join(lines) + "\n"
+
+    lines.append(
+        f"동시 실행 {saturation['concurrency']}에서 포화되었습니다. (처리량 증가 {SATURATION_THROUGHPUT_GAIN:.0%} 미만 "
+        f"또는 p95 latency가 첫 단계의 {SATURATION_P95_RATIO:g}배 초과) "
+        f"(최대 {saturation['max_throughput_rps']:.2f} rps)"
+    )
+    lines.append("")
+    lines.append("## 한계에 도달한 구성 요소")
+    for finding in saturation["findings"] or ["pool / event loop / memory 지표는 한계 전입니다. 아래 단계별 증가를 확인하세요."]:
+        lines.append(f"- {finding}")
+    lines.append("")
+    lines.append("## 첫 단계 대비 평균 latency 증가가 큰 단계")
+    for item in saturation["stage_growth"]:
+        lines.append(
+            f"- {item['stage']}: {item['baseline_mean_ms']:.1f} ms -> {item['mean_ms']:.1f} ms (x{item['ratio']:.1f})"
+        )
+    return "\n".join(lines) + "\n"
+
+
+async def run_load_test(args) -> tuple[list[dict], dict]:
+    setup = setup_offline_pipeline(args)
+    runner, questions, pool = setup["runner"], setup["questions"], setup["pool"]
+    variants = None if args.reuse_questions else itertools.count()
+
+    # import / 연결 초기화 비용이 첫 단계에 섞이지 않도록 한 번 실행
+    await offline_stubs.run_question(runner, questions[0])
+
+    levels = []
+    for concurrency in args.concurrency:
+        level = await run_level(runner, questions, concurrency, args.requests_per_worker, variants, pool)
+        levels.append(level)
+        print(
+            f"concurrency {concurrency:>4}: {level['throughput_rps']:7.2f} rps  "
+            f"p95 {level['latency_ms']['p95']:8.1f} ms  pool wait p95 {level['db_pool']['wait_p95_ms']:7.1f} ms  "
+            f"loop lag p95 {level['event_loop_lag_ms']['p95']:6.1f} ms  RSS {level['peak_rss_mb']:.0f} MB  "
+            f"errors {level['errors']}",
+            flush=True,
+        )
+    return levels, find_saturation(levels)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    add_stub_arguments(parser)
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=[1, 2, 4, 8, 16, 32],
+        help="콤마로 구분한 동시 실행 수 단계",
+    )
+    parser.add_argument("--requests-per-worker", type=int, default=4)
+    parser.add_argument("--reuse-questions", action="store_true", help="같은 질문을 반복하여 캐시 경로를 측정")
+    parser.add_argument("--report", help="markdown 보고서를 저장할 경로")
+    parser.add_argument("--json", help="단계별 측정값을 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    levels, saturation = asyncio.run(run_load_test(args))
+    report = render_report(args, levels, saturation)
+    print()
+    print(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            f.write(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"levels": levels, "saturation": saturation}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
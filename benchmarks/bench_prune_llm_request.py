@@ -0,0 +1,78 @@
+"""
+remove_non_text_part_from_llmrequest_before_model_callback micro-benchmark
+대화 길이(content 수)와 첨부 크기에 따른 callback 1회 호출 비용을 이전 구현(전체 deepcopy)과 비교합니다.
+
+Usage:
+    python benchmarks/bench_prune_llm_request.py [--repeat 20] [--attachment-kb 512]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from copy import deepcopy
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import google.genai.types as types
+from google.adk.models import LlmRequest
+
+from agents.utils.file_utils import remove_non_text_part_from_llmrequest_before_model_callback
+
+
+def _previous_implementation(callback_context, llm_request: LlmRequest) -> None:
+    """비교 기준: 모든 content를 deepcopy 한 뒤 parts를 필터링하던 이전 구현"""
+    new_contents = []
+    for content in llm_request.contents:
+        new_content = deepcopy(content)
+        new_content.parts = list(
+            filter(lambda part: getattr(part, "inline_data", None) == None, content.parts)
+        )
+        new_contents.append(new_content)
+    llm_request.contents = new_contents
+
+
+def make_history(num_of_turns: int, attachment_kb: int, attachment_every: int = 5) -> list[types.Content]:
+    """user / model 턴이 번갈아 있고 attachment_every 턴마다 inline 첨부가 있는 대화 기록을 만듭니다."""
+    attachment = os.urandom(attachment_kb * 1024)
+    contents = []
+    for i in range(num_of_turns):
+        parts = [types.Part(text=f"turn {i}: 2024년 A 라인 설비별 수율을 알려줘")]
+        if i % attachment_every == 0:
+            parts.append(types.Part(inline_data=types.Blob(mime_type="image/png", data=attachment)))
+        contents.append(types.Content(role="user" if i % 2 == 0 else "model", parts=parts))
+    return contents
+
+
+def measure(callback, history: list[types.Content], repeat: int) -> float:
+    """callback 1회 호출의 평균 시간(ms). ADK와 같이 매 호출마다 새 contents 목록을 전달합니다."""
+    callback_context = SimpleNamespace(agent_name="root_agent", invocation_id="bench")
+    requests = [LlmRequest(contents=deepcopy(history)) for _ in range(repeat)]
+
+    start = time.perf_counter()
+    for llm_request in requests:
+        callback(callback_context, llm_request)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--attachment-kb", type=int, default=512)
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 50, 100, 200])
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    print(f"attachment: {args.attachment_kb} KB every 5 turns, repeat: {args.repeat}")
+    print(f"{'turns':>6} {'previous(ms)':>14} {'current(ms)':>12} {'speedup':>8}")
+    for num_of_turns in args.turns:
+        history = make_history(num_of_turns, args.attachment_kb)
+        previous = measure(_previous_implementation, history, args.repeat)
+        current = measure(remove_non_text_part_from_llmrequest_before_model_callback, history, args.repeat)
+        print(f"{num_of_turns:>6} {previous:>14.3f} {current:>12.3f} {previous / current:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
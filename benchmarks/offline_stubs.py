@@ -0,0 +1,637 @@
+"""
+외부 서버 없이 agent pipeline을 실행하기 위한 benchmark용 stub
+- ScriptedLlm: LiteLlm 대신 질문 파일에 적힌 칼럼명 / SQL로 agent별 응답을 만드는 모델 (지연 시간 설정 가능)
+- FakeEmbeddingServer: 텍스트 hash로 결정적인 벡터를 반환하는 로컬 HTTP 임베딩 서버
+- install_in_process_chroma: layer_info_column_description.json을 in-process Chroma collection으로 구성
+- FakePool: psycopg AsyncConnectionPool과 같은 interface의 가짜 DB pool (EXPLAIN / SELECT / COPY)
+- ByteCounter: 단계별로 복사된 bytes 집계
+
+agents 모듈은 import 시점에 환경 변수를 읽으므로 configure_environment()와 install_fake_pool()을
+agents import 전에 호출해야 합니다.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import AsyncGenerator, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+EMBEDDING_DIMENSION = 64
+# 같은 질문을 캐시와 무관한 새 질문으로 만들 때 body 뒤에 붙이는 표시
+_VARIANT_PATTERN = re.compile(r" \(#\d+\)$")
+CHROMA_COLLECTION_NAME = "bga_layer_db_descriptions"
+
+
+class ByteCounter:
+    """단계별 bytes / 호출 수 누적 (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bytes: dict[str, int] = defaultdict(int)
+        self.calls: dict[str, int] = defaultdict(int)
+
+    def add(self, stage: str, num_of_bytes: int) -> None:
+        with self._lock:
+            self.bytes[stage] += num_of_bytes
+            self.calls[stage] += 1
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self.bytes)
+
+    @staticmethod
+    def diff(after: dict[str, int], before: dict[str, int]) -> dict[str, int]:
+        return {stage: value - before.get(stage, 0) for stage, value in after.items() if value - before.get(stage, 0)}
+
+
+BYTES = ByteCounter()
+
+
+def _jittered(latency_ms: float, jitter: float, rng: random.Random) -> float:
+    if latency_ms <= 0:
+        return 0.0
+    return latency_ms * rng.uniform(1 - jitter, 1 + jitter) / 1000
+
+
+# ---------------------------------------------------------------------------
+# 질문 파일
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Question:
+    """
+    질문 파일(requests.jsonl 형식) 한 줄
+    body가 사용자 질문이며, columns / sql은 ScriptedLlm이 응답을 만드는 데 사용합니다.
+    sql이 목록이면 SQL 생성 시도 순서대로 사용합니다. (앞의 SQL이 검증에 실패하는 경우 재시도 재현)
+    """
+
+    request_id: str
+    title: str
+    body: str
+    columns: list[str] = field(default_factory=list)
+    sql: list[str] = field(default_factory=list)
+
+
+def make_variant(question: Question, n: int) -> Question:
+    """body만 다른 질문을 만듭니다. semantic / 임베딩 캐시에 걸리지 않으며, ScriptedLlm은 원래 질문으로 응답합니다."""
+    return Question(
+        request_id=question.request_id,
+        title=question.title,
+        body=f"{question.body} (#{n})",
+        columns=question.columns,
+        sql=question.sql,
+    )
+
+
+def load_questions(path: str) -> list[Question]:
+    questions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            sql = data.get("sql") or []
+            questions.append(
+                Question(
+                    request_id=data["request_id"],
+                    title=data.get("title", ""),
+                    body=data["body"],
+                    columns=data.get("columns") or [],
+                    sql=[sql] if isinstance(sql, str) else sql,
+                )
+            )
+    return questions
+
+
+# ---------------------------------------------------------------------------
+# LLM
+# ---------------------------------------------------------------------------
+
+
+class LlmCallLog:
+    """ScriptedLlm 호출 기록: 질문별 호출 수 / 요청 bytes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls_by_question: dict[str, int] = defaultdict(int)
+        self.calls_by_agent: dict[str, int] = defaultdict(int)
+
+    def record(self, question_id: str, agent_name: str) -> None:
+        with self._lock:
+            self.calls_by_question[question_id] += 1
+            self.calls_by_agent[agent_name] += 1
+
+
+LLM_CALLS = LlmCallLog()
+
+
+def _content_text(content) -> str:
+    return "".join(part.text or "" for part in content.parts or [] if not part.thought)
+
+
+def _has_function_response(content) -> bool:
+    return any(part.function_response for part in content.parts or [])
+
+
+def _request_bytes(llm_request) -> int:
+    size = sum(len(content.model_dump_json(exclude_none=True)) for content in llm_request.contents)
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    return size + (len(instruction.encode("utf-8")) if isinstance(instruction, str) else 0)
+
+
+def _make_scripted_llm_class():
+    from google.adk.models import BaseLlm, LlmResponse
+    from google.genai import types
+
+    class ScriptedLlm(BaseLlm):
+        """
+        agent 이름에 따라 정해진 형식의 응답을 돌려주는 모델
+        - root_agent: data_search_agent로 transfer
+        - column_name_extractor / column_name_standardizer: output_schema JSON
+        - column_name_reviewer: exit_column_extraction_loop 호출
+        - SQL 생성 agent: 질문의 sql (검증 실패로 재시도하면 다음 sql)
+        - sql_reviewer: query_bga_database 호출
+        """
+
+        agent_name: str
+        questions: dict[str, Question]
+        latency_ms: float = 0.0
+        jitter: float = 0.0
+        seed: int = 0
+
+        def model_post_init(self, __context) -> None:
+            self._rng = random.Random(self.seed)
+
+        def _find_question(self, contents) -> tuple[Optional[Question], int]:
+            for i in range(len(contents) - 1, -1, -1):
+                if contents[i].role == "user":
+                    question = self.questions.get(_VARIANT_PATTERN.sub("", _content_text(contents[i])))
+                    if question is not None:
+                        return question, i
+            return None, 0
+
+        def _respond(self, llm_request) -> types.Content:
+            contents = llm_request.contents
+            question, question_index = self._find_question(contents)
+            last_is_function_response = bool(contents) and _has_function_response(contents[-1])
+            name = self.agent_name
+
+            def text(value: str) -> types.Content:
+                return types.Content(role="model", parts=[types.Part(text=value)])
+
+            def call(function_name: str, **args) -> types.Content:
+                return types.Content(
+                    role="model",
+                    parts=[types.Part(function_call=types.FunctionCall(name=function_name, args=args))],
+                )
+
+            if question is None:
+                return text("처리할 질문을 찾지 못했습니다.")
+
+            if name == "root_agent":
+                if last_is_function_response or question_index != len(contents) - 1:
+                    return text("요청한 데이터를 첨부 파일로 저장했습니다.")
+                return call("transfer_to_agent", agent_name="data_search_agent")
+
+            if name == "column_name_extractor":
+                items = [{"extracted_column_name": column.split(".")[-1]} for column in question.columns]
+                return text(json.dumps({"items": items}, ensure_ascii=False))
+
+            if name == "column_name_reviewer":
+                if last_is_function_response:
+                    return text("Column name extraction completed.")
+                return call("exit_column_extraction_loop")
+
+            if name == "column_name_standardizer":
+                items = [
+                    {"extracted_column_name": column.split(".")[-1], "standard_column_name": column}
+                    for column in question.columns
+                ]
+                return text(json.dumps({"items": items}, ensure_ascii=False))
+
+            # 이번 질문 이후 이미 생성된 SQL 수 = 재시도 횟수
+            generated = [
+                _content_text(content)
+                for content in contents[question_index + 1 :]
+                if "```sql" in _content_text(content)
+            ]
+            if name == "sql_reviewer":
+                if last_is_function_response:
+                    return text("Query successfully executed. Please check the attachment files.")
+                from agents.sub_agents.data_search_agent.tools.bga_sql_validator import extract_sql
+
+                sql = extract_sql(generated[-1]) if generated else (question.sql[-1] if question.sql else "")
+                return call("query_bga_database", generated_sql=sql)
+
+            if question.sql:
+                sql = question.sql[min(len(generated), len(question.sql) - 1)]
+                return text(f"```sql\n{sql}\n```")
+            return text("SQL을 생성할 수 없습니다.")
+
+        async def generate_content_async(
+            self, llm_request, stream: bool = False
+        ) -> AsyncGenerator["LlmResponse", None]:
+            question, _ = self._find_question(llm_request.contents)
+            LLM_CALLS.record(question.request_id if question else "-", self.agent_name)
+            BYTES.add("llm.request", _request_bytes(llm_request))
+
+            await asyncio.sleep(_jittered(self.latency_ms, self.jitter, self._rng))
+            content = self._respond(llm_request)
+            BYTES.add("llm.response", len(content.model_dump_json(exclude_none=True)))
+            yield LlmResponse(content=content)
+
+    return ScriptedLlm
+
+
+def install_scripted_llm(
+    agent, questions: list[Question], latency_ms: float = 0.0, jitter: float = 0.0, seed: int = 0
+) -> int:
+    """
+    agent tree의 모든 LlmAgent 모델을 ScriptedLlm으로 교체합니다.
+
+    Returns:
+        int: 교체한 LlmAgent 수
+    """
+    from google.adk.agents import LlmAgent
+
+    scripted_llm_class = _make_scripted_llm_class()
+    questions_by_body = {question.body: question for question in questions}
+    replaced = 0
+    stack = [agent]
+    while stack:
+        current = stack.pop()
+        stack.extend(current.sub_agents)
+        if isinstance(current, LlmAgent):
+            current.model = scripted_llm_class(
+                model=f"scripted/{current.name}",
+                agent_name=current.name,
+                questions=questions_by_body,
+                latency_ms=latency_ms,
+                jitter=jitter,
+                seed=seed + replaced,
+            )
+            replaced += 1
+    return replaced
+
+
+# ---------------------------------------------------------------------------
+# 임베딩 서버 / Chroma
+# ---------------------------------------------------------------------------
+
+
+def fake_embedding(text: str, dimension: int = EMBEDDING_DIMENSION) -> list[float]:
+    """텍스트 hash 기반 결정적 단위 벡터"""
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    rng = random.Random(digest)
+    vector = [rng.gauss(0, 1) for _ in range(dimension)]
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector]
+
+
+class FakeEmbeddingServer:
+    """
+    OpenAI embeddings API 형식({"input": [...]} -> {"data": [{"embedding": [...]}]})의 로컬 HTTP 서버
+    별도 thread에서 실행되며, 요청마다 latency_ms만큼 지연합니다.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, jitter: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                texts = json.loads(body)["input"]
+                if isinstance(texts, str):
+                    texts = [texts]
+                delay = _jittered(server.latency_ms, server.jitter, server._rng)
+                if delay:
+                    time.sleep(delay)
+                response = json.dumps(
+                    {"data": [{"index": i, "embedding": fake_embedding(text)} for i, text in enumerate(texts)]}
+                ).encode("utf-8")
+                server.requests += 1
+                server.texts += len(texts)
+                BYTES.add("embedding.http", len(body) + len(response))
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, format, *args):
+                return
+
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.requests = 0
+        self.texts = 0
+        self._rng = random.Random(0)
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://{host}:{self._httpd.server_address[1]}/v1/embeddings"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-embedding", daemon=True)
+
+    def start(self) -> "FakeEmbeddingServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def install_in_process_chroma(collection_name: str = CHROMA_COLLECTION_NAME) -> int:
+    """
+    layer_info_column_description.json의 칼럼 문서를 in-process(EphemeralClient) Chroma collection에 넣고,
+    bga_retrieval_clients가 원격 서버 대신 이 collection을 사용하도록 설정합니다.
+
+    Returns:
+        int: collection 문서 수
+    """
+    import chromadb
+    import chromadb.config
+
+    from agents.sub_agents.data_search_agent.tools import bga_retrieval_clients
+    from agents.sub_agents.data_search_agent.tools.bga_local_vector_index import (
+        load_column_descriptions,
+        make_column_document,
+        make_column_embedding_text,
+    )
+
+    client = chromadb.EphemeralClient(settings=chromadb.config.Settings(anonymized_telemetry=False, allow_reset=True))
+    client.reset()
+    collection = client.create_collection(
+        collection_name, embedding_function=None, metadata={"hnsw:space": "cosine"}
+    )
+    entries = load_column_descriptions()
+    collection.add(
+        ids=[f"{entry['table']}.{entry['column_name']}" for entry in entries],
+        embeddings=[fake_embedding(make_column_embedding_text(entry)) for entry in entries],
+        documents=[make_column_document(entry) for entry in entries],
+    )
+    bga_retrieval_clients._chroma_client = client
+    bga_retrieval_clients._chroma_collection = collection
+    return len(entries)
+
+
+# ---------------------------------------------------------------------------
+# DB
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class _Column:
+    name: str
+
+
+class FakeCursor:
+    """psycopg AsyncCursor 중 query 실행 경로에서 사용하는 부분만 흉내 냅니다."""
+
+    def __init__(self, pool: "FakePool"):
+        self._pool = pool
+        self._rows: list[tuple] = []
+        self._position = 0
+        self.description: Optional[list[_Column]] = None
+        self.rowcount = -1
+
+    async def __aenter__(self) -> "FakeCursor":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    async def execute(self, query, params=None) -> "FakeCursor":
+        await asyncio.sleep(_jittered(self._pool.latency_ms, self._pool.jitter, self._pool._rng))
+        statement = str(query).strip()
+        upper = statement.upper()
+        if upper.startswith("EXPLAIN"):
+            rows = self._pool.rows_per_query
+            plan = [{"Plan": {"Node Type": "Seq Scan", "Plan Rows": rows, "Total Cost": rows * 0.01}}]
+            self._set_result(["QUERY PLAN"], [(plan,)])
+        elif upper.startswith("SET "):
+            self._set_result([], [])
+        elif "SET_CONFIG" in upper:
+            self._set_result(["set_config"], [(str(params[0]) if params else "",)])
+        elif "INFORMATION_SCHEMA" in upper:
+            self._set_result(["table_name", "column_name"], self._pool.catalog_rows())
+        else:
+            columns = self._pool.select_columns(statement)
+            self._set_result(columns, self._pool.make_rows(columns))
+        return self
+
+    def _set_result(self, columns: list[str], rows: list[tuple]) -> None:
+        self.description = [_Column(column) for column in columns]
+        self._rows = rows
+        self._position = 0
+        self.rowcount = len(rows)
+        BYTES.add("db.rows", sum(len(str(value)) for row in rows for value in row))
+
+    async def fetchone(self):
+        rows = await self.fetchmany(1)
+        return rows[0] if rows else None
+
+    async def fetchmany(self, size: int = 1) -> list[tuple]:
+        rows = self._rows[self._position : self._position + size]
+        self._position += len(rows)
+        return rows
+
+    async def fetchall(self) -> list[tuple]:
+        return await self.fetchmany(len(self._rows) - self._position)
+
+    @contextlib.asynccontextmanager
+    async def copy(self, statement: str):
+        inner = statement[statement.index("(") + 1 : statement.rindex(")")]
+        inner = inner[: inner.upper().rindex(") TO STDOUT")] if ") TO STDOUT" in inner.upper() else inner
+        await self.execute(inner)
+        columns = [column.name for column in self.description]
+        lines = [",".join(columns)] + [",".join(str(value) for value in row) for row in self._rows]
+        chunks = [("\n".join(lines) + "\n").encode("utf-8")]
+
+        class _Copy:
+            def __aiter__(self_copy):
+                return self_copy
+
+            async def __anext__(self_copy):
+                if not chunks:
+                    raise StopAsyncIteration
+                return chunks.pop(0)
+
+        yield _Copy()
+
+
+class FakeConnection:
+    def __init__(self, pool: "FakePool"):
+        self._pool = pool
+
+    def cursor(self, name: Optional[str] = None) -> FakeCursor:
+        return FakeCursor(self._pool)
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class FakePool:
+    """
+    AsyncConnectionPool.connection()과 같은 interface의 가짜 pool
+    max_size 개의 연결만 동시에 빌려줄 수 있으며, 연결을 기다린 시간을 기록합니다.
+    SELECT는 select 목록의 칼럼으로 rows_per_query 개의 행을 만들어 돌려줍니다.
+    """
+
+    def __init__(self, max_size: int = 10, rows_per_query: int = 100, latency_ms: float = 0.0, jitter: float = 0.0):
+        self.max_size = max_size
+        self.rows_per_query = rows_per_query
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self._rng = random.Random(0)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+        self.in_use = 0
+        self.max_in_use = 0
+        self.waits: list[float] = []
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_size)
+            self._loop = loop
+        return self._semaphore
+
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        semaphore = self._get_semaphore()
+        start = time.perf_counter()
+        async with semaphore:
+            self.waits.append(time.perf_counter() - start)
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            try:
+                yield FakeConnection(self)
+            finally:
+                self.in_use -= 1
+
+    @staticmethod
+    def select_columns(statement: str) -> list[str]:
+        import sqlglot
+
+        try:
+            parsed = sqlglot.parse_one(statement, read="postgres")
+            columns = [expression.alias_or_name for expression in parsed.selects]
+        except Exception:
+            columns = []
+        return [column if column and column != "*" else f"column_{i}" for i, column in enumerate(columns)] or ["value"]
+
+    def make_rows(self, columns: list[str]) -> list[tuple]:
+        return [tuple(f"{column}_{i:06d}" for column in columns) for i in range(self.rows_per_query)]
+
+    @staticmethod
+    def catalog_rows() -> list[tuple]:
+        from agents.sub_agents.data_search_agent.tools.bga_local_vector_index import load_column_descriptions
+
+        return [(entry["table"], entry["column_name"]) for entry in load_column_descriptions()]
+
+
+def install_fake_pool(pool: FakePool) -> None:
+    """agents.utils.database_utils.POOL을 가짜 pool로 설정합니다. (tools import 전에 호출)"""
+    import agents.utils.database_utils as database_utils
+
+    database_utils.POOL = pool
+
+
+# ---------------------------------------------------------------------------
+# 환경 / runner
+# ---------------------------------------------------------------------------
+
+
+def configure_environment(embedding_url: str) -> None:
+    """agents import 전에 외부 서버 설정을 로컬 stub으로 지정합니다. 이미 설정된 값은 유지합니다."""
+    os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+    os.environ.setdefault("ROOT_AGENT_MODEL", "openai/offline-benchmark")
+    os.environ["TEXT_EMBEDDING_MODEL_URL"] = embedding_url
+    os.environ.setdefault("TEXT_EMBEDDING_MODEL_NAME", "bge-m3-ko")
+    os.environ.setdefault("BGA_LAYER_DB_DESCRIPTIONS_VECTOR_DB_COLLECTION", CHROMA_COLLECTION_NAME)
+
+
+def make_counting_artifact_service():
+    """저장된 artifact bytes를 artifact.save 단계로 집계하는 InMemoryArtifactService"""
+    from google.adk.artifacts import InMemoryArtifactService
+
+    class CountingArtifactService(InMemoryArtifactService):
+        async def save_artifact(self, **kwargs) -> int:
+            artifact = kwargs.get("artifact")
+            if artifact is not None and artifact.inline_data is not None:
+                BYTES.add("artifact.save", len(artifact.inline_data.data))
+            return await super().save_artifact(**kwargs)
+
+    return CountingArtifactService()
+
+
+def make_runner(agent, app_name: str = "offline_benchmark"):
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+
+    return Runner(
+        app_name=app_name,
+        agent=agent,
+        session_service=InMemorySessionService(),
+        artifact_service=make_counting_artifact_service(),
+    )
+
+
+async def run_question(runner, question: Question, user_id: str = "benchmark") -> dict:
+    """
+    새 session에서 질문 하나를 실행합니다.
+
+    Returns:
+        dict: latency_s, events, error, 마지막 응답 text
+    """
+    from google.genai import types
+
+    session = await runner.session_service.create_session(app_name=runner.app_name, user_id=user_id)
+    message = types.Content(role="user", parts=[types.Part(text=question.body)])
+    events = 0
+    final_text = ""
+    error = None
+    start = time.perf_counter()
+    try:
+        async for event in runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+            events += 1
+            if event.content and event.content.parts and event.content.parts[0].text:
+                final_text = event.content.parts[0].text
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "latency_s": time.perf_counter() - start,
+        "events": events,
+        "error": error,
+        "final_text": final_text,
+    }
+
+
+def percentile(values: list[float], q: float) -> float:
+    """선형 보간 백분위수 (q: 0~100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
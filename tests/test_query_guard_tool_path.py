@@ -0,0 +1,79 @@
+"""
+sql_reviewer tool 경로의 query guard 거부 처리 테스트
+query_bga_database가 QueryGuardError를 구조화된 오류로 반환하면
+after_tool_callback(save_file_artifact_after_tool_callback)은 예외 없이 응답을 그대로 agent에 전달해야 합니다.
+
+Usage:
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agents.utils.database_utils as database_utils
+
+# 테스트에서는 DB에 연결하지 않음 (_guarded_execute를 대체)
+if not hasattr(database_utils, "POOL"):
+    database_utils.POOL = None
+
+from google.adk.tools import FunctionTool
+
+from agents.sub_agents.data_search_agent.tools import sql_generator_tools
+from agents.sub_agents.data_search_agent.tools.bga_query_guard import QueryGuardError
+from agents.utils.file_utils import save_file_artifact_after_tool_callback
+
+
+def _make_tool_context():
+    return SimpleNamespace(
+        agent_name="sql_reviewer",
+        state={},
+        user_content=None,
+        actions=SimpleNamespace(escalate=None),
+    )
+
+
+class QueryGuardToolPathTest(unittest.IsolatedAsyncioTestCase):
+    async def _run_reviewer_tool(self, error: QueryGuardError):
+        tool_context = _make_tool_context()
+        args = {"generated_sql": "SELECT * FROM table1"}
+
+        async def reject(generated_sql):
+            raise error
+
+        with mock.patch.object(sql_generator_tools, "_guarded_execute", reject), mock.patch.object(
+            sql_generator_tools, "BGA_QUERY_RESULT_CACHE_ENABLED", False
+        ):
+            response = await sql_generator_tools.query_bga_database(tool_context=tool_context, **args)
+
+        callback_result = await save_file_artifact_after_tool_callback(
+            FunctionTool(sql_generator_tools.query_bga_database), args, response, tool_context
+        )
+        return response, callback_result, tool_context
+
+    async def test_estimated_rows_rejection_is_passed_to_reviewer(self):
+        error = QueryGuardError(
+            "estimated_rows_exceeded", "Estimated rows exceed the budget.", estimated_rows=1e9, limit=5e6
+        )
+        response, callback_result, tool_context = await self._run_reviewer_tool(error)
+
+        self.assertIsNone(callback_result)
+        self.assertEqual(response["status"], "error")
+        self.assertEqual(response["data"]["error_type"], "query_guard")
+        self.assertEqual(response["data"]["reason"], "estimated_rows_exceeded")
+        self.assertIsNone(tool_context.actions.escalate)
+
+    async def test_statement_timeout_is_passed_to_reviewer(self):
+        error = QueryGuardError("statement_timeout", "Query cancelled.", statement_timeout_ms=60000)
+        response, callback_result, _ = await self._run_reviewer_tool(error)
+
+        self.assertIsNone(callback_result)
+        self.assertEqual(response["data"]["reason"], "statement_timeout")
+
+
+if __name__ == "__main__":
+    unittest.main()
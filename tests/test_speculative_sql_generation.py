@@ -0,0 +1,178 @@
+"""
+SpeculativeSqlGenerationAgent 후보 선택 / 취소 / 전체 실패 처리 테스트
+실제 LLM 대신 정해진 지연 후 SQL을 출력하는 stub sub-agent를 사용하고, 검증은 stub 함수로 대체합니다.
+
+Usage:
+    python -m unittest discover -s tests
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+from typing import AsyncGenerator
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agents.utils.database_utils as database_utils
+
+# 테스트에서는 DB에 연결하지 않음 (validate_generated_sql을 대체)
+if not hasattr(database_utils, "POOL"):
+    database_utils.POOL = None
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService
+from google.genai.types import Content, Part
+
+from agents.constants.constants import (
+    BGA_GENERATED_SQL_STATES,
+    BGA_SQL_VALIDATION_STATES,
+    BGA_VALIDATED_SQL_STATES,
+)
+from agents.sub_agents.data_search_agent.sub_agents import sql_validation_agent, speculative_sql_generation_agent
+from agents.sub_agents.data_search_agent.sub_agents.speculative_sql_generation_agent import (
+    SpeculativeSqlGenerationAgent,
+)
+from agents.sub_agents.data_search_agent.sub_agents.sql_validation_agent import SqlValidationAgent
+from agents.sub_agents.data_search_agent.tools.bga_sql_validator import SqlValidationResult
+
+
+class _StubSqlGenerator(BaseAgent):
+    """delay 초 후 sql을 최종 응답으로 출력하는 SQL 생성 agent"""
+
+    sql: str
+    delay: float = 0.0
+    fail: bool = False
+    cancelled: bool = False
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fail:
+            raise RuntimeError("LLM error")
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=Content(role="model", parts=[Part(text=f"```sql\n{self.sql}\n```")]),
+        )
+
+
+async def _stub_validate(generated_sql: str) -> SqlValidationResult:
+    if "bad" in generated_sql:
+        return SqlValidationResult(sql=generated_sql, valid=False, errors=["Unknown table 'bad'"])
+    return SqlValidationResult(sql=generated_sql, valid=True)
+
+
+async def _make_context(agent: BaseAgent, state: dict = None) -> InvocationContext:
+    session_service = InMemorySessionService()
+    session = await session_service.create_session(app_name="test", user_id="user", state=state or {})
+    return InvocationContext(
+        session_service=session_service,
+        invocation_id="invocation",
+        agent=agent,
+        session=session,
+    )
+
+
+async def _run(agent: BaseAgent, state: dict = None) -> tuple[list[Event], dict]:
+    ctx = await _make_context(agent, state)
+    events = [event async for event in agent.run_async(ctx)]
+    state_delta = {}
+    for event in events:
+        state_delta.update(event.actions.state_delta)
+    return events, state_delta
+
+
+class SpeculativeSqlGenerationTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(speculative_sql_generation_agent, "validate_generated_sql", _stub_validate)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_selects_first_valid_candidate_and_cancels_the_rest(self):
+        invalid = _StubSqlGenerator(name="invalid", sql="SELECT * FROM bad", delay=0.0)
+        valid = _StubSqlGenerator(name="valid", sql="SELECT * FROM table1", delay=0.05)
+        slow = _StubSqlGenerator(name="slow", sql="SELECT * FROM table2", delay=5.0)
+        agent = SpeculativeSqlGenerationAgent(name="sql_generator", sub_agents=[invalid, valid, slow])
+
+        events, state_delta = await asyncio.wait_for(_run(agent), timeout=2)
+
+        self.assertIn("SELECT * FROM table1", state_delta[BGA_GENERATED_SQL_STATES])
+        self.assertEqual(
+            state_delta[BGA_VALIDATED_SQL_STATES],
+            {
+                "generated_sql": "SELECT * FROM table1",
+                "result": {"sql": "SELECT * FROM table1", "valid": True, "errors": []},
+            },
+        )
+        self.assertTrue(slow.cancelled)
+        # 선택된 후보의 event만 현재 branch에 남음
+        self.assertEqual({event.author for event in events}, {"valid", "sql_generator"})
+        self.assertTrue(all(event.branch is None for event in events))
+
+    async def test_falls_back_to_first_completed_when_all_fail_validation(self):
+        first = _StubSqlGenerator(name="first", sql="SELECT * FROM bad", delay=0.0)
+        second = _StubSqlGenerator(name="second", sql="SELECT * FROM bad2", delay=0.05)
+        agent = SpeculativeSqlGenerationAgent(name="sql_generator", sub_agents=[first, second])
+
+        _, state_delta = await _run(agent)
+
+        self.assertIn("SELECT * FROM bad\n", state_delta[BGA_GENERATED_SQL_STATES])
+        self.assertIsNone(state_delta[BGA_VALIDATED_SQL_STATES])
+
+    async def test_stores_empty_sql_when_every_candidate_raises(self):
+        agent = SpeculativeSqlGenerationAgent(
+            name="sql_generator",
+            sub_agents=[
+                _StubSqlGenerator(name="first", sql="", fail=True),
+                _StubSqlGenerator(name="second", sql="", fail=True),
+            ],
+        )
+
+        events, state_delta = await _run(agent)
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(state_delta[BGA_GENERATED_SQL_STATES], "")
+        self.assertIsNone(state_delta[BGA_VALIDATED_SQL_STATES])
+
+
+class SqlValidationReuseTest(unittest.IsolatedAsyncioTestCase):
+    async def _validate(self, generated_sql: str, validated: dict) -> tuple[mock.AsyncMock, dict]:
+        agent = SqlValidationAgent(name="sql_validation", direct_execution=False)
+        state = {BGA_GENERATED_SQL_STATES: f"```sql\n{generated_sql}\n```", BGA_VALIDATED_SQL_STATES: validated}
+        validate = mock.AsyncMock(side_effect=_stub_validate)
+        with mock.patch.object(sql_validation_agent, "validate_generated_sql", validate):
+            _, state_delta = await _run(agent, state)
+        return validate, state_delta
+
+    async def test_reuses_speculative_validation_result(self):
+        validated = {
+            "generated_sql": "SELECT * FROM table1",
+            "result": {"sql": "SELECT * FROM table1", "valid": True, "errors": []},
+        }
+        validate, state_delta = await self._validate("SELECT * FROM table1", validated)
+
+        validate.assert_not_called()
+        self.assertEqual(state_delta[BGA_SQL_VALIDATION_STATES], "")
+        self.assertIsNone(state_delta[BGA_VALIDATED_SQL_STATES])
+
+    async def test_validates_again_when_sql_differs(self):
+        validated = {
+            "generated_sql": "SELECT * FROM table1",
+            "result": {"sql": "SELECT * FROM table1", "valid": True, "errors": []},
+        }
+        validate, state_delta = await self._validate("SELECT * FROM bad", validated)
+
+        validate.assert_awaited_once_with("SELECT * FROM bad")
+        self.assertEqual(state_delta[BGA_SQL_VALIDATION_STATES]["errors"], ["Unknown table 'bad'"])
+
+
+if __name__ == "__main__":
+    unittest.main()